@@ -1,5 +1,6 @@
 from litestar import Router
 
 from app.api.v1.controllers.alert_controller import AlertController
+from app.api.v1.controllers.health_controller import HealthController
 
-v1_router = Router("/v1", route_handlers=[AlertController])
+v1_router = Router("/v1", route_handlers=[AlertController, HealthController])
@@ -1,12 +1,16 @@
-import json
 import uuid
 
 from dishka import FromDishka
 from dishka.integrations.litestar import inject
 from litestar import Controller, Request, get, post
 
+from app.api.v1.ingest import read_webhook_payload
 from app.api.v1.responses.job_respose import JobResponse
+from app.domain.value_objects.deadline import Deadline
 from app.services.interfaces import IExtractorService
+from app.settings.settings import Settings
+from app.utils.profiler import profiling
+from app.utils.tracing import trace
 
 
 class AlertController(Controller):
@@ -22,12 +26,20 @@ class AlertController(Controller):
     )
     @inject
     async def webhook(
-        self, request: Request, service: FromDishka[IExtractorService]
+        self,
+        request: Request,
+        service: FromDishka[IExtractorService],
+        settings: FromDishka[Settings],
     ) -> JobResponse:
         """Вебхук для графаны"""
-        raw = await request.body()
-        payload = json.loads(raw.decode("utf-8"))
-        return await service.extract(payload)
+        deadline = Deadline.after(settings.alert.request_budget_s)
+        token = request.headers.get(settings.profiling.header)
+        with (
+            profiling(settings.profiling, "webhook", token=token),
+            trace("webhook", route=request.url.path),
+        ):
+            payload = await read_webhook_payload(request, settings.webhook)
+            return await service.extract(payload, deadline)
 
     @get(path="/status/{job_id:uuid}", summary="Получение статуса задачи")
     @inject
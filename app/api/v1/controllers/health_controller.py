@@ -0,0 +1,21 @@
+from litestar import Controller, Request, get
+from litestar.exceptions import ServiceUnavailableException
+
+
+class HealthController(Controller):
+    """Контроллер проверок состояния процесса"""
+
+    path = "/health"
+    tags = ["Health"]
+
+    @get(path="/live", summary="Процесс запущен")
+    async def live(self) -> dict:
+        """Проверка живости"""
+        return {"status": "ok"}
+
+    @get(path="/ready", summary="Процесс готов принимать вебхуки")
+    async def ready(self, request: Request) -> dict:
+        """Готовность выставляется после прогрева соединений"""
+        if not request.app.state.warmup.ready:
+            raise ServiceUnavailableException("Прогрев не завершён")
+        return {"status": "ready"}
@@ -0,0 +1,37 @@
+from typing import Any
+
+from litestar import Request
+
+from app.domain.exceptions import ExtractionException, PayloadTooLargeException
+from app.domain.schemes.grafana import prune_alert, prune_webhook_payload
+from app.infrastructure.metrics import WEBHOOK_ALERTS_DROPPED, WEBHOOK_BODY_BYTES
+from app.settings.settings import WebhookSettings
+from app.utils.json_stream import JsonArrayReader
+
+
+async def read_webhook_payload(request: Request, settings: WebhookSettings) -> dict[str, Any]:
+    """Потоковое чтение тела вебхука Grafana.
+
+    Тело читается частями до WEBHOOK_MAX_BODY_BYTES. Алерты разбираются по одному
+    по мере чтения: первые WEBHOOK_MAX_ALERTS сохраняются только с используемыми
+    полями, остальные отбрасываются и учитываются в truncatedAlerts.
+    """
+    reader = JsonArrayReader("alerts", settings.max_alerts, prune_alert)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.max_body_bytes:
+                raise PayloadTooLargeException(
+                    msg=f"Тело вебхука больше {settings.max_body_bytes} байт",
+                    ctx={"max_body_bytes": settings.max_body_bytes},
+                )
+            reader.feed(chunk)
+        payload = reader.finish()
+    except ValueError as e:
+        raise ExtractionException(msg=f"Тело вебхука не является JSON объектом: {e}")
+    WEBHOOK_BODY_BYTES.observe(received)
+
+    if reader.dropped:
+        WEBHOOK_ALERTS_DROPPED.inc(reader.dropped)
+    return prune_webhook_payload(payload, reader.dropped)
@@ -1,15 +1,26 @@
+from app.infrastructure.metrics import start_metrics_server
 from app.infrastructure.worker.celery import celery_app
 from app.settings.settings import settings
 
 
 def main() -> None:
     """Поднятие воркера celery"""
+    if settings.worker.metrics_port:
+        start_metrics_server(settings.worker.metrics_port)
+    queues = ",".join(settings.worker.celery_queue(p) for p in settings.worker.queues_list)
+    autoscale = settings.autoscale
+    if autoscale.enabled:
+        celery_app.conf.worker_autoscaler = "app.infrastructure.worker.autoscale:QueueAutoscaler"
+        concurrency = f"--autoscale={autoscale.max_workers},{autoscale.min_workers}"
+    else:
+        concurrency = f"--concurrency={settings.scaling.effective_celery_workers}"
     celery_app.worker_main(
         [
             "worker",
             "--loglevel=INFO",
-            f"--concurrency={settings.scaling.effective_celery_workers}",
+            concurrency,
             "--pool=prefork",
+            f"--queues={queues}",
         ]
     )
 
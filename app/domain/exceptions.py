@@ -5,6 +5,7 @@ class DomainException(Exception):
     error_code: str = "domain_error"
     loc: list[str] = ["domain"]
     field: str | None = None
+    headers: dict[str, str] | None = None
 
     def __init__(self, msg: str | None = None, *, ctx: dict | None = None):
         super().__init__(msg or self.__doc__ or "Domain error")
@@ -19,8 +20,27 @@ class ExtractionException(DomainException):
     error_code = "extraction_error"
 
 
+class PayloadTooLargeException(DomainException):
+    """Тело вебхука превышает допустимый размер"""
+
+    status_code: int = 413
+    error_code = "payload_too_large"
+
+
 class TemplateRenderingException(DomainException):
     """Ошибка рендеринга шаблонов"""
 
     status_code: int = 429
     error_code = "template_rendering_error"
+
+
+class AdmissionRejectedException(DomainException):
+    """Сервис перегружен, повторите запрос позже"""
+
+    status_code: int = 503
+    error_code = "admission_rejected"
+
+    def __init__(self, msg: str | None = None, *, retry_after_s: int, status_code: int = 503):
+        super().__init__(msg, ctx={"retry_after_s": retry_after_s})
+        self.status_code = status_code
+        self.headers = {"Retry-After": str(retry_after_s)}
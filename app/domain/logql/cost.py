@@ -0,0 +1,48 @@
+import math
+
+from app.domain.value_objects.loki import IndexStats, QueryPlan
+from app.settings.settings import QueryCostSettings
+
+
+def format_bytes(size: int) -> str:
+    """Объём в двоичных единицах для уведомлений"""
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def plan_query(
+    stats: IndexStats, start_ns: int, end_ns: int, config: QueryCostSettings
+) -> QueryPlan:
+    """Стратегия поиска совпадений по оценке объёма окна.
+
+    Объём считается равномерно распределённым по окну: для деления на части и
+    сужения окна доля времени берётся пропорционально доле объёма. Части идут
+    от поздней к ранней, так поиск последних совпадений останавливается на первых.
+    """
+    cost = f"~{format_bytes(stats.bytes)} in {stats.streams} streams"
+    if stats.streams > config.max_streams or stats.bytes > config.narrow_max_bytes:
+        return QueryPlan(
+            "refuse",
+            [],
+            f"log context skipped: query_match would scan {cost}; narrow the stream selector",
+        )
+    if stats.bytes <= config.run_max_bytes:
+        return QueryPlan("run", [(start_ns, end_ns)])
+
+    span_ns = end_ns - start_ns
+    if stats.bytes <= config.shard_max_bytes:
+        shards = min(config.max_shards, math.ceil(stats.bytes / config.run_max_bytes))
+        step = math.ceil(span_ns / shards)
+        ranges = [(max(start_ns, end - step), end) for end in range(end_ns, start_ns, -step)]
+        return QueryPlan("shard", ranges)
+
+    narrowed_ns = max(1, span_ns * config.run_max_bytes // stats.bytes)
+    return QueryPlan(
+        "narrow",
+        [(end_ns - narrowed_ns, end_ns)],
+        f"search window narrowed to the last {narrowed_ns / 1e9:.0f}s: query_match would scan {cost}",
+    )
@@ -0,0 +1,274 @@
+import re
+from functools import lru_cache
+
+from app.domain.value_objects.logql import (
+    FilterOp,
+    LabelMatcher,
+    LineFilter,
+    MatchOp,
+    ParsedQuery,
+    compile_anchored,
+)
+
+_LABEL_RE = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+_MATCH_OPS: tuple[MatchOp, ...] = ("=~", "!~", "!=", "=")
+_FILTER_OPS: tuple[FilterOp, ...] = ("|=", "|~", "!=", "!~")
+_SIMPLE_ESCAPES = {
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "\\": "\\",
+    '"': '"',
+    "'": "'",
+}
+_HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+# Опережающие и ретроспективные проверки, атомарные группы, именованные обратные ссылки,
+# условия и комментарии есть в Python re, но не в RE2
+_RE2_UNSUPPORTED_GROUPS = ("(?=", "(?!", "(?<=", "(?<!", "(?>", "(?P=", "(?(", "(?#")
+
+
+class LogQLSyntaxError(ValueError):
+    """Запрос гарантированно невалиден, Loki его отклонит"""
+
+
+class LogQLUnsupportedError(ValueError):
+    """Конструкция не поддерживается локальным разбором, решение за Loki"""
+
+
+class _Scanner:
+    """Посимвольный разбор текста запроса"""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    @property
+    def eof(self) -> bool:
+        return self.pos >= len(self.text)
+
+    def skip_ws(self) -> None:
+        while not self.eof and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self, token: str) -> bool:
+        return self.text.startswith(token, self.pos)
+
+    def take(self, tokens: tuple[str, ...]) -> str | None:
+        for token in tokens:
+            if self.peek(token):
+                self.pos += len(token)
+                return token
+        return None
+
+    def read_label(self) -> str:
+        m = _LABEL_RE.match(self.text, self.pos)
+        if not m:
+            raise LogQLSyntaxError(f"Ожидалось имя метки в позиции {self.pos}")
+        self.pos = m.end()
+        return m.group()
+
+    def at_string(self) -> bool:
+        return self.peek('"') or self.peek("`")
+
+    def read_string(self) -> str:
+        if self.peek("`"):
+            end = self.text.find("`", self.pos + 1)
+            if end < 0:
+                raise LogQLSyntaxError(f"Незакрытая строка в позиции {self.pos}")
+            value = self.text[self.pos + 1 : end]
+            self.pos = end + 1
+            return value
+        if not self.peek('"'):
+            raise LogQLSyntaxError(f"Ожидалась строка в позиции {self.pos}")
+        return self._read_quoted()
+
+    def _read_quoted(self) -> str:
+        """Строка в двойных кавычках с экранированием по правилам Go"""
+        out: list[str] = []
+        i = self.pos + 1
+        text = self.text
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self.pos = i + 1
+                return "".join(out)
+            if ch == "\n":
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            esc = text[i + 1 : i + 2]
+            if esc in _SIMPLE_ESCAPES:
+                out.append(_SIMPLE_ESCAPES[esc])
+                i += 2
+            elif esc in _HEX_ESCAPES:
+                width = _HEX_ESCAPES[esc]
+                digits = text[i + 2 : i + 2 + width]
+                if len(digits) != width or not all(c in "0123456789abcdefABCDEF" for c in digits):
+                    raise LogQLSyntaxError(f"Некорректная escape-последовательность в позиции {i}")
+                out.append(chr(int(digits, 16)))
+                i += 2 + width
+            elif esc and esc in "01234567":
+                digits = text[i + 1 : i + 4]
+                if len(digits) != 3 or not all(c in "01234567" for c in digits):
+                    raise LogQLSyntaxError(f"Некорректная escape-последовательность в позиции {i}")
+                out.append(chr(int(digits, 8)))
+                i += 4
+            else:
+                raise LogQLUnsupportedError(f"Escape-последовательность \\{esc} в позиции {i}")
+        raise LogQLSyntaxError(f"Незакрытая строка в позиции {self.pos}")
+
+
+def _check_regex(value: str) -> None:
+    """Регулярные выражения Loki (RE2) и Python различаются — спорное отдаём Loki"""
+    construct = _re2_unsupported(value)
+    if construct is not None:
+        raise LogQLUnsupportedError(
+            f"Регулярное выражение {value!r}: {construct} не поддерживается RE2"
+        )
+    try:
+        compile_anchored(value)
+    except re.error as e:
+        raise LogQLUnsupportedError(f"Регулярное выражение {value!r}: {e}")
+
+
+def _re2_unsupported(value: str) -> str | None:
+    """Конструкция, которую принимает Python re, но отклоняет RE2"""
+    i = 0
+    in_class = False
+    after_quantifier = False
+    while i < len(value):
+        c = value[i]
+        if c == "\\":
+            esc = value[i + 1 : i + 2]
+            if esc and esc in "123456789" and not in_class:
+                return f"обратная ссылка \\{esc}"
+            i += 2
+            after_quantifier = False
+            continue
+        if in_class:
+            in_class = c != "]"
+            i += 1
+            continue
+        if c == "[":
+            i += 1
+            if value[i : i + 1] == "^":
+                i += 1
+            # ] сразу после [ или [^ — литерал, а не конец класса
+            if value[i : i + 1] == "]":
+                i += 1
+            in_class = True
+            after_quantifier = False
+            continue
+        if c == "(":
+            for group in _RE2_UNSUPPORTED_GROUPS:
+                if value.startswith(group, i):
+                    return f"конструкция {group}"
+        if c == "+" and after_quantifier:
+            return "притяжательный квантификатор"
+        after_quantifier = c in "*+?}"
+        i += 1
+    return None
+
+
+def _parse_selector(scanner: _Scanner) -> tuple[LabelMatcher, ...]:
+    scanner.take(("{",))
+    matchers: list[LabelMatcher] = []
+    while True:
+        scanner.skip_ws()
+        name = scanner.read_label()
+        scanner.skip_ws()
+        op = scanner.take(_MATCH_OPS)
+        if op is None:
+            raise LogQLSyntaxError(f"Ожидался оператор сравнения метки в позиции {scanner.pos}")
+        scanner.skip_ws()
+        value = scanner.read_string()
+        if op in ("=~", "!~"):
+            _check_regex(value)
+        matchers.append(LabelMatcher(name=name, op=op, value=value))
+        scanner.skip_ws()
+        if scanner.take(("}",)):
+            break
+        if not scanner.take((",",)):
+            raise LogQLSyntaxError(f"Ожидалась ',' или '}}' в позиции {scanner.pos}")
+    return tuple(matchers)
+
+
+def _parse_line_filters(scanner: _Scanner) -> tuple[LineFilter, ...]:
+    filters: list[LineFilter] = []
+    while True:
+        scanner.skip_ws()
+        start = scanner.pos
+        op = scanner.take(_FILTER_OPS)
+        if op is None:
+            break
+        scanner.skip_ws()
+        if not scanner.at_string():
+            # ip("..."), шаблоны и прочие формы фильтров разбирает Loki
+            scanner.pos = start
+            break
+        value = scanner.read_string()
+        after_value = scanner.pos
+        scanner.skip_ws()
+        if re.match(r"or\b", scanner.text[scanner.pos :]):
+            scanner.pos = start
+            break
+        scanner.pos = after_value
+        if op in ("|~", "!~"):
+            _check_regex(value)
+        filters.append(LineFilter(op=op, value=value))
+    return tuple(filters)
+
+
+@lru_cache(maxsize=1024)
+def parse_logql(query: str) -> ParsedQuery:
+    """Разбор LogQL запроса логов: селектор потоков и фильтры строк.
+
+    Неразобранный остаток конвейера возвращается в ParsedQuery.pipeline.
+
+    Raises:
+        LogQLSyntaxError: запрос невалиден.
+        LogQLUnsupportedError: запрос (например, метрический) не разбирается локально.
+    """
+    scanner = _Scanner(query)
+    scanner.skip_ws()
+    if not scanner.peek("{"):
+        raise LogQLUnsupportedError("Ожидался запрос логов, начинающийся с селектора потоков")
+
+    matchers = _parse_selector(scanner)
+    if all(m.matches({}) for m in matchers):
+        raise LogQLSyntaxError(
+            "Селектор должен содержать хотя бы одно условие, не совпадающее с пустым значением"
+        )
+    line_filters = _parse_line_filters(scanner)
+
+    pipeline = query[scanner.pos :].strip()
+    if pipeline and not pipeline.startswith(("|", "!")):
+        raise LogQLUnsupportedError(f"Неожиданный фрагмент запроса: {pipeline[:40]!r}")
+    return ParsedQuery(matchers=matchers, line_filters=line_filters, pipeline=pipeline)
+
+
+@lru_cache(maxsize=1024)
+def parse_selector(text: str) -> tuple[LabelMatcher, ...]:
+    """Разбор набора условий на метки вида {name="value", other=~"re.*"}.
+
+    В отличие от селектора запроса Loki допускает условия, совпадающие с пустым значением.
+
+    Raises:
+        LogQLSyntaxError: текст не является набором условий.
+        LogQLUnsupportedError: условие не разбирается локально.
+    """
+    scanner = _Scanner(text)
+    scanner.skip_ws()
+    if not scanner.peek("{"):
+        raise LogQLSyntaxError("Набор условий должен начинаться с '{'")
+    matchers = _parse_selector(scanner)
+    scanner.skip_ws()
+    if not scanner.eof:
+        raise LogQLSyntaxError(f"Неожиданный фрагмент после условий: {text[scanner.pos :][:40]!r}")
+    return matchers
@@ -0,0 +1,117 @@
+import re
+
+from app.domain.value_objects.loki import LogCluster, LokiEntry
+
+# Переменные части строки заменяются типизированными масками до разбора
+_MASK = re.compile(
+    r"(?P<TS>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)"
+    r"|(?P<UUID>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)"
+    r"|(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b)"
+    r"|(?P<HEX>\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,}\b)"
+    r"|(?P<NUM>(?<![\w.])[-+]?\d+(?:\.\d+)?(?![\w.]))"
+)
+WILDCARD = "<*>"
+
+
+def mask(line: str) -> str:
+    """Строка с замаскированными временем, идентификаторами, адресами и числами"""
+    return _MASK.sub(lambda m: f"<{m.lastgroup}>", line)
+
+
+class _Group:
+    __slots__ = ("count", "entry", "tokens")
+
+    def __init__(self, tokens: list[str], entry: LokiEntry) -> None:
+        self.tokens = tokens
+        self.count = 1
+        self.entry = entry
+
+
+class _Node:
+    __slots__ = ("children", "groups")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.groups: list[_Group] = []
+
+
+class DrainClusterer:
+    """Группировка строк лога в шаблоны по алгоритму Drain.
+
+    Строка маскируется и разбивается на токены; по дереву фиксированной глубины
+    (число токенов, затем первые depth - 2 токена) выбирается лист с группами,
+    и строка присоединяется к самой похожей группе, если доля совпавших токенов
+    не меньше similarity. Различающиеся токены шаблона группы заменяются на <*>.
+    """
+
+    def __init__(
+        self,
+        *,
+        depth: int = 4,
+        similarity: float = 0.4,
+        max_children: int = 100,
+        max_groups: int = 1000,
+    ) -> None:
+        self._prefix = max(0, depth - 2)
+        self._similarity = similarity
+        self._max_children = max_children
+        self._max_groups = max_groups
+        self._root = _Node()
+        self._groups: list[_Group] = []
+        self.lines = 0
+        self.overflow = 0
+
+    def add(self, entry: LokiEntry) -> None:
+        """Учёт строки; первая строка группы становится её представителем"""
+        self.lines += 1
+        tokens = mask(entry.line).split()
+        leaf = self._leaf(tokens)
+
+        best, best_key = None, (-1.0, -1)
+        for group in leaf.groups:
+            key = self._score(group.tokens, tokens)
+            if key > best_key:
+                best, best_key = group, key
+        if best is not None and best_key[0] >= self._similarity:
+            best.count += 1
+            best.tokens = [
+                a if a == b else WILDCARD for a, b in zip(best.tokens, tokens, strict=True)
+            ]
+            return
+        if len(self._groups) >= self._max_groups:
+            self.overflow += 1
+            return
+        group = _Group(tokens, entry)
+        leaf.groups.append(group)
+        self._groups.append(group)
+
+    def clusters(self) -> list[LogCluster]:
+        """Шаблоны по убыванию числа строк, при равенстве — в порядке появления"""
+        groups = sorted(self._groups, key=lambda g: -g.count)
+        return [LogCluster(" ".join(g.tokens), g.count, g.entry) for g in groups]
+
+    def _leaf(self, tokens: list[str]) -> _Node:
+        node = self._root.children.setdefault(str(len(tokens)), _Node())
+        for token in tokens[: self._prefix]:
+            # Токены с цифрами — почти наверняка параметры, им отдельная ветка не нужна
+            key = WILDCARD if any(c.isdigit() for c in token) else token
+            child = node.children.get(key)
+            if child is None:
+                if len(node.children) >= self._max_children:
+                    key = WILDCARD
+                child = node.children.setdefault(key, _Node())
+            node = child
+        return node
+
+    @staticmethod
+    def _score(template: list[str], tokens: list[str]) -> tuple[float, int]:
+        """Доля совпавших токенов и число <*> в шаблоне (при равной доле лучше общий шаблон)"""
+        if not tokens:
+            return 1.0, 0
+        same = wildcards = 0
+        for a, b in zip(template, tokens, strict=True):
+            if a == WILDCARD:
+                wildcards += 1
+            elif a == b:
+                same += 1
+        return same / len(tokens), wildcards
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import toml
+from pydantic import ValidationError
+
+from app.domain.logql.parser import parse_selector
+from app.domain.policy.interfaces import IEnrichmentPolicyEngine
+from app.domain.policy.matcher import MatcherIndex
+from app.domain.value_objects.policy import EnrichmentPolicy
+from app.settings.settings import Settings
+from app.utils.celery_logging import get_celery_logger
+
+logger = get_celery_logger(__name__)
+
+STATUS_LABEL = "__status__"
+DEFAULT_POLICY = EnrichmentPolicy()
+
+
+class EnrichmentPolicyEngine(IEnrichmentPolicyEngine):
+    """Выбор политики обогащения по меткам алерта из TOML файла POLICY_FILE.
+
+    Политики проверяются в порядке файла, применяется первая совпавшая;
+    условия компилируются один раз при запуске.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        path = settings.policy.file
+        self._index: MatcherIndex[EnrichmentPolicy] = (
+            self._load(Path(path)) if path else MatcherIndex([])
+        )
+
+    def resolve(self, labels: dict[str, str]) -> EnrichmentPolicy:
+        """Политика для алерта с метками labels"""
+        return self._index.first(labels) or DEFAULT_POLICY
+
+    @staticmethod
+    def _load(path: Path) -> MatcherIndex[EnrichmentPolicy]:
+        data = toml.load(path)
+        rules = []
+        for i, raw in enumerate(data.get("policy", []), start=1):
+            try:
+                policy = EnrichmentPolicy.model_validate(raw)
+                matchers = parse_selector(policy.match) if policy.match else ()
+            except (ValidationError, ValueError) as e:
+                raise ValueError(f"Некорректная политика #{i} в {path}: {e}") from e
+            rules.append((matchers, policy))
+        logger.info(f"Загружено политик обогащения: {len(rules)} из {path}")
+        return MatcherIndex(rules)
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+
+from app.domain.value_objects.policy import EnrichmentPolicy
+
+
+class IEnrichmentPolicyEngine(ABC):
+    """Выбор политики обогащения алерта"""
+
+    @abstractmethod
+    def resolve(self, labels: dict[str, str]) -> EnrichmentPolicy:
+        """Политика для алерта с метками labels"""
@@ -0,0 +1,42 @@
+from collections.abc import Iterator, Sequence
+
+from app.domain.value_objects.logql import LabelMatcher
+
+
+class MatcherIndex[T]:
+    """Упорядоченный набор правил с условиями на метки и индексом по равенствам.
+
+    Правило с условием name="value" (непустым) попадает в индекс по этой паре и
+    проверяется только для алертов с такой меткой; правила без равенств проверяются
+    всегда. Порядок правил сохраняется, поэтому «первое совпавшее» совпадает
+    с порядком в конфигурации.
+    """
+
+    def __init__(self, rules: Sequence[tuple[tuple[LabelMatcher, ...], T]]) -> None:
+        self._rules = list(rules)
+        self._by_equality: dict[tuple[str, str], list[int]] = {}
+        self._always: list[int] = []
+        for i, (matchers, _) in enumerate(self._rules):
+            key = next(((m.name, m.value) for m in matchers if m.op == "=" and m.value), None)
+            if key is None:
+                self._always.append(i)
+            else:
+                self._by_equality.setdefault(key, []).append(i)
+
+    def __len__(self) -> int:
+        """Число правил"""
+        return len(self._rules)
+
+    def matching(self, labels: dict[str, str]) -> Iterator[T]:
+        """Значения совпавших правил в порядке конфигурации"""
+        candidates = set(self._always)
+        for item in labels.items():
+            candidates.update(self._by_equality.get(item, ()))
+        for i in sorted(candidates):
+            matchers, value = self._rules[i]
+            if all(m.matches(labels) for m in matchers):
+                yield value
+
+    def first(self, labels: dict[str, str]) -> T | None:
+        """Значение первого совпавшего правила"""
+        return next(self.matching(labels), None)
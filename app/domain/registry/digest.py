@@ -0,0 +1,65 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.settings.settings import DigestSettings
+
+
+@dataclass(frozen=True)
+class DigestFlush:
+    """Запрос на отправку накопленного дайджеста получателю"""
+
+    channel: str
+    recipient: str
+    countdown_s: int
+
+
+class DigestBuffer:
+    """Накопитель уведомлений по получателям в Redis, общий для всех процессов воркера"""
+
+    _PREFIX = "alert-proxy:digest"
+
+    def __init__(self, redis: Redis, settings: DigestSettings) -> None:
+        self._redis = redis
+        self._settings = settings
+
+    async def add(
+        self, channel: str, recipient: str, payload: dict[str, Any]
+    ) -> DigestFlush | None:
+        """Добавление уведомления в дайджест.
+
+        Возвращает запрос на отправку, если окно только что открыто (отправка по
+        истечении окна) либо превышен порог по количеству или объёму (отправка сразу).
+        """
+        raw = json.dumps(payload, ensure_ascii=False)
+        items_key, size_key = self._keys(channel, recipient)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(items_key, raw)
+            pipe.incrby(size_key, len(raw))
+            # Страховка от вечного буфера, если отправка дайджеста потерялась
+            pipe.expire(items_key, self._settings.window_s * 10)
+            pipe.expire(size_key, self._settings.window_s * 10)
+            count, size, *_ = await pipe.execute()
+
+        if count >= self._settings.max_items or size >= self._settings.max_bytes:
+            return DigestFlush(channel=channel, recipient=recipient, countdown_s=0)
+        if count == 1:
+            return DigestFlush(
+                channel=channel, recipient=recipient, countdown_s=self._settings.window_s
+            )
+        return None
+
+    async def drain(self, channel: str, recipient: str) -> list[dict[str, Any]]:
+        """Атомарное извлечение всех накопленных уведомлений получателя"""
+        items_key, size_key = self._keys(channel, recipient)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(items_key, 0, -1)
+            pipe.delete(items_key, size_key)
+            items, _ = await pipe.execute()
+        return [json.loads(item) for item in items]
+
+    def _keys(self, channel: str, recipient: str) -> tuple[str, str]:
+        base = f"{self._PREFIX}:{channel}:{recipient}"
+        return f"{base}:items", f"{base}:size"
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
+from typing import Any
 
-from app.domain.value_objects.notification import Notification
+from app.domain.registry.digest import DigestFlush
+from app.domain.value_objects.delivery import ChannelOutcome
 from app.infrastructure.adapters.interfaces import NotificationSender
 
 
@@ -13,5 +15,28 @@ class INotificationRegistry(ABC):
         """Получение объектов"""
 
     @abstractmethod
-    async def send_all(self, notification: Notification) -> None:
-        """Отправка уведомлений рассыльщиками"""
+    async def send_all(
+        self, payload: dict, recipients: dict[str, list[str]] | None = None
+    ) -> dict[str, ChannelOutcome]:
+        """Отправка уведомлений рассыльщиками, возвращает результаты по каналам.
+
+        recipients — получатели по каналам для повторной отправки.
+        """
+
+    @abstractmethod
+    async def collect_digest(self, payload: dict) -> list[DigestFlush]:
+        """Накопление уведомления в дайджесты получателей"""
+
+    @abstractmethod
+    async def warm_up(self) -> None:
+        """Компиляция шаблонов и подготовка соединений каналов"""
+
+    @abstractmethod
+    async def drain_digest(self, channel: str, recipient: str) -> list[dict[str, Any]]:
+        """Извлечение накопленного дайджеста получателя из буфера"""
+
+    @abstractmethod
+    async def send_digest(
+        self, channel: str, recipient: str, payloads: list[dict[str, Any]]
+    ) -> ChannelOutcome:
+        """Отправка дайджеста получателю, возвращает результат канала"""
@@ -1,15 +1,23 @@
-from collections.abc import Iterable
+import asyncio
+from collections.abc import Callable, Iterable
 from typing import Any
 
+from redis.asyncio import Redis
+
 from app.domain.exceptions import TemplateRenderingException
+from app.domain.policy.enrichment import STATUS_LABEL
+from app.domain.registry.digest import DigestBuffer, DigestFlush
 from app.domain.registry.interfaces import INotificationRegistry
+from app.domain.registry.routing import AlertRouter
+from app.domain.value_objects.delivery import ChannelOutcome
 from app.domain.value_objects.notification import Notification
 from app.infrastructure.adapters.email import EmailAdapter
-from app.infrastructure.adapters.interfaces import NotificationSender, NotificationSenderFactory
+from app.infrastructure.adapters.interfaces import NotificationSender
 from app.infrastructure.adapters.telegram import TelegramAdapter
 from app.infrastructure.template_render.interfaces import ITemplateRenderer
 from app.settings.settings import Settings
 from app.utils.celery_logging import get_celery_logger
+from app.utils.tracing import annotate, span
 
 logger = get_celery_logger(__name__)
 
@@ -17,13 +25,9 @@ logger = get_celery_logger(__name__)
 class NotificationRegistry(INotificationRegistry):
     """Реестр рассыльщиков для передачи им полномочий рассылки"""
 
-    _FACTORY: dict[str, NotificationSenderFactory] = {
-        "telegram": TelegramAdapter,
-        "email": EmailAdapter,
-    }
-
-    def __init__(self, settings: Settings, render_engine: ITemplateRenderer) -> None:
+    def __init__(self, settings: Settings, render_engine: ITemplateRenderer, redis: Redis) -> None:
         self._settings = settings
+        self._redis = redis
         self._senders: dict[str, NotificationSender] = {}
         self._template_engine: ITemplateRenderer = render_engine
         self._enabled_channels = self._settings.channels.channels_list
@@ -32,15 +36,46 @@ class NotificationRegistry(INotificationRegistry):
             "telegram": settings.templates.tg,
             "email": settings.templates.email,
         }
+        self._digest_template_map = {
+            "telegram": settings.templates.tg_digest,
+            "email": settings.templates.email_digest,
+        }
+        self._digest = DigestBuffer(redis, settings.digest)
+        self._router = AlertRouter(settings)
+
+    def _factories(self) -> dict[str, Callable[[], NotificationSender]]:
+        """Создание рассыльщиков каналов с нужными каждому зависимостями"""
+        return {
+            "telegram": lambda: TelegramAdapter(self._settings, self._redis),
+            "email": lambda: EmailAdapter(self._settings),
+        }
 
     def _init_senders(self) -> None:
         """Инициализация доступных рассыльщиков"""
+        factories = self._factories()
         for channel in self._enabled_channels:
-            sender_cls = self._FACTORY.get(channel)
-            if not sender_cls:
+            factory = factories.get(channel)
+            if not factory:
                 continue
 
-            self._senders[channel] = sender_cls(self._settings)
+            self._senders[channel] = factory()
+
+    async def warm_up(self) -> None:
+        """Компиляция шаблонов и подготовка соединений каналов.
+
+        Ошибка канала не мешает остальным: при отправке он подготовится сам.
+        """
+        self._template_engine.precompile(
+            [self._template_map[c] for c in self._senders]
+            + [self._digest_template_map[c] for c in self._senders]
+        )
+        channels = list(self._senders)
+        results = await asyncio.gather(
+            *(sender.warm_up() for sender in self._senders.values()), return_exceptions=True
+        )
+        for channel, result in zip(channels, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning(f"Не удалось прогреть канал {channel}: {result}")
 
     def get_senders(self) -> Iterable[NotificationSender]:
         """Получение объектов"""
@@ -58,20 +93,97 @@ class NotificationRegistry(INotificationRegistry):
             raise TemplateRenderingException(msg=f"Ошибка рендеринга шаблонов {e}")
         return notifications
 
-    async def send_all(self, payload: dict[str, Any]) -> None:
-        """Отправка уведомлений рассыльщиками"""
-        results = {}
-        errors = []
+    async def send_all(
+        self, payload: dict[str, Any], recipients: dict[str, list[str]] | None = None
+    ) -> dict[str, ChannelOutcome]:
+        """Отправка уведомлений рассыльщиками, возвращает результаты по каналам.
+
+        recipients — получатели по каналам для повторной отправки; без них
+        получатели определяются маршрутизацией.
+        """
+        results: dict[str, ChannelOutcome] = {}
         notifications = self._process_payload(payload)
+        receivers = self._router.route(self._labels(payload)) if recipients is None else []
         for channel, sender in self._senders.items():
             notification = notifications.get(channel)
             if not notification:
                 continue
+            if recipients is None:
+                targets = self._router.recipients(receivers, channel)
+            else:
+                targets = recipients.get(channel) or []
+            if not targets:
+                logger.info(f"Нет получателей в канале {channel}")
+                continue
+            with span("channel.send", channel=channel, recipients=len(targets)):
+                try:
+                    failed = await sender.send(notification, recipients=targets)
+                except Exception as e:
+                    logger.error(f"Ошибка канала, channel= {channel}, error={str(e)}")
+                    failed = dict.fromkeys(targets, str(e))
+                annotate(failed=len(failed))
+            results[channel] = ChannelOutcome.from_failures(targets, failed)
+        logger.info(f"Результаты отправки по каналам: {results}")
+        return results
+
+    async def collect_digest(self, payload: dict[str, Any]) -> list[DigestFlush]:
+        """Накопление уведомления в дайджесты получателей всех каналов"""
+        flushes = []
+        receivers = self._router.route(self._labels(payload))
+        for channel in self._senders:
+            for recipient in self._router.recipients(receivers, channel):
+                flush = await self._digest.add(channel, recipient, payload)
+                if flush:
+                    flushes.append(flush)
+        return flushes
+
+    @staticmethod
+    def _labels(payload: dict[str, Any]) -> dict[str, str]:
+        """Метки алерта для маршрутизации"""
+        labels = {k: str(v) for k, v in (payload.get("common_labels") or {}).items()}
+        labels.setdefault("alertname", str(payload.get("alertname", "")))
+        labels[STATUS_LABEL] = str(payload.get("status", "")).lower()
+        return labels
+
+    async def drain_digest(self, channel: str, recipient: str) -> list[dict[str, Any]]:
+        """Извлечение накопленного дайджеста получателя; для выключенного канала пусто"""
+        if channel not in self._senders:
+            return []
+        return await self._digest.drain(channel, recipient)
+
+    async def send_digest(
+        self, channel: str, recipient: str, payloads: list[dict[str, Any]]
+    ) -> ChannelOutcome:
+        """Отправка дайджеста одному получателю.
+
+        Ошибка рендеринга или канала возвращается результатом, а не исключением:
+        извлечённые из буфера уведомления повторяет и сохраняет вызывающий.
+        """
+        try:
+            if len(payloads) == 1:
+                notification = self._template_engine.render(
+                    self._template_map.get(channel), payload=payloads[0]
+                )
+            else:
+                notification = self._template_engine.render_digest(
+                    self._digest_template_map[channel], payloads=payloads
+                )
+        except Exception as e:
+            logger.error(f"Рендеринг дайджеста завершился с ошибкой {e}")
+            return ChannelOutcome.from_failures(
+                [recipient], {recipient: f"Ошибка рендеринга дайджеста {e}"}
+            )
+
+        with span("channel.send", channel=channel, recipients=1, digest=len(payloads)):
             try:
-                success = await sender.send(notification)
-                results[channel] = success
+                failed = await self._senders[channel].send(notification, recipients=[recipient])
             except Exception as e:
                 logger.error(f"Ошибка канала, channel= {channel}, error={str(e)}")
-                results[channel] = False
-                errors.append(f"{channel}: {str(e)}")
-        logger.info(f"Результаты отправки по каналам: {results}, ошибки: {errors}")
+                failed = {recipient: str(e)}
+            annotate(failed=len(failed))
+        outcome = ChannelOutcome.from_failures([recipient], failed)
+        logger.info(
+            f"Дайджест из {len(payloads)} уведомлений отправлен, "
+            f"channel={channel}, recipient={recipient}, success={outcome.ok}"
+        )
+        return outcome
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import toml
+from pydantic import ValidationError
+
+from app.domain.logql.parser import parse_selector
+from app.domain.policy.matcher import MatcherIndex
+from app.domain.value_objects.routing import ReceiverConfig, RouteConfig
+from app.infrastructure.metrics import ALERT_ROUTES
+from app.settings.settings import Settings
+from app.utils.celery_logging import get_celery_logger
+
+logger = get_celery_logger(__name__)
+
+DEFAULT_RECEIVER = "default"
+
+
+@dataclass(frozen=True)
+class _Route:
+    """Скомпилированный узел дерева"""
+
+    receiver: str
+    continue_: bool
+    children: MatcherIndex["_Route"]
+
+
+class AlertRouter:
+    """Маршрутизация уведомлений по группам получателей, как в Alertmanager.
+
+    Дерево из RECEIVERS_ROUTES_FILE обходится в глубину: алерт уходит в самые
+    глубокие совпавшие узлы, на каждом уровне — в первый совпавший, если у него
+    нет continue. Дочерние узлы каждого уровня собраны в индекс по равенствам,
+    поэтому стоимость маршрутизации не растёт с числом маршрутов. Группа default
+    по умолчанию — адресаты RECEIVERS_TG_IDS и RECEIVERS_EMAILS.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        receivers = settings.receivers
+        self._receivers: dict[str, ReceiverConfig] = {
+            DEFAULT_RECEIVER: ReceiverConfig(
+                name=DEFAULT_RECEIVER,
+                telegram=receivers.tg_ids_list or [],
+                email=receivers.emails_list or [],
+            )
+        }
+        self._root: _Route | None = None
+        if receivers.routes_file:
+            self._load(Path(receivers.routes_file))
+
+    @property
+    def enabled(self) -> bool:
+        """Задано ли дерево маршрутизации"""
+        return self._root is not None
+
+    def route(self, labels: dict[str, str]) -> list[str]:
+        """Имена групп получателей для алерта с метками labels"""
+        names = [DEFAULT_RECEIVER] if self._root is None else self._walk(self._root, labels)
+        names = list(dict.fromkeys(names))
+        for name in names:
+            ALERT_ROUTES.labels(receiver=name).inc()
+        return names
+
+    def recipients(self, receivers: list[str], channel: str) -> list[str]:
+        """Получатели канала из групп receivers без повторов"""
+        recipients: dict[str, None] = {}
+        for name in receivers:
+            recipients.update(dict.fromkeys(self._receivers[name].for_channel(channel)))
+        return list(recipients)
+
+    def _walk(self, node: _Route, labels: dict[str, str]) -> list[str]:
+        matched: list[str] = []
+        for child in node.children.matching(labels):
+            matched += self._walk(child, labels)
+            if not child.continue_:
+                break
+        return matched or [node.receiver]
+
+    def _load(self, path: Path) -> None:
+        data = toml.load(path)
+        for i, raw in enumerate(data.get("receiver", []), start=1):
+            try:
+                receiver = ReceiverConfig.model_validate(raw)
+            except ValidationError as e:
+                raise ValueError(f"Некорректная группа получателей #{i} в {path}: {e}") from e
+            self._receivers[receiver.name] = receiver
+        try:
+            root = RouteConfig.model_validate(data.get("route", {}))
+        except ValidationError as e:
+            raise ValueError(f"Некорректное дерево маршрутизации в {path}: {e}") from e
+        self._root = self._compile(root, root.receiver or DEFAULT_RECEIVER, "route")
+        logger.info(f"Загружено дерево маршрутизации из {path}, групп: {len(self._receivers)}")
+
+    def _compile(self, config: RouteConfig, receiver: str, where: str) -> _Route:
+        if receiver not in self._receivers:
+            raise ValueError(f"Неизвестная группа получателей {receiver!r} в {where}")
+        rules = []
+        for i, child in enumerate(config.routes, start=1):
+            child_where = f"{where}.routes[{i}]"
+            try:
+                matchers = parse_selector(child.match) if child.match else ()
+            except ValueError as e:
+                raise ValueError(f"Некорректное условие в {child_where}: {e}") from e
+            rules.append((matchers, self._compile(child, child.receiver or receiver, child_where)))
+        return _Route(receiver=receiver, continue_=config.continue_, children=MatcherIndex(rules))
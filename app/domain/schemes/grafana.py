@@ -45,6 +45,29 @@ class GrafanaWebhookPayload(BaseModel):
         return v
 
 
+def prune_alert(alert: Any) -> Any:
+    """Оставляет в алерте только поля схемы, остальное (values, URL панелей и т.п.) отбрасывается"""
+    if not isinstance(alert, dict):
+        return alert
+    return {k: v for k, v in alert.items() if k in GrafanaAlert.model_fields}
+
+
+def prune_webhook_payload(data: dict[str, Any], dropped_alerts: int = 0) -> dict[str, Any]:
+    """Оставляет в payload только поля схем.
+
+    dropped_alerts — алерты, отброшенные при чтении тела; прибавляются к truncatedAlerts.
+    """
+    pruned = {k: v for k, v in data.items() if k in GrafanaWebhookPayload.model_fields}
+    if isinstance(pruned.get("alerts"), list):
+        pruned["alerts"] = [prune_alert(a) for a in pruned["alerts"]]
+    if dropped_alerts:
+        truncated = pruned.get("truncatedAlerts")
+        pruned["truncatedAlerts"] = (
+            truncated if isinstance(truncated, int) else 0
+        ) + dropped_alerts
+    return pruned
+
+
 class GrafanaAnnotations(BaseModel):
     """Наши кастомные аннотации для извлечения данных"""
 
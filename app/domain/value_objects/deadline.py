@@ -0,0 +1,38 @@
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Крайний срок обработки по монотонным часам"""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Срок через seconds секунд от текущего момента"""
+        return cls(expires_at=time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Оставшееся время в секундах, не меньше нуля"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Срок истёк"""
+        return self.remaining() <= 0
+
+    def shrink(self, seconds: float) -> "Deadline":
+        """Срок не позже чем через seconds секунд"""
+        return Deadline(expires_at=min(self.expires_at, time.monotonic() + seconds))
+
+    def timeout(self, cap: float) -> float:
+        """Таймаут отдельного вызова: остаток срока, но не больше cap.
+
+        Raises:
+            TimeoutError: срок уже истёк.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutError("Deadline exceeded")
+        return min(remaining, cap)
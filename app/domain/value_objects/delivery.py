@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ChannelOutcome:
+    """Результат доставки уведомления каналом.
+
+    failed — получатели, которым доставить не удалось, с текстом ошибки.
+    """
+
+    ok: bool
+    error: str | None = None
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_failures(cls, recipients: list[str], failed: dict[str, str]) -> "ChannelOutcome":
+        """Итог канала по ошибкам отдельных получателей"""
+        if not failed:
+            return cls(ok=True)
+        first = next(iter(failed.values()))
+        return cls(
+            ok=False,
+            error=f"{len(failed)} of {len(recipients)} recipients failed: {first}",
+            failed=failed,
+        )
@@ -0,0 +1,100 @@
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Literal
+
+MatchOp = Literal["=", "!=", "=~", "!~"]
+FilterOp = Literal["|=", "!=", "|~", "!~"]
+
+
+@lru_cache(maxsize=4096)
+def compile_anchored(pattern: str) -> re.Pattern[str]:
+    """Регулярное выражение, привязанное к началу и концу значения, как в Prometheus/Loki"""
+    return re.compile(f"^(?:{pattern})$")
+
+
+def quote(value: str) -> str:
+    """Строковый литерал LogQL в двойных кавычках"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+@dataclass(frozen=True)
+class LabelMatcher:
+    """Условие на метку потока вида name op value"""
+
+    name: str
+    op: MatchOp
+    value: str
+
+    def matches(self, labels: dict[str, str]) -> bool:
+        """Проверка условия на наборе меток; отсутствующая метка равна пустой строке"""
+        actual = labels.get(self.name, "")
+        if self.op == "=":
+            return actual == self.value
+        if self.op == "!=":
+            return actual != self.value
+        matched = compile_anchored(self.value).match(actual) is not None
+        return matched if self.op == "=~" else not matched
+
+    def render(self) -> str:
+        """Текстовое представление условия"""
+        return f"{self.name}{self.op}{quote(self.value)}"
+
+
+@dataclass(frozen=True)
+class LineFilter:
+    """Фильтр строк лога вида op value"""
+
+    op: FilterOp
+    value: str
+
+    def render(self) -> str:
+        """Текстовое представление фильтра"""
+        return f"{self.op} {quote(self.value)}"
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Разобранный LogQL запрос логов.
+
+    pipeline — часть конвейера после фильтров строк, которую локальный разбор
+    не понимает (парсеры, форматирование, фильтры меток); хранится как есть.
+    """
+
+    matchers: tuple[LabelMatcher, ...]
+    line_filters: tuple[LineFilter, ...]
+    pipeline: str = ""
+
+    @property
+    def fully_parsed(self) -> bool:
+        """Запрос полностью разобран локально"""
+        return not self.pipeline
+
+    @property
+    def selector(self) -> str:
+        """Селектор потоков"""
+        return "{" + ", ".join(m.render() for m in self.matchers) + "}"
+
+    @property
+    def normalized(self) -> str:
+        """Нормализованный текст запроса"""
+        parts = [self.selector, *(f.render() for f in self.line_filters)]
+        if self.pipeline:
+            parts.append(self.pipeline)
+        return " ".join(parts)
+
+    def pinned(self, labels: dict[str, str], allowlist: Iterable[str]) -> "ParsedQuery":
+        """Запрос, привязанный к конкретному потоку.
+
+        К условиям селектора добавляются равенства по меткам потока из allowlist;
+        метки без значения пропускаются.
+        """
+        own = {(m.name, m.value) for m in self.matchers if m.op == "="}
+        extra = tuple(
+            LabelMatcher(name=name, op="=", value=labels[name])
+            for name in allowlist
+            if labels.get(name) and (name, labels[name]) not in own
+        )
+        return replace(self, matchers=self.matchers + extra)
@@ -13,6 +13,15 @@ class LokiEntry:
     stream: dict[str, str]
 
 
+@dataclass(frozen=True)
+class LogCluster:
+    """Шаблон строк лога с числом совпавших строк и представителем"""
+
+    template: str
+    count: int
+    entry: LokiEntry
+
+
 @dataclass(frozen=True)
 class MatchContext:
     """ДТО запроса"""
@@ -22,3 +31,29 @@ class MatchContext:
     line: str
     before: list[str]
     after: list[str]
+    # Шаблон и число строк, если совпадения сгруппированы
+    pattern: str | None = None
+    count: int = 1
+
+
+@dataclass(frozen=True)
+class IndexStats:
+    """Статистика индекса Loki для селектора за период"""
+
+    streams: int
+    chunks: int
+    entries: int
+    bytes: int
+
+
+QueryStrategy = Literal["run", "shard", "narrow", "refuse"]
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Способ выполнения запроса по его оценённой стоимости"""
+
+    strategy: QueryStrategy
+    # Части окна поиска от поздней к ранней
+    ranges: list[tuple[int, int]]
+    reason: str = ""
@@ -1,4 +1,7 @@
 from dataclasses import dataclass
+from typing import Literal
+
+NotificationPhase = Literal["single", "initial", "followup"]
 
 
 @dataclass(frozen=True)
@@ -7,3 +10,5 @@ class Notification:
 
     title: str
     body: str
+    phase: NotificationPhase = "single"
+    thread_key: str | None = None
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class EnrichmentPolicy(BaseModel):
+    """Политика обогащения алерта контекстом Loki.
+
+    Незаданные лимиты и окна берутся из аннотаций алерта и настроек ALERT_*.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    name: str = "default"
+    match: str | None = None
+    enrich: bool = True
+    max_matches: int | None = None
+    context_before: int | None = None
+    context_after: int | None = None
+    search_window: str | None = None
+    context_time_range: str | None = None
+    summarize: bool | None = None
+    cache: bool = False
+    cache_ttl_s: float | None = None
@@ -0,0 +1,5 @@
+from typing import Literal
+
+Priority = Literal["critical", "default", "low"]
+
+PRIORITIES: tuple[Priority, ...] = ("critical", "default", "low")
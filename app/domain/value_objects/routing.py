@@ -0,0 +1,30 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ReceiverConfig(BaseModel):
+    """Группа получателей по каналам"""
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    name: str
+    telegram: list[int | str] = []
+    email: list[str] = []
+
+    def for_channel(self, channel: str) -> list[str]:
+        """Получатели группы в канале"""
+        return [str(r) for r in getattr(self, channel, None) or []]
+
+
+class RouteConfig(BaseModel):
+    """Узел дерева маршрутизации: условия на метки, группа получателей и дочерние узлы.
+
+    receiver не задан — наследуется от родителя; continue — после совпадения
+    проверяются и следующие узлы того же уровня.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid", populate_by_name=True)
+
+    match: str | None = None
+    receiver: str | None = None
+    continue_: bool = Field(default=False, alias="continue")
+    routes: list["RouteConfig"] = []
@@ -1,3 +1,4 @@
+import asyncio
 from email.message import EmailMessage
 
 import aiosmtplib
@@ -16,29 +17,60 @@ class EmailAdapter(NotificationSender):
     def __init__(self, settings: Settings):
         self._smtp = settings.smtp
         self._receivers = settings.receivers.emails_list  # list[str]
+        self._domain = settings.smtp.smtp_helo.rsplit("@", 1)[-1]
 
-    async def send(self, notification: Notification) -> bool:
-        """Рассылка email"""
+    def recipients(self) -> list[str]:
+        """Получатели канала по умолчанию"""
+        return list(self._receivers or [])
+
+    async def warm_up(self) -> None:
+        """Разрешение адреса SMTP сервера.
+
+        Соединение SMTP открывается на каждую отправку, поэтому заранее
+        прогревается только DNS (кэширующий резолвер системы).
+        """
+        if self._smtp.smtp_server:
+            await asyncio.get_running_loop().getaddrinfo(
+                self._smtp.smtp_server, self._smtp.smtp_port
+            )
+
+    async def send(
+        self, notification: Notification, recipients: list[str] | None = None
+    ) -> dict[str, str]:
+        """Рассылка email, возвращает адреса, которым доставить не удалось"""
+        receivers = recipients if recipients is not None else (self._receivers or [])
         msg = EmailMessage()
         msg["From"] = self._smtp.smtp_username
-        msg["To"] = ", ".join(self._receivers)  # ← строка
+        msg["To"] = ", ".join(receivers)  # ← строка
         msg["Subject"] = notification.title
+        if notification.thread_key:
+            # Дослать контекст в ту же ветку письма, что и первичное уведомление
+            thread_id = f"<{notification.thread_key}@{self._domain}>"
+            if notification.phase == "followup":
+                msg.replace_header("Subject", f"Re: {notification.title}")
+                msg["In-Reply-To"] = thread_id
+                msg["References"] = thread_id
+            else:
+                msg["Message-ID"] = thread_id
         msg.set_content(notification.body)
-        success = True
         try:
-            await aiosmtplib.send(
+            refused, _ = await aiosmtplib.send(
                 msg,
                 hostname=self._smtp.smtp_server,
                 port=self._smtp.smtp_port,
                 username=self._smtp.smtp_username,
                 password=self._smtp.smtp_password,
                 start_tls=True,
-                recipients=self._receivers,  # ← список
+                recipients=receivers,  # ← список
                 timeout=20,
             )
-            logger.info("Email уведомление успешно отправлено")
-            return success
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомления через email: {e}")
-            success = False
-            return success
+            return dict.fromkeys(receivers, str(e))
+        # Сервер принял письмо, но мог отклонить часть адресов
+        failed = {address: str(response) for address, response in refused.items()}
+        if failed:
+            logger.error(f"Email уведомление не принято для адресов: {', '.join(failed)}")
+        else:
+            logger.info("Email уведомление успешно отправлено")
+        return failed
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from collections.abc import AsyncIterator
 
-from app.domain.value_objects.loki import Direction, LokiEntry
+from app.domain.value_objects.deadline import Deadline
+from app.domain.value_objects.loki import Direction, IndexStats, LokiEntry
 from app.domain.value_objects.notification import Notification
 from app.settings.settings import Settings
 
@@ -12,21 +13,35 @@ class NotificationSender(ABC):
     settings: Settings
 
     @abstractmethod
-    async def send(self, notification: Notification) -> bool:
-        """Интерфейс отправки уведомления"""
+    def recipients(self) -> list[str]:
+        """Получатели канала по умолчанию"""
 
+    @abstractmethod
+    async def send(
+        self, notification: Notification, recipients: list[str] | None = None
+    ) -> dict[str, str]:
+        """Интерфейс отправки уведомления; recipients переопределяет получателей по умолчанию.
 
-class NotificationSenderFactory(Protocol):
-    """Протокол иницилизации"""
+        Возвращает получателей, которым доставить не удалось, с текстом ошибки.
+        """
 
-    def __call__(self, settings: Settings) -> NotificationSender:
-        """Инициализация"""
-        ...
+    async def warm_up(self) -> None:  # noqa: B027
+        """Подготовка соединений канала до первой отправки"""
 
 
 class ILokiAdapter(ABC):
     """Адаптер для локи"""
 
+    @abstractmethod
+    def for_tenant(self, tenant: str | None) -> "ILokiAdapter":
+        """Адаптер, выполняющий запросы от имени тенанта Loki"""
+
+    @abstractmethod
+    async def index_stats(
+        self, *, query: str, start_ns: int, end_ns: int, deadline: Deadline | None = None
+    ) -> IndexStats:
+        """Статистика индекса (потоки, чанки, строки, байты) для селектора query за период"""
+
     @abstractmethod
     async def query_range(
         self,
@@ -36,9 +51,48 @@ class ILokiAdapter(ABC):
         end_ns: int,
         limit: int,
         direction: Direction,
+        deadline: Deadline | None = None,
     ) -> list[LokiEntry]:
-        """Метод извлечения"""
+        """Метод извлечения.
+
+        При переданном deadline запрос ограничен остатком срока; по его истечении
+        поднимается TimeoutError.
+        """
+
+    @abstractmethod
+    def iter_range(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[LokiEntry]:
+        """Извлечение по одной строке в порядке direction.
+
+        Страницы запрашиваются у Loki по мере чтения: прекращение итерации
+        останавливает дальнейшие запросы.
+        """
+
+    @abstractmethod
+    def query_range_pages(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[list[LokiEntry]]:
+        """Извлечение страницами по мере получения от Loki.
+
+        Loki ограничивает число строк на запрос, поэтому строки сверх страницы
+        запрашиваются следующими запросами; всего отдаётся не больше limit строк.
+        """
 
     @abstractmethod
-    async def validate_query(self, *, query: str) -> str:
+    async def validate_query(self, *, query: str, deadline: Deadline | None = None) -> str:
         """Валидирует LogQL через Loki. Если query невалиден — Loki вернёт 4xx."""
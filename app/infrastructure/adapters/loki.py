@@ -1,13 +1,28 @@
+import copy
 import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from datetime import timedelta
 from typing import Any
 
-from pyreqwest.client import Client
-from pyreqwest.exceptions import JSONDecodeError, StatusError
+from pyreqwest.exceptions import (
+    ConnectTimeoutError,
+    JSONDecodeError,
+    NetworkError,
+    RequestTimeoutError,
+    StatusError,
+)
 
-from app.domain.value_objects.loki import Direction, LokiEntry
+from app.domain.value_objects.deadline import Deadline
+from app.domain.value_objects.loki import Direction, IndexStats, LokiEntry
 from app.infrastructure.adapters.interfaces import ILokiAdapter
+from app.infrastructure.adapters.loki_pool import LokiClientPool, LokiEndpoint
+from app.infrastructure.adapters.loki_tenants import TenantLimiter
 from app.infrastructure.exceptions import BaseAppError
+from app.infrastructure.metrics import LOKI_QUERY_PAGES
 from app.settings.settings import Settings
+from app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -15,34 +30,131 @@ logger = logging.getLogger(__name__)
 class LokiAdapter(ILokiAdapter):
     """Адаптер для Loki"""
 
-    def __init__(self, settings: Settings, client: Client) -> None:
-        self.base_url = settings.loki.base_url.rstrip("/")
+    def __init__(self, settings: Settings, pool: LokiClientPool, tenants: TenantLimiter) -> None:
         self.timeout = settings.loki.timeout_s
-        self._client = client
+        self.tenant = settings.loki_tenant.default
+        self._tenant_settings = settings.loki_tenant
+        self._pool = pool
+        self._tenants = tenants
+        self._page_size = settings.loki.max_entries_per_query
+        self._max_entries_total = settings.loki.max_entries_total
+        self._stats_ttl_s = settings.query_cost.stats_cache_ttl_s
+        self._stats_max_entries = settings.query_cost.stats_cache_max_entries
+        # Общий для адаптеров всех тенантов: for_tenant копирует ссылку
+        self._stats_cache: OrderedDict[tuple, tuple[float, IndexStats]] = OrderedDict()
 
-    async def _get_json(self, url: str, params: dict[str, Any]) -> dict[str, Any]:
-        try:
-            r = await self._client.get(url).query(params).build().send()
-            return await r.json()
+    def for_tenant(self, tenant: str | None) -> "LokiAdapter":
+        """Адаптер, выполняющий запросы от имени тенанта (X-Scope-OrgID).
+
+        Тенант вне списка разрешённых заменяется тенантом по умолчанию.
+        """
+        adapter = copy.copy(self)
+        if tenant and self._tenant_settings.is_allowed(tenant):
+            adapter.tenant = tenant
+        return adapter
+
+    async def _get_json(
+        self, path: str, params: dict[str, Any], deadline: Deadline | None = None
+    ) -> dict[str, Any]:
+        with span(
+            "loki.request", path=path, tenant=self.tenant or "", limit=params.get("limit", "")
+        ):
+            async with self._tenants.query(self.tenant):
+                return await self._send(path, params, deadline)
+
+    async def _send(
+        self, path: str, params: dict[str, Any], deadline: Deadline | None
+    ) -> dict[str, Any]:
+        tried: list[LokiEndpoint] = []
+        while True:
+            async with self._pool.endpoint(exclude=tried) as endpoint:
+                request = endpoint.client.get(f"{endpoint.base_url}{path}").query(params)
+                if self.tenant:
+                    request = request.header("X-Scope-OrgID", self.tenant)
+                if deadline is not None:
+                    # Вызов получает остаток общего срока, но не больше собственного таймаута
+                    request = request.timeout(timedelta(seconds=deadline.timeout(self.timeout)))
+                try:
+                    r = await request.build().send()
+                    payload = await r.json()
+
+                except (ConnectTimeoutError, NetworkError) as e:
+                    # Адрес недоступен либо оборвал соединение (ConnectError, ReadError,
+                    # WriteError); запросы к Loki — GET, их безопасно повторить на следующем
+                    if deadline is not None and deadline.expired:
+                        raise TimeoutError("Deadline exceeded") from e
+                    self._pool.report(endpoint, ok=False)
+                    tried.append(endpoint)
+                    if len(tried) < self._pool.size:
+                        logger.warning(f"Loki {endpoint.base_url} недоступен, повтор: {e.message}")
+                        continue
+                    raise BaseAppError(msg=f"Ошибка подключения к Loki: {e.message}")
+
+                except RequestTimeoutError as e:
+                    if deadline is not None and deadline.expired:
+                        raise TimeoutError("Deadline exceeded") from e
+                    self._pool.report(endpoint, ok=False)
+                    raise BaseAppError(msg=f"Таймаут запроса к Loki: {e.message}")
 
-        except JSONDecodeError as e:
-            raise BaseAppError(msg=f"Ошибка получения тела запроса из Loki: {e.details}")
+                except JSONDecodeError as e:
+                    self._pool.report(endpoint, ok=False)
+                    raise BaseAppError(msg=f"Ошибка получения тела запроса из Loki: {e.details}")
 
-        except StatusError as e:
-            raise BaseAppError(msg=f"Ошибка запроса к Loki: {e.details}, status code: {e.message}")
+                except StatusError as e:
+                    # 4xx — ошибка запроса, а не адреса
+                    self._pool.report(endpoint, ok=e.details["status"] < 500)
+                    raise BaseAppError(
+                        msg=f"Ошибка запроса к Loki: {e.details}, status code: {e.message}"
+                    )
 
-    async def validate_query(self, *, query: str) -> str:
+                self._pool.report(endpoint, ok=True)
+                return payload
+
+    async def validate_query(self, *, query: str, deadline: Deadline | None = None) -> str:
         """Валидирует LogQL через Loki. Если query невалиден — Loki вернёт 4xx."""
-        url = f"{self.base_url}/loki/api/v1/format_query"
+        path = "/loki/api/v1/format_query"
         params = {"query": query}
 
-        payload = await self._get_json(url, params)
+        payload = await self._get_json(path, params, deadline)
 
         data = payload.get("data")
         if not isinstance(data, str) or not data.strip():
             raise BaseAppError(msg="Loki format_query: unexpected response (no data).")
         return data.strip()
 
+    async def index_stats(
+        self, *, query: str, start_ns: int, end_ns: int, deadline: Deadline | None = None
+    ) -> IndexStats:
+        """Статистика индекса через /loki/api/v1/index/stats.
+
+        Ответ кэшируется на QUERY_COST_STATS_CACHE_TTL_S; границы окна в ключе кэша
+        округляются до того же срока, так сдвинутые окна одного алерта попадают в кэш.
+        """
+        bucket_ns = max(1, int(self._stats_ttl_s * 1_000_000_000))
+        key = (self.tenant, query, start_ns // bucket_ns, end_ns // bucket_ns)
+        cached = self._stats_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._stats_cache.move_to_end(key)
+            return cached[1]
+
+        params = {"query": query, "start": str(start_ns), "end": str(end_ns)}
+        payload = await self._get_json("/loki/api/v1/index/stats", params, deadline)
+        try:
+            stats = IndexStats(
+                streams=int(payload.get("streams", 0)),
+                chunks=int(payload.get("chunks", 0)),
+                entries=int(payload.get("entries", 0)),
+                bytes=int(payload.get("bytes", 0)),
+            )
+        except (TypeError, ValueError) as e:
+            raise BaseAppError(msg=f"Loki index/stats: unexpected response: {e}")
+
+        self._stats_cache[key] = (time.monotonic() + self._stats_ttl_s, stats)
+        self._stats_cache.move_to_end(key)
+        while len(self._stats_cache) > self._stats_max_entries:
+            self._stats_cache.popitem(last=False)
+        return stats
+
     async def query_range(
         self,
         *,
@@ -51,9 +163,146 @@ class LokiAdapter(ILokiAdapter):
         end_ns: int,
         limit: int,
         direction: Direction,
+        deadline: Deadline | None = None,
     ) -> list[LokiEntry]:
         """Запускает LogQL query_range и выдает уплощенные сущности"""
-        url = f"{self.base_url}/loki/api/v1/query_range"
+        out: list[LokiEntry] = []
+        async for page in self.query_range_pages(
+            query=query,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            limit=limit,
+            direction=direction,
+            deadline=deadline,
+        ):
+            out += page
+        return out
+
+    async def iter_range(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[LokiEntry]:
+        """Строки query_range по одной; следующая страница запрашивается по мере чтения"""
+        pages = self.query_range_pages(
+            query=query,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            limit=limit,
+            direction=direction,
+            deadline=deadline,
+        )
+        try:
+            async for page in pages:
+                for entry in page:
+                    yield entry
+        finally:
+            # Прерванное чтение не должно оставлять незакрытый генератор страниц
+            await pages.aclose()
+
+    async def query_range_pages(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[list[LokiEntry]]:
+        """Постраничный query_range: страницы отдаются по мере получения.
+
+        Граница следующей страницы — время последней строки предыдущей. Строки с этим
+        временем запрашиваются повторно (в одной наносекунде их может оказаться больше,
+        чем вошло в страницу), уже отданные отбрасываются.
+        """
+        remaining = min(limit, self._max_entries_total)
+        boundary: int | None = None
+        seen: set[tuple[tuple[tuple[str, str], ...], str]] = set()
+        pages = 0
+        stuck = False
+        try:
+            while remaining > 0 and start_ns < end_ns:
+                if boundary is not None and (stuck or len(seen) >= self._page_size):
+                    # Строк одной наносекунды больше страницы: курсором по времени их
+                    # не обойти, остаток этой наносекунды пропускается
+                    logger.warning(
+                        f"Loki: больше {self._page_size} строк с одним временем {boundary}, "
+                        "часть строк пропущена"
+                    )
+                    if direction == "BACKWARD":
+                        end_ns = boundary
+                    else:
+                        start_ns = boundary + 1
+                    seen.clear()
+                    stuck = False
+                    continue
+
+                page_limit = min(self._page_size, remaining + len(seen))
+                raw = await self._query_page(
+                    query=query,
+                    start_ns=start_ns,
+                    end_ns=end_ns,
+                    limit=page_limit,
+                    direction=direction,
+                    deadline=deadline,
+                )
+                pages += 1
+
+                page: list[LokiEntry] = []
+                for entry in raw:
+                    if boundary is not None:
+                        # Строки за границей уже отданы предыдущими страницами
+                        beyond = (
+                            entry.ts_ns > boundary
+                            if direction == "BACKWARD"
+                            else entry.ts_ns < boundary
+                        )
+                        if beyond or (entry.ts_ns == boundary and _key(entry) in seen):
+                            continue
+                    page.append(entry)
+                page = page[:remaining]
+                if page:
+                    remaining -= len(page)
+                    yield page
+
+                if len(raw) < page_limit:
+                    # Loki отдал всё, что есть в окне
+                    return
+                if not page:
+                    # Полная страница из уже отданных строк — граница не сдвигается
+                    stuck = True
+                    continue
+
+                last = page[-1].ts_ns
+                if last != boundary:
+                    boundary = last
+                    seen = set()
+                seen.update(_key(e) for e in page if e.ts_ns == boundary)
+                if direction == "BACKWARD":
+                    end_ns = boundary + 1
+                else:
+                    start_ns = boundary
+        finally:
+            LOKI_QUERY_PAGES.observe(pages)
+
+    async def _query_page(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: Deadline | None,
+    ) -> list[LokiEntry]:
+        """Одна страница query_range в порядке direction"""
+        path = "/loki/api/v1/query_range"
         params = {
             "query": query,
             "start": str(start_ns),
@@ -62,7 +311,7 @@ class LokiAdapter(ILokiAdapter):
             "direction": direction,
         }
 
-        payload = await self._get_json(url, params)
+        payload = await self._get_json(path, params, deadline)
 
         # Проверяем, что resultType является streams (логи), а не matrix (метрики)
         data = payload.get("data") or {}
@@ -89,3 +338,8 @@ class LokiAdapter(ILokiAdapter):
         if direction == "BACKWARD":
             out.reverse()
         return out
+
+
+def _key(entry: LokiEntry) -> tuple[tuple[tuple[str, str], ...], str]:
+    """Ключ строки в пределах одной наносекунды: поток и текст"""
+    return tuple(sorted(entry.stream.items())), entry.line
@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator, Collection
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import timedelta
+
+from pyreqwest.client import Client, ClientBuilder
+
+from app.infrastructure.metrics import (
+    LOKI_ENDPOINT_HEALTHY,
+    LOKI_ENDPOINT_OUTSTANDING,
+    LOKI_POOL_DEGRADED,
+    LOKI_REQUEST_SECONDS,
+    LOKI_REQUESTS,
+)
+from app.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class LokiEndpoint:
+    """Адрес Loki со своим клиентом и счётчиками нагрузки"""
+
+    def __init__(self, base_url: str, client: Client) -> None:
+        self.base_url = base_url
+        self.client = client
+        self.outstanding = 0
+        self.failures = 0
+        self.healthy = True
+
+
+class LokiClientPool:
+    """Пул клиентов к нескольким адресам Loki.
+
+    Запрос уходит на доступный адрес с наименьшим числом незавершённых запросов.
+    Адрес исключается после max_failures ошибок подряд и возвращается
+    фоновой проверкой /ready.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings.loki
+        self._endpoints: list[LokiEndpoint] = []
+        self._stack = AsyncExitStack()
+        self._health_task: asyncio.Task | None = None
+        self._rotation = itertools.count()
+
+    @property
+    def size(self) -> int:
+        """Число адресов в пуле"""
+        return len(self._endpoints)
+
+    async def start(self) -> None:
+        """Создание клиентов и запуск фоновой проверки адресов"""
+        for base_url in self._settings.base_urls_list:
+            client = await self._stack.enter_async_context(self._build_client())
+            self._endpoints.append(LokiEndpoint(base_url, client))
+            LOKI_ENDPOINT_HEALTHY.labels(endpoint=base_url).set(1)
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        """Остановка проверок и закрытие клиентов"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+        await self._stack.aclose()
+
+    async def warm_up(self, connections: int) -> None:
+        """Открытие connections соединений с каждым адресом параллельными проверками /ready"""
+        await asyncio.gather(*(self._probe(e) for e in self._endpoints for _ in range(connections)))
+
+    def _build_client(self) -> Client:
+        builder = (
+            ClientBuilder()
+            .error_for_status(True)
+            .timeout(timedelta(seconds=self._settings.timeout_s))
+            .max_connections(self._settings.max_connections)
+        )
+        # Ответы с контекстом хорошо сжимаются; brotli и deflate Loki не отдаёт
+        compression = self._settings.compression
+        return builder.zstd(compression).gzip(compression).brotli(False).deflate(False).build()
+
+    @asynccontextmanager
+    async def endpoint(self, exclude: Collection[LokiEndpoint] = ()) -> AsyncIterator[LokiEndpoint]:
+        """Захват наименее загруженного адреса на время запроса"""
+        endpoint = self._pick(exclude)
+        endpoint.outstanding += 1
+        LOKI_ENDPOINT_OUTSTANDING.labels(endpoint=endpoint.base_url).inc()
+        started = time.monotonic()
+        try:
+            yield endpoint
+        finally:
+            endpoint.outstanding -= 1
+            LOKI_ENDPOINT_OUTSTANDING.labels(endpoint=endpoint.base_url).dec()
+            LOKI_REQUEST_SECONDS.labels(endpoint=endpoint.base_url).observe(
+                time.monotonic() - started
+            )
+
+    def _pick(self, exclude: Collection[LokiEndpoint]) -> LokiEndpoint:
+        candidates = [e for e in self._endpoints if e.healthy and e not in exclude]
+        if not candidates:
+            # Лучше попробовать недоступный по проверкам адрес, чем не отправить запрос
+            LOKI_POOL_DEGRADED.inc()
+            candidates = [e for e in self._endpoints if e not in exclude] or self._endpoints
+        # Сдвиг начала перебора, чтобы при равной загрузке запросы расходились по адресам
+        offset = next(self._rotation) % len(candidates)
+        rotated = candidates[offset:] + candidates[:offset]
+        return min(rotated, key=lambda e: e.outstanding)
+
+    def report(self, endpoint: LokiEndpoint, *, ok: bool) -> None:
+        """Учёт результата запроса к адресу"""
+        LOKI_REQUESTS.labels(endpoint=endpoint.base_url, outcome="ok" if ok else "error").inc()
+        if ok:
+            endpoint.failures = 0
+            self._set_healthy(endpoint, True)
+            return
+        endpoint.failures += 1
+        if endpoint.failures >= self._settings.max_failures:
+            self._set_healthy(endpoint, False)
+
+    def _set_healthy(self, endpoint: LokiEndpoint, healthy: bool) -> None:
+        if endpoint.healthy == healthy:
+            return
+        endpoint.healthy = healthy
+        LOKI_ENDPOINT_HEALTHY.labels(endpoint=endpoint.base_url).set(int(healthy))
+        if healthy:
+            logger.info(f"Адрес Loki {endpoint.base_url} снова доступен")
+        else:
+            logger.warning(f"Адрес Loki {endpoint.base_url} исключён из балансировки")
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._settings.health_check_interval_s)
+            await asyncio.gather(*(self._probe(e) for e in self._endpoints))
+
+    async def _probe(self, endpoint: LokiEndpoint) -> None:
+        """Проверка готовности адреса через /ready"""
+        timeout = timedelta(seconds=self._settings.health_check_timeout_s)
+        try:
+            await endpoint.client.get(f"{endpoint.base_url}/ready").timeout(timeout).build().send()
+        except Exception as e:
+            if endpoint.healthy:
+                logger.warning(f"Проверка адреса Loki {endpoint.base_url} не пройдена: {e}")
+            endpoint.failures = self._settings.max_failures
+            self._set_healthy(endpoint, False)
+            return
+        endpoint.failures = 0
+        self._set_healthy(endpoint, True)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.infrastructure.exceptions import TenantBudgetExceededError
+from app.infrastructure.metrics import (
+    LOKI_TENANT_IN_FLIGHT,
+    LOKI_TENANT_QUERIES,
+    LOKI_TENANT_WAIT_SECONDS,
+)
+from app.settings.settings import Settings
+
+DEFAULT_TENANT = "default"
+# Метка метрик для тенантов вне списка разрешённых
+OTHER_TENANT = "other"
+
+
+class _TenantState:
+    """Слоты и бюджет запросов одного тенанта"""
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.window_started = time.monotonic()
+        self.used = 0
+        # Запросы, занявшие слот или ожидающие его
+        self.active = 0
+
+
+class TenantLimiter:
+    """Изоляция тенантов Loki друг от друга внутри процесса.
+
+    У каждого тенанта свой лимит одновременных запросов и бюджет запросов
+    на окно budget_window_s, поэтому шторм алертов одной команды не выбирает
+    всю ёмкость Loki у остальных.
+
+    Тенант берётся из меток алерта, поэтому в метриках тенанты вне списка
+    разрешённых объединяются под меткой other, а состояния без запросов с истёкшим
+    окном удаляются раз в budget_window_s: такое состояние не отличается от нового,
+    а число тенантов не растёт за время жизни процесса.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings.loki_tenant
+        self._states: dict[str, _TenantState] = {}
+        self._last_prune = time.monotonic()
+
+    @asynccontextmanager
+    async def query(self, tenant: str | None) -> AsyncIterator[None]:
+        """Слот тенанта на время одного запроса к Loki.
+
+        Raises:
+            TenantBudgetExceededError: бюджет запросов тенанта на текущее окно исчерпан.
+        """
+        name = tenant or DEFAULT_TENANT
+        label = name if tenant is None or self._settings.is_allowed(tenant) else OTHER_TENANT
+        limits = self._settings.limits(tenant)
+        self._prune()
+        state = self._states.get(name)
+        if state is None:
+            state = self._states[name] = _TenantState(limits.max_concurrency)
+
+        now = time.monotonic()
+        if now - state.window_started >= self._settings.budget_window_s:
+            state.window_started = now
+            state.used = 0
+        if state.used >= limits.query_budget:
+            LOKI_TENANT_QUERIES.labels(tenant=label, outcome="budget_exceeded").inc()
+            raise TenantBudgetExceededError(
+                msg=f"Бюджет запросов к Loki для тенанта {name} исчерпан",
+                ctx={"tenant": name, "query_budget": limits.query_budget},
+            )
+        state.used += 1
+
+        started = time.monotonic()
+        state.active += 1
+        try:
+            async with state.semaphore:
+                LOKI_TENANT_WAIT_SECONDS.labels(tenant=label).observe(time.monotonic() - started)
+                LOKI_TENANT_QUERIES.labels(tenant=label, outcome="admitted").inc()
+                LOKI_TENANT_IN_FLIGHT.labels(tenant=label).inc()
+                try:
+                    yield
+                finally:
+                    LOKI_TENANT_IN_FLIGHT.labels(tenant=label).dec()
+        finally:
+            state.active -= 1
+
+    def _prune(self) -> None:
+        """Удаление состояний тенантов без запросов, чьё окно бюджета истекло"""
+        now = time.monotonic()
+        window_s = self._settings.budget_window_s
+        if now - self._last_prune < window_s:
+            return
+        self._last_prune = now
+        for name in [
+            name
+            for name, state in self._states.items()
+            if not state.active and now - state.window_started >= window_s
+        ]:
+            del self._states[name]
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+from redis.asyncio import Redis
+
+from app.infrastructure.exceptions import RateLimitWaitExceededError
+from app.infrastructure.metrics import TELEGRAM_RATE_LIMIT_WAIT_SECONDS
+from app.settings.settings import TgSettings
+from app.utils.celery_logging import get_celery_logger
+
+logger = get_celery_logger(__name__)
+
+# Общий и чатовый бакеты проверяются и списываются одной атомарной операцией.
+# Время берётся у Redis, чтобы расхождение часов воркеров не влияло на пополнение.
+# Возвращает 0, если токены списаны, иначе — сколько миллисекунд ждать.
+_ACQUIRE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local hold = math.max(redis.call('PTTL', KEYS[3]), redis.call('PTTL', KEYS[4]))
+if hold > 0 then
+    return hold
+end
+
+local function level(key, rate, burst)
+    local b = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or burst
+    local ts = tonumber(b[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+end
+
+local function wait(tokens, rate)
+    if tokens >= 1 then
+        return 0
+    end
+    return math.ceil((1 - tokens) * 1000 / rate)
+end
+
+local g_rate, g_burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local c_rate, c_burst = tonumber(ARGV[3]), tonumber(ARGV[4])
+local g = level(KEYS[1], g_rate, g_burst)
+local c = level(KEYS[2], c_rate, c_burst)
+local delay = math.max(wait(g, g_rate), wait(c, c_rate))
+if delay > 0 then
+    return delay
+end
+
+redis.call('HSET', KEYS[1], 'tokens', g - 1, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(g_burst * 1000 / g_rate) + 1000)
+redis.call('HSET', KEYS[2], 'tokens', c - 1, 'ts', now)
+redis.call('PEXPIRE', KEYS[2], math.ceil(c_burst * 1000 / c_rate) + 1000)
+return 0
+"""
+
+# Блокировка чата после 429. Telegram не сообщает, чей лимит исчерпан: если за время
+# блокировки 429 получено в ARGV[3] разных чатах, исчерпан лимит бота, и блокируются все
+# чаты (KEYS[1]). Возвращает 1, если установлена общая блокировка.
+_HOLD = """
+local ms = tonumber(ARGV[2])
+redis.call('SET', KEYS[2], 1, 'PX', ms)
+redis.call('SADD', KEYS[3], ARGV[1])
+if redis.call('PTTL', KEYS[3]) < ms then
+    redis.call('PEXPIRE', KEYS[3], ms)
+end
+if redis.call('SCARD', KEYS[3]) < tonumber(ARGV[3]) then
+    return 0
+end
+if redis.call('PTTL', KEYS[1]) < ms then
+    redis.call('SET', KEYS[1], 1, 'PX', ms)
+end
+return 1
+"""
+
+
+class TelegramRateLimiter:
+    """Общий для всех воркеров лимит отправки в Telegram Bot API.
+
+    Token bucket в Redis на бота (TELEGRAM_GLOBAL_RATE сообщений в секунду) и на
+    каждый чат (TELEGRAM_CHAT_RATE). После ответа 429 чат блокируется на retry_after
+    для всех процессов, а после 429 в TELEGRAM_GLOBAL_HOLD_CHATS разных чатах — весь
+    бот. При недоступности Redis отправка не ограничивается.
+    """
+
+    def __init__(self, redis: Redis, settings: TgSettings) -> None:
+        self._redis = redis
+        self._settings = settings
+        self._prefix = settings.rate_limit_key_prefix
+        self._acquire = redis.register_script(_ACQUIRE)
+        self._hold = redis.register_script(_HOLD)
+
+    async def acquire(self, chat_id: str) -> None:
+        """Ожидание права на отправку сообщения в чат.
+
+        Raises:
+            RateLimitWaitExceededError: ожидание дольше TELEGRAM_RATE_LIMIT_MAX_WAIT_S.
+        """
+        started = time.monotonic()
+        keys = [
+            f"{self._prefix}:bucket",
+            f"{self._prefix}:bucket:{chat_id}",
+            f"{self._prefix}:hold",
+            f"{self._prefix}:hold:{chat_id}",
+        ]
+        args = [
+            self._settings.global_rate,
+            self._settings.global_burst,
+            self._settings.chat_rate,
+            self._settings.chat_burst,
+        ]
+        while True:
+            try:
+                delay_ms = int(await self._acquire(keys=keys, args=args))
+            except Exception as e:
+                logger.warning(f"Лимит Telegram не проверен, Redis недоступен: {e}")
+                return
+            waited = time.monotonic() - started
+            if delay_ms <= 0:
+                TELEGRAM_RATE_LIMIT_WAIT_SECONDS.observe(waited)
+                return
+            if waited + delay_ms / 1000 > self._settings.rate_limit_max_wait_s:
+                raise RateLimitWaitExceededError(
+                    msg=f"Лимит отправки в чат {chat_id} не освободился за "
+                    f"{self._settings.rate_limit_max_wait_s}s",
+                    ctx={"chat_id": chat_id},
+                )
+            await asyncio.sleep(delay_ms / 1000)
+
+    async def hold(self, chat_id: str, retry_after_s: float) -> None:
+        """Блокировка отправки в чат после ответа 429; повторные 429 блокируют весь бот"""
+        keys = [
+            f"{self._prefix}:hold",
+            f"{self._prefix}:hold:{chat_id}",
+            f"{self._prefix}:throttled",
+        ]
+        args = [chat_id, max(1, int(retry_after_s * 1000)), self._settings.global_hold_chats]
+        try:
+            if await self._hold(keys=keys, args=args):
+                logger.warning(
+                    f"Лимит Telegram бота исчерпан, отправка приостановлена на {retry_after_s}s"
+                )
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить блокировку чата {chat_id}: {e}")
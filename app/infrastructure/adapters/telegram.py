@@ -1,55 +1,193 @@
-from pyreqwest.client import ClientBuilder
+import asyncio
+import time
+from typing import Any
+
+from pyreqwest.client import Client, ClientBuilder
+from pyreqwest.response import Response
+from redis.asyncio import Redis
 
 from app.domain.value_objects.notification import Notification
 from app.infrastructure.adapters.interfaces import NotificationSender
+from app.infrastructure.adapters.rate_limit import TelegramRateLimiter
+from app.infrastructure.metrics import TELEGRAM_THROTTLED
 from app.settings.settings import Settings
 from app.utils.celery_logging import get_celery_logger
 from app.utils.utils import safe_join_lines
 
 logger = get_celery_logger(__name__)
 
+# Поле записи первичных сообщений: первичная рассылка завершена
+_THREAD_SENT = "_sent"
+
 
 class TelegramAdapter(NotificationSender):
     """Работа с телеграммом"""
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, redis: Redis):
         self.bot_token = settings.telegram.bot_token
         self.chat_ids = settings.receivers.tg_ids_list
         self.parse_mode = settings.telegram.parse_mode
         self.max_chars = settings.telegram.max_chars
+        self.followup_mode = settings.telegram.followup_mode
+        self.thread_ttl_s = settings.telegram.thread_ttl_s
+        self.followup_wait_s = settings.telegram.followup_wait_s
+        self.api_url = settings.telegram.api_url.rstrip("/")
+        self.max_retries = settings.telegram.max_retries
+        self._redis = redis
+        self._limiter = TelegramRateLimiter(redis, settings.telegram)
+        self._client: Client | None = None
 
-    async def send(self, notification: Notification) -> bool:
-        """Рассылка"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+    def recipients(self) -> list[str]:
+        """Получатели канала по умолчанию"""
+        return [str(chat_id) for chat_id in self.chat_ids or []]
+
+    async def send(
+        self, notification: Notification, recipients: list[str] | None = None
+    ) -> dict[str, str]:
+        """Рассылка, возвращает чаты, в которые доставить не удалось"""
+        chat_ids = recipients if recipients is not None else (self.chat_ids or [])
         text = safe_join_lines(
             [notification.title, "", notification.body], max_chars=self.max_chars
         )
-        payloads = [
-            {
-                "chat_id": chat_id,
-                "text": text,
-                "disable_web_page_preview": True,
-                "parse_mode": self.parse_mode,
-            }
-            for chat_id in self.chat_ids
-        ]
-        success_count = 0
-        failed_count = 0
-        async with ClientBuilder().error_for_status(True).build() as client:
-            logger.info(f"Отправка телеграмм-уведомлений {len(self.chat_ids)} пользователям")
-            for payload in payloads:
-                try:
-                    chat_id = payload["chat_id"]
-                    await client.post(url).body_json(payload).build().send()
-                    logger.info("Сообщение успешно отправлено в Telegram", chat_id=chat_id)
-                    success_count += 1
-                except Exception as e:
-                    logger.error("Ошибка отправки в Telegram", chat_id=chat_id, error=str(e))
-                    failed_count += 1
+        thread = await self._wait_thread(notification)
+        if thread is None:
+            # Досылка обогнала первичную рассылку: без её сообщений ответ или правка
+            # стали бы отдельным сообщением, поэтому досылка уходит на повтор
+            logger.warning("Первичные сообщения Telegram ещё не сохранены, досылка отложена")
+            return dict.fromkeys(map(str, chat_ids), "Первичное уведомление ещё не отправлено")
+        failed: dict[str, str] = {}
+        client = self._http()
+        logger.info(f"Отправка телеграмм-уведомлений {len(chat_ids)} пользователям")
+        for chat_id in chat_ids:
+            try:
+                message_id = await self._deliver(client, chat_id, text, thread.get(str(chat_id)))
+                if message_id is not None and notification.phase == "initial":
+                    thread[str(chat_id)] = str(message_id)
+                logger.info("Сообщение успешно отправлено в Telegram", chat_id=chat_id)
+            except Exception as e:
+                logger.error("Ошибка отправки в Telegram", chat_id=chat_id, error=str(e))
+                failed[str(chat_id)] = str(e)
+        if notification.phase == "initial":
+            await self._save_thread(notification, thread)
         logger.info(
             "Рассылка в Telegram завершена",
-            total=len(payloads),
-            success=success_count,
-            failed=failed_count,
+            total=len(chat_ids),
+            success=len(chat_ids) - len(failed),
+            failed=len(failed),
+        )
+        return failed
+
+    async def warm_up(self) -> None:
+        """Соединение с Bot API (DNS, TCP, TLS) через getMe; оно остаётся в пуле клиента"""
+        if not self.bot_token:
+            return
+        response = (
+            await self._http().get(f"{self.api_url}/bot{self.bot_token}/getMe").build().send()
         )
-        return success_count > 0
+        response.error_for_status()
+
+    def _http(self) -> Client:
+        """HTTP клиент процесса: соединения с Bot API переиспользуются между отправками"""
+        if self._client is None:
+            self._client = ClientBuilder().build()
+        return self._client
+
+    async def _deliver(
+        self, client: Client, chat_id: int | str, text: str, thread_message_id: str | None
+    ) -> int | None:
+        """Отправка одного сообщения; дослать контекст можно правкой или ответом на первичное"""
+        payload: dict[str, Any] = {
+            "chat_id": chat_id,
+            "text": text,
+            "disable_web_page_preview": True,
+            "parse_mode": self.parse_mode,
+        }
+        method = "sendMessage"
+        if thread_message_id is not None:
+            if self.followup_mode == "edit":
+                method = "editMessageText"
+                payload["message_id"] = int(thread_message_id)
+            else:
+                payload["reply_parameters"] = {
+                    "message_id": int(thread_message_id),
+                    "allow_sending_without_reply": True,
+                }
+
+        url = f"{self.api_url}/bot{self.bot_token}/{method}"
+        for attempt in range(self.max_retries + 1):
+            await self._limiter.acquire(str(chat_id))
+            response = await client.post(url).body_json(payload).build().send()
+            if response.status != 429 or attempt == self.max_retries:
+                break
+            retry_after = await self._retry_after(response)
+            TELEGRAM_THROTTLED.inc()
+            logger.warning(
+                "Telegram ограничил отправку, повтор после паузы",
+                chat_id=chat_id,
+                retry_after=retry_after,
+            )
+            await self._limiter.hold(str(chat_id), retry_after)
+        response.error_for_status()
+        result = (await response.json()).get("result")
+        if isinstance(result, dict):
+            return result.get("message_id")
+        return None
+
+    @staticmethod
+    async def _retry_after(response: Response) -> float:
+        """Пауза из ответа 429: parameters.retry_after, затем заголовок Retry-After"""
+        try:
+            parameters = (await response.json()).get("parameters") or {}
+            return float(parameters["retry_after"])
+        except Exception:
+            try:
+                return float(response.get_header("Retry-After") or 1)
+            except ValueError:
+                return 1.0
+
+    async def _wait_thread(self, notification: Notification) -> dict[str, str] | None:
+        """Первичные сообщения с ожиданием до TELEGRAM_FOLLOWUP_WAIT_S.
+
+        None — первичная рассылка ещё не завершилась.
+        """
+        deadline = time.monotonic() + self.followup_wait_s
+        while True:
+            thread = await self._load_thread(notification)
+            if thread is not None or time.monotonic() >= deadline:
+                return thread
+            await asyncio.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+
+    async def _load_thread(self, notification: Notification) -> dict[str, str] | None:
+        """Идентификаторы первичных сообщений по чатам для досылки контекста.
+
+        None — первичная рассылка ещё не сохранила результат. При недоступном Redis
+        досылка уходит отдельными сообщениями.
+        """
+        if notification.phase != "followup" or not notification.thread_key:
+            return {}
+        try:
+            raw = await self._redis.hgetall(self._thread_key(notification.thread_key))
+        except Exception as e:
+            logger.warning(f"Не удалось получить первичные сообщения Telegram: {e}")
+            return {}
+        thread = {k.decode(): v.decode() for k, v in raw.items()}
+        if thread.pop(_THREAD_SENT, None) is None:
+            return None
+        return thread
+
+    async def _save_thread(self, notification: Notification, thread: dict[str, str]) -> None:
+        """Сохранение идентификаторов первичных сообщений и отметки о завершении рассылки"""
+        if not notification.thread_key:
+            return
+        key = self._thread_key(notification.thread_key)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping={**thread, _THREAD_SENT: "1"})
+                pipe.expire(key, self.thread_ttl_s)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить первичные сообщения Telegram: {e}")
+
+    @staticmethod
+    def _thread_key(thread_key: str) -> str:
+        return f"alert-proxy:tg-thread:{thread_key}"
@@ -0,0 +1,10 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+
+
+class IAdmissionController(ABC):
+    """Порт ограничения одновременной обработки вебхуков"""
+
+    @abstractmethod
+    def slot(self) -> AbstractAsyncContextManager[bool]:
+        """Захват слота обработки: True — слот получен, False — воркер перегружен"""
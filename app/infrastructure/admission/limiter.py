@@ -0,0 +1,62 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.infrastructure.admission.interfaces import IAdmissionController
+from app.infrastructure.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+from app.settings.settings import Settings
+
+
+class AdmissionController(IAdmissionController):
+    """Ограничитель числа одновременно обрабатываемых вебхуков с короткой очередью ожидания"""
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings.admission
+        self._semaphore = asyncio.Semaphore(self._settings.max_in_flight)
+        self._waiting = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[bool]:
+        """Захват слота обработки: True — слот получен, False — воркер перегружен"""
+        if not self._settings.enabled:
+            yield True
+            return
+
+        if not await self._acquire():
+            ADMISSION_REJECTED.labels(mode=self._settings.overflow_mode).inc()
+            yield False
+            return
+
+        ADMISSION_IN_FLIGHT.inc()
+        try:
+            yield True
+        finally:
+            ADMISSION_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    async def _acquire(self) -> bool:
+        """Мгновенный захват слота либо ожидание в очереди ограниченной длины"""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if self._waiting >= self._settings.max_queue:
+            return False
+
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self._settings.queue_timeout_s)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self._waiting)
+            ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started)
@@ -0,0 +1,39 @@
+import copy
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from app.infrastructure.cache.interfaces import IContextCache
+from app.infrastructure.metrics import CONTEXT_CACHE_LOOKUPS
+from app.settings.settings import Settings
+
+
+class ContextCache(IContextCache):
+    """Кэш контекста в памяти процесса: LRU ограниченного размера с TTL записей.
+
+    Повторные уведомления по тому же алерту (тот же запрос и окно поиска)
+    получают контекст без запросов к Loki.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._max_entries = settings.policy.cache_max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, list[dict]]] = OrderedDict()
+
+    def get(self, key: Hashable) -> list[dict] | None:
+        """Контексты по ключу, если запись не устарела"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            CONTEXT_CACHE_LOOKUPS.labels(outcome="miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        CONTEXT_CACHE_LOOKUPS.labels(outcome="hit").inc()
+        # Вызывающий дополняет payload контекстами, запись кэша должна остаться прежней
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, contexts: list[dict], ttl_s: float) -> None:
+        """Сохранение контекстов на ttl_s секунд"""
+        self._entries[key] = (time.monotonic() + ttl_s, copy.deepcopy(contexts))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
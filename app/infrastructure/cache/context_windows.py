@@ -0,0 +1,31 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from app.infrastructure.cache.interfaces import IContextWindowMemory
+from app.settings.settings import Settings
+
+
+class ContextWindowMemory(IContextWindowMemory):
+    """Окна контекста по селектору в памяти процесса: LRU ограниченного размера.
+
+    Для потока с частыми строками хватает секунд, для редкого — десятков минут;
+    поиск контекста начинается с окна, которого хватило для того же селектора.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._max_entries = settings.alert.context_window_memory
+        self._windows: OrderedDict[Hashable, int] = OrderedDict()
+
+    def get(self, key: Hashable) -> int | None:
+        """Окно (нс), которого хватило в прошлый раз"""
+        window_ns = self._windows.get(key)
+        if window_ns is not None:
+            self._windows.move_to_end(key)
+        return window_ns
+
+    def put(self, key: Hashable, window_ns: int) -> None:
+        """Сохранение окна, которого хватило для контекста"""
+        self._windows[key] = window_ns
+        self._windows.move_to_end(key)
+        while len(self._windows) > self._max_entries:
+            self._windows.popitem(last=False)
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from collections.abc import Hashable
+
+
+class IContextCache(ABC):
+    """Кэш собранного контекста Loki"""
+
+    @abstractmethod
+    def get(self, key: Hashable) -> list[dict] | None:
+        """Контексты по ключу, если запись не устарела"""
+
+    @abstractmethod
+    def put(self, key: Hashable, contexts: list[dict], ttl_s: float) -> None:
+        """Сохранение контекстов на ttl_s секунд"""
+
+
+class IContextWindowMemory(ABC):
+    """Запомненные окна поиска строк контекста"""
+
+    @abstractmethod
+    def get(self, key: Hashable) -> int | None:
+        """Окно (нс), которого хватило в прошлый раз"""
+
+    @abstractmethod
+    def put(self, key: Hashable, window_ns: int) -> None:
+        """Сохранение окна, которого хватило для контекста"""
@@ -14,6 +14,8 @@ def build_error_for_litestar(
     error_code: str = "error",
     msg: str = "Ошибка",
     ctx: dict | None = None,
+    *,
+    headers: dict[str, str] | None = None,
 ) -> Response:
     """Формирование ответа обработчика ошибок."""
     error = {"msg": msg, "code": error_code, "ctx": ctx}
@@ -30,7 +32,7 @@ def build_error_for_litestar(
         d[keys[-1]] = value
 
     deep_insert(loc, error)
-    return Response(status_code=status_code, content=content)
+    return Response(status_code=status_code, content=content, headers=headers)
 
 
 def parse_validation_error(
@@ -86,6 +88,7 @@ async def litestar_domain_exception_handler(request: Request, exc: DomainExcepti
         error_code=exc.error_code,
         msg=exc.msg,
         ctx=exc.ctx,
+        headers=exc.headers,
     )
 
 
@@ -10,3 +10,17 @@ class BaseAppError(Exception):
         super().__init__(msg or self.__doc__ or "Application error")
         self.msg = msg or self.__doc__ or "Application error"
         self.ctx = ctx or {}
+
+
+class TenantBudgetExceededError(BaseAppError):
+    """Исчерпан бюджет запросов к Loki для тенанта"""
+
+    status_code: int = 429
+    error_code: str = "tenant_budget_exceeded"
+
+
+class RateLimitWaitExceededError(BaseAppError):
+    """Ожидание лимита отправки превысило допустимое"""
+
+    status_code: int = 429
+    error_code: str = "rate_limit_wait_exceeded"
@@ -1,9 +1,17 @@
 from dishka import Provider, Scope, from_context, provide
 
+from app.domain.policy.enrichment import EnrichmentPolicyEngine
+from app.domain.policy.interfaces import IEnrichmentPolicyEngine
 from app.domain.registry.interfaces import INotificationRegistry
 from app.domain.registry.registry import NotificationRegistry
 from app.infrastructure.adapters.interfaces import ILokiAdapter
 from app.infrastructure.adapters.loki import LokiAdapter
+from app.infrastructure.adapters.loki_tenants import TenantLimiter
+from app.infrastructure.admission.interfaces import IAdmissionController
+from app.infrastructure.admission.limiter import AdmissionController
+from app.infrastructure.cache.context_cache import ContextCache
+from app.infrastructure.cache.context_windows import ContextWindowMemory
+from app.infrastructure.cache.interfaces import IContextCache, IContextWindowMemory
 from app.infrastructure.template_render.interfaces import ITemplateRenderer
 from app.infrastructure.template_render.jinja_template_renderer import JinjaTemplateRenderer
 from app.services.extractor_service import ExtractorService
@@ -20,7 +28,12 @@ class ApplicationProvider(Provider):
         NotificationRegistry, scope=Scope.APP, provides=INotificationRegistry
     )
     template_renderer = provide(JinjaTemplateRenderer, scope=Scope.APP, provides=ITemplateRenderer)
+    loki_tenants = provide(TenantLimiter, scope=Scope.APP)
     loki = provide(LokiAdapter, scope=Scope.APP, provides=ILokiAdapter)
+    admission = provide(AdmissionController, scope=Scope.APP, provides=IAdmissionController)
+    policies = provide(EnrichmentPolicyEngine, scope=Scope.APP, provides=IEnrichmentPolicyEngine)
+    context_cache = provide(ContextCache, scope=Scope.APP, provides=IContextCache)
+    context_windows = provide(ContextWindowMemory, scope=Scope.APP, provides=IContextWindowMemory)
     extract_service = provide(ExtractorService, scope=Scope.REQUEST, provides=IExtractorService)
 
 
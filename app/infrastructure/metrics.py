@@ -0,0 +1,205 @@
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "alert_proxy_admission_in_flight",
+    "Количество вебхуков, обрабатываемых воркером в данный момент",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "alert_proxy_admission_queue_depth",
+    "Количество вебхуков, ожидающих слота обработки",
+)
+ADMISSION_REJECTED = Counter(
+    "alert_proxy_admission_rejected_total",
+    "Вебхуки, не получившие слот обработки",
+    ["mode"],
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "alert_proxy_admission_wait_seconds",
+    "Время ожидания слота обработки вебхука",
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+
+WORKER_JOBS = Counter(
+    "alert_proxy_worker_jobs_total",
+    "Выполненные задачи воркера доставки",
+    ["task", "outcome"],
+)
+WORKER_JOB_SECONDS = Histogram(
+    "alert_proxy_worker_job_seconds",
+    "Длительность выполнения задачи воркера доставки",
+    ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+QUEUE_DEPTH = Gauge(
+    "alert_proxy_queue_depth",
+    "Задачи доставки, ожидающие в очереди приоритета",
+    ["priority"],
+    multiprocess_mode="livemostrecent",
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "alert_proxy_queue_wait_seconds",
+    "Время от постановки задачи доставки в очередь до начала выполнения",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+AUTOSCALE_PROCESSES = Gauge(
+    "alert_proxy_autoscale_processes",
+    "Текущее число процессов пула celery",
+    multiprocess_mode="livemostrecent",
+)
+AUTOSCALE_DESIRED = Gauge(
+    "alert_proxy_autoscale_desired_processes",
+    "Число процессов пула celery, нужное по оценке автомасштабирования",
+    multiprocess_mode="livemostrecent",
+)
+AUTOSCALE_DECISIONS = Counter(
+    "alert_proxy_autoscale_decisions_total",
+    "Изменения размера пула celery",
+    ["direction", "reason"],
+)
+
+LOGQL_VALIDATIONS = Counter(
+    "alert_proxy_logql_validations_total",
+    "Валидации LogQL запросов: локальным разбором или через Loki format_query",
+    ["mode"],
+)
+
+LOKI_ENDPOINT_OUTSTANDING = Gauge(
+    "alert_proxy_loki_endpoint_outstanding",
+    "Незавершённые запросы к адресу Loki",
+    ["endpoint"],
+)
+LOKI_ENDPOINT_HEALTHY = Gauge(
+    "alert_proxy_loki_endpoint_healthy",
+    "Доступность адреса Loki по результатам проверок: 1 — доступен",
+    ["endpoint"],
+)
+LOKI_REQUESTS = Counter(
+    "alert_proxy_loki_requests_total",
+    "Запросы к Loki по адресам и результатам",
+    ["endpoint", "outcome"],
+)
+LOKI_REQUEST_SECONDS = Histogram(
+    "alert_proxy_loki_request_seconds",
+    "Длительность запроса к Loki",
+    ["endpoint"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LOKI_QUERY_PAGES = Histogram(
+    "alert_proxy_loki_query_pages",
+    "Число страниц, запрошенных у Loki на один query_range",
+    buckets=(1, 2, 3, 5, 10, 20, 50),
+)
+LOKI_POOL_DEGRADED = Counter(
+    "alert_proxy_loki_pool_degraded_total",
+    "Выборы адреса Loki при отсутствии доступных по проверкам адресов",
+)
+
+LOKI_TENANT_IN_FLIGHT = Gauge(
+    "alert_proxy_loki_tenant_in_flight",
+    "Незавершённые запросы к Loki по тенантам",
+    ["tenant"],
+)
+LOKI_TENANT_QUERIES = Counter(
+    "alert_proxy_loki_tenant_queries_total",
+    "Запросы к Loki по тенантам: допущенные и отклонённые по бюджету",
+    ["tenant", "outcome"],
+)
+LOKI_TENANT_WAIT_SECONDS = Histogram(
+    "alert_proxy_loki_tenant_wait_seconds",
+    "Ожидание слота тенанта перед запросом к Loki",
+    ["tenant"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+ENRICHMENT_POLICY_DECISIONS = Counter(
+    "alert_proxy_enrichment_policy_decisions_total",
+    "Решения политик обогащения по алертам",
+    ["policy", "enrich"],
+)
+CONTEXT_WINDOW_QUERIES = Histogram(
+    "alert_proxy_context_window_queries",
+    "Запросы к Loki за строками контекста одной стороны совпадения",
+    ["direction"],
+    buckets=(1, 2, 3, 4, 5, 6, 8),
+)
+QUERY_COST_DECISIONS = Counter(
+    "alert_proxy_query_cost_decisions_total",
+    "Стратегии поиска совпадений по статистике индекса Loki",
+    ["strategy"],
+)
+CONTEXT_CACHE_LOOKUPS = Counter(
+    "alert_proxy_context_cache_lookups_total",
+    "Обращения к кэшу контекста Loki",
+    ["outcome"],
+)
+
+ALERT_ROUTES = Counter(
+    "alert_proxy_alert_routes_total",
+    "Маршрутизация уведомлений по группам получателей",
+    ["receiver"],
+)
+
+WEBHOOK_BODY_BYTES = Histogram(
+    "alert_proxy_webhook_body_bytes",
+    "Размер тела принятых вебхуков",
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+WEBHOOK_ALERTS_DROPPED = Counter(
+    "alert_proxy_webhook_alerts_dropped_total",
+    "Алерты, отброшенные при чтении вебхука сверх WEBHOOK_MAX_ALERTS",
+)
+
+TELEGRAM_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "alert_proxy_telegram_rate_limit_wait_seconds",
+    "Ожидание лимита отправки перед сообщением в Telegram",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+TELEGRAM_THROTTLED = Counter(
+    "alert_proxy_telegram_throttled_total",
+    "Ответы 429 от Telegram Bot API",
+)
+
+TRACING_SPANS = Counter(
+    "alert_proxy_tracing_spans_total",
+    "Span-ы трассировки: выгруженные, отброшенные при переполнении очереди и с ошибкой выгрузки",
+    ["outcome"],
+)
+
+WARMUP_SECONDS = Gauge(
+    "alert_proxy_warmup_seconds",
+    "Длительность этапов прогрева при запуске",
+    ["component", "step"],
+    multiprocess_mode="max",
+)
+
+
+def start_metrics_server(port: int) -> None:
+    """HTTP сервер метрик процесса воркера.
+
+    При заданном PROMETHEUS_MULTIPROC_DIR отдаёт метрики всех процессов
+    (например, дочерних процессов prefork пула celery).
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+        return
+    start_http_server(port)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Очистка данных метрик завершившегося процесса в режиме multiprocess"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
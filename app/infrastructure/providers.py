@@ -1,10 +1,14 @@
 from collections.abc import AsyncIterable
-from datetime import timedelta
 
 import redis.asyncio as redis
 from dishka import Provider, Scope, from_context, provide
-from pyreqwest.client import Client, ClientBuilder
 
+from app.infrastructure.adapters.loki_pool import LokiClientPool
+from app.infrastructure.queue.celery_queue import CeleryJobQueue
+from app.infrastructure.queue.dead_letter import RedisDeadLetterStore
+from app.infrastructure.queue.interfaces import IDeadLetterStore, IJobQueue, IJobStatusStore
+from app.infrastructure.queue.status_store import RedisJobStatusStore
+from app.infrastructure.queue.streams_queue import RedisStreamsJobQueue
 from app.settings.settings import RedisSettings, Settings
 
 
@@ -27,12 +31,29 @@ class HttpProvider(Provider):
     settings = from_context(provides=Settings, scope=Scope.APP)
 
     @provide(scope=Scope.APP)
-    async def loki_http_client(self, settings: Settings) -> AsyncIterable[Client]:
-        """Получение pooling клиента для Loki"""
-        async with (
-            ClientBuilder()
-            .error_for_status(True)
-            .timeout(timedelta(seconds=settings.loki.timeout_s))
-            .build()
-        ) as client:
-            yield client
+    async def loki_client_pool(self, settings: Settings) -> AsyncIterable[LokiClientPool]:
+        """Получение пула клиентов для адресов Loki"""
+        pool = LokiClientPool(settings)
+        await pool.start()
+        try:
+            yield pool
+        finally:
+            await pool.close()
+
+
+class QueueProvider(Provider):
+    """Провайдер очереди задач доставки"""
+
+    settings = from_context(provides=Settings, scope=Scope.APP)
+
+    job_status_store = provide(RedisJobStatusStore, scope=Scope.APP, provides=IJobStatusStore)
+    dead_letter_store = provide(RedisDeadLetterStore, scope=Scope.APP, provides=IDeadLetterStore)
+
+    @provide(scope=Scope.APP)
+    def job_queue(
+        self, settings: Settings, redis_client: redis.Redis, store: IJobStatusStore
+    ) -> IJobQueue:
+        """Очередь задач выбранного бэкенда воркера"""
+        if settings.worker.backend == "streams":
+            return RedisStreamsJobQueue(redis_client, settings, store)
+        return CeleryJobQueue(redis_client, settings, store)
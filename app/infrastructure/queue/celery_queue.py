@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.domain.value_objects.priority import Priority
+from app.infrastructure.metrics import QUEUE_DEPTH
+from app.infrastructure.queue.interfaces import IJobQueue, IJobStatusStore
+from app.infrastructure.worker.celery import celery_app
+from app.settings.settings import Settings
+from app.utils.tracing import span
+
+
+class CeleryJobQueue(IJobQueue):
+    """Очередь задач на Celery; результаты задач хранятся в IJobStatusStore.
+
+    Каждому приоритету соответствует своя очередь celery, воркеры назначаются
+    на очереди через WORKER_QUEUES.
+    """
+
+    def __init__(self, redis: Redis, settings: Settings, store: IJobStatusStore) -> None:
+        self._redis = redis
+        self._settings = settings.worker
+        self._store = store
+
+    async def enqueue(
+        self, task: str, *args: object, countdown: float = 0, priority: Priority = "default"
+    ) -> str:
+        """Постановка задачи в очередь приоритета, возвращает идентификатор задачи"""
+        with span("queue.enqueue", task=task, priority=priority, countdown=countdown):
+            # Статус пишется до отправки, чтобы не затереть STARTED от быстрого воркера
+            job_id = str(uuid.uuid4())
+            await self._store.set_state(job_id, "PENDING")
+            celery_app.send_task(
+                task,
+                args=args,
+                countdown=countdown or None,
+                task_id=job_id,
+                queue=self._settings.celery_queue(priority),
+                headers={"alert_priority": priority, "enqueued_at": time.time() + countdown},
+            )
+            QUEUE_DEPTH.labels(priority=priority).set(await self.depth(priority))
+            return job_id
+
+    async def depth(self, priority: Priority) -> int:
+        """Число задач, ожидающих в очереди приоритета"""
+        # Очередь celery на брокере Redis — список с именем очереди
+        return await self._redis.llen(self._settings.celery_queue(priority))
+
+    async def status(self, job_id: str) -> dict:
+        """Статус задачи и результаты"""
+        return await self._store.get(job_id)
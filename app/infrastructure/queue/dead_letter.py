@@ -0,0 +1,37 @@
+import json
+import time
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.infrastructure.queue.interfaces import IDeadLetterStore
+from app.settings.settings import Settings
+
+
+class RedisDeadLetterStore(IDeadLetterStore):
+    """Недоставленные уведомления в потоке Redis DELIVERY_DEAD_LETTER_KEY.
+
+    Поток ограничен DELIVERY_DEAD_LETTER_MAXLEN записями; запись содержит payload
+    и ошибки по получателям, чего достаточно для ручной повторной отправки.
+    """
+
+    def __init__(self, redis: Redis, settings: Settings) -> None:
+        self._redis = redis
+        self._settings = settings.delivery
+
+    async def add(
+        self, job_id: str, payload: dict[str, Any], failed: dict[str, dict[str, str]], attempts: int
+    ) -> None:
+        """Сохранение уведомления и ошибок по получателям каналов"""
+        await self._redis.xadd(
+            self._settings.dead_letter_key,
+            {
+                "job_id": job_id,
+                "attempts": attempts,
+                "failed_at": time.time(),
+                "failed": json.dumps(failed, ensure_ascii=False),
+                "payload": json.dumps(payload, ensure_ascii=False),
+            },
+            maxlen=self._settings.dead_letter_maxlen,
+            approximate=True,
+        )
@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.domain.value_objects.delivery import ChannelOutcome
+from app.domain.value_objects.priority import Priority
+
+
+class IJobQueue(ABC):
+    """Порт очереди задач доставки уведомлений"""
+
+    @abstractmethod
+    async def enqueue(
+        self, task: str, *args: object, countdown: float = 0, priority: Priority = "default"
+    ) -> str:
+        """Постановка задачи в очередь приоритета, возвращает идентификатор задачи"""
+
+    @abstractmethod
+    async def depth(self, priority: Priority) -> int:
+        """Число задач, ожидающих в очереди приоритета"""
+
+    @abstractmethod
+    async def status(self, job_id: str) -> dict:
+        """Статус задачи и результаты"""
+
+
+class IJobStatusStore(ABC):
+    """Порт хранилища статусов задач доставки"""
+
+    @abstractmethod
+    async def set_state(
+        self,
+        job_id: str,
+        state: str,
+        *,
+        status: str | None = None,
+        channels: dict[str, ChannelOutcome] | None = None,
+        error: str | None = None,
+        next_job_id: str | None = None,
+    ) -> None:
+        """Обновление статуса задачи; next_job_id — задача повторной отправки"""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> dict:
+        """Статус задачи и результаты доставки по каналам"""
+
+
+class IDeadLetterStore(ABC):
+    """Порт хранилища уведомлений, не доставленных после всех попыток"""
+
+    @abstractmethod
+    async def add(
+        self, job_id: str, payload: dict[str, Any], failed: dict[str, dict[str, str]], attempts: int
+    ) -> None:
+        """Сохранение уведомления и ошибок по получателям каналов"""
@@ -0,0 +1,81 @@
+from redis.asyncio import Redis
+
+from app.domain.value_objects.delivery import ChannelOutcome
+from app.infrastructure.queue.interfaces import IJobStatusStore
+from app.settings.settings import Settings
+
+_CHANNEL_PREFIX = "ch:"
+_FINAL_STATES = frozenset({"SUCCESS", "FAILURE"})
+
+
+class RedisJobStatusStore(IJobStatusStore):
+    """Статусы задач в Redis: один небольшой hash на задачу с TTL.
+
+    Хранится только состояние, итоговый статус и по одному полю на канал
+    (``ok`` либо усечённый текст ошибки), поэтому запись задачи имеет
+    ограниченный размер, а объём Redis не растёт с числом алертов дольше TTL.
+    """
+
+    def __init__(self, redis: Redis, settings: Settings) -> None:
+        self._redis = redis
+        self._settings = settings.job_status
+
+    async def set_state(
+        self,
+        job_id: str,
+        state: str,
+        *,
+        status: str | None = None,
+        channels: dict[str, ChannelOutcome] | None = None,
+        error: str | None = None,
+        next_job_id: str | None = None,
+    ) -> None:
+        """Обновление статуса задачи; next_job_id — задача повторной отправки"""
+        mapping = {"state": state}
+        if status is not None:
+            mapping["status"] = status
+        if error is not None:
+            mapping["error"] = self._truncate(error)
+        if next_job_id is not None:
+            mapping["next_job_id"] = next_job_id
+        for channel, outcome in (channels or {}).items():
+            mapping[f"{_CHANNEL_PREFIX}{channel}"] = (
+                "ok" if outcome.ok else self._truncate(outcome.error or "error")
+            )
+
+        ttl = self._settings.ttl_s if state in _FINAL_STATES else self._settings.pending_ttl_s
+        key = self._key(job_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            if error is None:
+                # Ошибка прошлой попытки к новому состоянию не относится
+                pipe.hdel(key, "error")
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> dict:
+        """Статус задачи и результаты доставки по каналам"""
+        raw = await self._redis.hgetall(self._key(job_id))
+        data = {k.decode(): v.decode() for k, v in raw.items()}
+        # Как и Celery, неизвестную (в том числе истёкшую) задачу считаем ожидающей
+        response: dict = {"task_id": job_id, "state": data.get("state", "PENDING")}
+
+        channels = {
+            k.removeprefix(_CHANNEL_PREFIX): v
+            for k, v in data.items()
+            if k.startswith(_CHANNEL_PREFIX)
+        }
+        if "status" in data or channels:
+            response["result"] = {"status": data.get("status"), "channels": channels}
+        if "error" in data:
+            response["error"] = data["error"]
+        if "next_job_id" in data:
+            response["next_job_id"] = data["next_job_id"]
+        return response
+
+    def _truncate(self, value: str) -> str:
+        limit = self._settings.error_max_len
+        return value if len(value) <= limit else value[: limit - 1] + "…"
+
+    def _key(self, job_id: str) -> str:
+        return f"{self._settings.key_prefix}:{job_id}"
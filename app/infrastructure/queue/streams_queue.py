@@ -0,0 +1,95 @@
+import json
+import time
+import uuid
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.domain.value_objects.priority import Priority
+from app.infrastructure.metrics import QUEUE_DEPTH
+from app.infrastructure.queue.interfaces import IJobQueue, IJobStatusStore
+from app.settings.settings import Settings
+from app.utils.tracing import span
+
+
+class RedisStreamsJobQueue(IJobQueue):
+    """Очередь задач на Redis Streams с группами потребителей.
+
+    Сообщение потока содержит одно поле ``job`` — JSON с именем задачи, аргументами,
+    приоритетом и номером попытки. У каждого приоритета свой поток и свой sorted set
+    отложенных задач, ожидающих наступления срока.
+    """
+
+    def __init__(self, redis: Redis, settings: Settings, store: IJobStatusStore) -> None:
+        self._redis = redis
+        self._settings = settings.worker
+        self._store = store
+
+    def stream_key(self, priority: Priority = "default") -> str:
+        """Поток задач приоритета; обычный приоритет живёт в исходном потоке"""
+        if priority == "default":
+            return self._settings.streams_key
+        return f"{self._settings.streams_key}:{priority}"
+
+    def delayed_key(self, priority: Priority = "default") -> str:
+        """Отложенные задачи приоритета"""
+        return f"{self.stream_key(priority)}:delayed"
+
+    @property
+    def dead_key(self) -> str:
+        """Задачи, исчерпавшие попытки"""
+        return f"{self._settings.streams_key}:dead"
+
+    async def enqueue(
+        self, task: str, *args: object, countdown: float = 0, priority: Priority = "default"
+    ) -> str:
+        """Постановка задачи в очередь приоритета, возвращает идентификатор задачи"""
+        with span("queue.enqueue", task=task, priority=priority, countdown=countdown):
+            job = {
+                "id": str(uuid.uuid4()),
+                "task": task,
+                "args": list(args),
+                "attempt": 0,
+                "priority": priority,
+            }
+            await self._store.set_state(job["id"], "PENDING")
+            await self.push(job, countdown=countdown)
+            QUEUE_DEPTH.labels(priority=priority).set(await self.depth(priority))
+            return job["id"]
+
+    async def push(self, job: dict[str, Any], *, countdown: float = 0) -> None:
+        """Запись задачи в поток своего приоритета либо в отложенные"""
+        priority = job.get("priority", "default")
+        # Ожидание в очереди считается с момента, когда задача может быть выполнена
+        job = {**job, "enqueued_at": time.time() + countdown}
+        raw = json.dumps(job, ensure_ascii=False)
+        if countdown > 0:
+            await self._redis.zadd(self.delayed_key(priority), {raw: time.time() + countdown})
+            return
+        await self._redis.xadd(
+            self.stream_key(priority),
+            {"job": raw},
+            maxlen=self._settings.streams_maxlen,
+            approximate=True,
+        )
+
+    async def depth(self, priority: Priority) -> int:
+        """Число задач, ещё не выданных воркерам, в потоке приоритета"""
+        key = self.stream_key(priority)
+        try:
+            groups = await self._redis.xinfo_groups(key)
+        except ResponseError:
+            return 0
+        for group in groups:
+            name = group["name"]
+            if (name.decode() if isinstance(name, bytes) else name) != self._settings.streams_group:
+                continue
+            if group.get("lag") is not None:
+                return int(group["lag"])
+        # Без группы или на Redis < 7 — оценка по длине потока
+        return await self._redis.xlen(key)
+
+    async def status(self, job_id: str) -> dict:
+        """Статус задачи и результаты"""
+        return await self._store.get(job_id)
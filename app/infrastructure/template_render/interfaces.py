@@ -12,3 +12,13 @@ class ITemplateRenderer(ABC):
     def render(self, template_name: str, payload: dict) -> Notification:
         """Рендеринг и создание уведомления"""
         raise NotImplementedError
+
+    @abstractmethod
+    def precompile(self, template_names: list[str]) -> None:
+        """Компиляция шаблонов заранее, до первого уведомления"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def render_digest(self, template_name: str, payloads: list[dict]) -> Notification:
+        """Рендеринг нескольких уведомлений в одно сообщение-дайджест"""
+        raise NotImplementedError
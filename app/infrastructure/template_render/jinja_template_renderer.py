@@ -34,6 +34,8 @@ class JinjaTemplateRenderer(ITemplateRenderer):
         max_matches = payload.get("max_matches")
         contexts = payload.get("contexts")
         query_match = payload.get("query_match")
+        notices = payload.get("notices") or []
+        phase = payload.get("phase") or "single"
 
         body = template.render(
             title=title,
@@ -49,5 +51,22 @@ class JinjaTemplateRenderer(ITemplateRenderer):
             max_matches=max_matches,
             contexts=contexts,
             query_match=query_match,
+            notices=notices,
+            enrichment_pending=phase == "initial",
         ).strip()
+        return Notification(
+            title=title, body=body, phase=phase, thread_key=payload.get("thread_key")
+        )
+
+    def precompile(self, template_names: list[str]) -> None:
+        """Компиляция шаблонов заранее; скомпилированные шаблоны кэширует Environment"""
+        for template_name in template_names:
+            self.env.get_template(template_name)
+
+    def render_digest(self, template_name: str, payloads: list[dict]) -> Notification:
+        """Рендеринг нескольких уведомлений в одно сообщение-дайджест"""
+        template = self.env.get_template(template_name)
+        statuses = sorted({str(p.get("status") or "unknown").upper() for p in payloads})
+        title = f"[DIGEST] {len(payloads)} alerts ({', '.join(statuses)})"
+        body = template.render(title=title, alerts=payloads).strip()
         return Notification(title=title, body=body)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Literal
+
+import redis.asyncio as redis
+from dishka import AsyncContainer
+
+from app.domain.registry.interfaces import INotificationRegistry
+from app.infrastructure.adapters.interfaces import ILokiAdapter
+from app.infrastructure.adapters.loki_pool import LokiClientPool
+from app.infrastructure.metrics import WARMUP_SECONDS
+from app.infrastructure.queue.interfaces import IDeadLetterStore, IJobQueue, IJobStatusStore
+from app.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+type Component = Literal["api", "worker"]
+
+
+class WarmUp:
+    """Прогрев процесса перед приёмом вебхуков или задач.
+
+    Создаются синглтоны контейнера, открываются соединения с Redis и Loki,
+    компилируются шаблоны и проверяются каналы доставки. Этапы идут параллельно
+    в пределах WARMUP_TIMEOUT_S; ошибка этапа только логируется, соединение
+    откроется при первом запросе. Готовность (ready) выставляется по завершении
+    прогрева, а без WARMUP_ENABLED — сразу.
+    """
+
+    def __init__(self, container: AsyncContainer, settings: Settings, component: Component) -> None:
+        self._container = container
+        self._settings = settings
+        self._component = component
+        self.ready = False
+
+    async def run(self) -> None:
+        """Прогрев процесса"""
+        if not self._settings.warmup.enabled:
+            self.ready = True
+            return
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self._settings.warmup.timeout_s):
+                await self._step("container", self._resolve())
+                await asyncio.gather(*(self._step(name, step) for name, step in self._steps()))
+        except TimeoutError:
+            logger.warning(
+                f"Прогрев {self._component} не уложился в {self._settings.warmup.timeout_s}s"
+            )
+        self.ready = True
+        logger.info(f"Прогрев {self._component} завершён за {time.monotonic() - started:.3f}s")
+
+    async def _resolve(self) -> None:
+        """Создание синглтонов контейнера до первого запроса"""
+        if self._component == "api":
+            dependencies = (redis.Redis, LokiClientPool, ILokiAdapter, IJobQueue, IJobStatusStore)
+        else:
+            dependencies = (
+                redis.Redis,
+                INotificationRegistry,
+                IJobQueue,
+                IJobStatusStore,
+                IDeadLetterStore,
+            )
+        for dependency in dependencies:
+            await self._container.get(dependency)
+
+    def _steps(self) -> list[tuple[str, Awaitable[object]]]:
+        steps: list[tuple[str, Awaitable[object]]] = [("redis", self._ping_redis())]
+        if self._component == "api":
+            steps.append(("loki", self._warm_loki()))
+        else:
+            steps.append(("channels", self._warm_channels()))
+        return steps
+
+    async def _ping_redis(self) -> None:
+        client = await self._container.get(redis.Redis)
+        await client.ping()
+
+    async def _warm_loki(self) -> None:
+        pool = await self._container.get(LokiClientPool)
+        await pool.warm_up(self._settings.warmup.loki_connections)
+
+    async def _warm_channels(self) -> None:
+        registry = await self._container.get(INotificationRegistry)
+        await registry.warm_up()
+
+    async def _step(self, name: str, step: Awaitable[object]) -> None:
+        started = time.monotonic()
+        try:
+            await step
+        except Exception as e:
+            logger.warning(f"Прогрев {self._component}: этап {name} не выполнен: {e}")
+        finally:
+            WARMUP_SECONDS.labels(component=self._component, step=name).set(
+                time.monotonic() - started
+            )
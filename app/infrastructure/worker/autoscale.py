@@ -0,0 +1,163 @@
+import json
+import math
+import time
+from dataclasses import dataclass
+
+from celery.worker import state
+from celery.worker.autoscale import Autoscaler
+from redis import Redis
+
+from app.infrastructure.metrics import (
+    AUTOSCALE_DECISIONS,
+    AUTOSCALE_DESIRED,
+    AUTOSCALE_PROCESSES,
+    QUEUE_DEPTH,
+)
+from app.settings.settings import AutoscaleSettings, settings
+from app.utils.celery_logging import get_celery_logger
+
+logger = get_celery_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ScalingSignals:
+    """Наблюдаемая нагрузка воркера за интервал"""
+
+    depth: int
+    oldest_wait_s: float
+    busy: float
+    throughput: float
+
+    @property
+    def latency_s(self) -> float | None:
+        """Среднее время задачи по закону Литтла: занятые процессы / пропускная способность"""
+        if self.throughput <= 0:
+            return None
+        return self.busy / self.throughput
+
+
+def desired_concurrency(
+    signals: ScalingSignals, processes: int, config: AutoscaleSettings
+) -> tuple[int, str]:
+    """Нужное число процессов и причина решения.
+
+    Очередь должна разбираться за target_wait_s: к занятым процессам добавляется
+    столько, сколько нужно, чтобы выполнить depth задач за это время при текущей
+    длительности задачи. Пока длительность неизвестна, пул растёт по одному процессу.
+    """
+    busy = math.ceil(signals.busy)
+    latency_s = signals.latency_s
+    if signals.depth == 0:
+        needed, reason = busy, "idle" if busy == 0 else "drained"
+    elif latency_s is None:
+        needed, reason = processes + 1, "backlog"
+    else:
+        needed = busy + math.ceil(signals.depth * latency_s / config.target_wait_s)
+        reason = "backlog"
+    if signals.oldest_wait_s > config.target_wait_s and needed <= processes:
+        needed, reason = processes + 1, "wait_time"
+    return max(config.min_workers, min(config.max_workers, needed)), reason
+
+
+class QueueAutoscaler(Autoscaler):
+    """Автомасштабирование пула prefork по очередям доставки.
+
+    Раз в AUTOSCALE_INTERVAL_S оцениваются глубина очередей воркера, ожидание
+    самой старой задачи (по заголовку enqueued_at) и длительность задач, и пул
+    подстраивается под них в пределах AUTOSCALE_MIN_WORKERS..AUTOSCALE_MAX_WORKERS.
+    Рост и сокращение разделены паузами, сокращение идёт по одному процессу.
+    """
+
+    def __init__(self, pool, max_concurrency, min_concurrency=0, worker=None, **kwargs):  # noqa: ANN001
+        self._config = settings.autoscale
+        kwargs["keepalive"] = self._config.interval_s
+        super().__init__(pool, max_concurrency, min_concurrency, worker=worker, **kwargs)
+        self._redis = Redis.from_url(
+            str(settings.redis.dsn),
+            socket_timeout=self._config.redis_timeout_s,
+            socket_connect_timeout=self._config.redis_timeout_s,
+        )
+        self._queues = {p: settings.worker.celery_queue(p) for p in settings.worker.queues_list}
+        self._last_eval = 0.0
+        self._last_change = 0.0
+        self._completed = state.all_total_count[0]
+        self._busy_samples: list[int] = []
+
+    def _maybe_scale(self, req=None) -> bool:  # noqa: ANN001
+        # Вызывается на каждое сообщение и по таймеру; занятость копится между оценками
+        self._busy_samples.append(len(state.active_requests))
+        now = time.monotonic()
+        if now - self._last_eval < self._config.interval_s:
+            return False
+        signals = self._signals(now)
+        if signals is None:
+            return False
+
+        processes = self.processes
+        desired, reason = desired_concurrency(signals, processes, self._config)
+        AUTOSCALE_PROCESSES.set(processes)
+        AUTOSCALE_DESIRED.set(desired)
+
+        since_change = now - self._last_change
+        if desired > processes and since_change >= self._config.scale_up_cooldown_s:
+            logger.info(
+                f"Рост пула {processes} -> {desired} ({reason}): очередь {signals.depth}, "
+                f"ожидание {signals.oldest_wait_s:.1f}s, задача {signals.latency_s or 0:.2f}s"
+            )
+            AUTOSCALE_DECISIONS.labels(direction="up", reason=reason).inc()
+            self._last_change = now
+            self.scale_up(desired - processes)
+            return True
+        if desired < processes and since_change >= self._config.scale_down_cooldown_s:
+            logger.info(f"Сокращение пула {processes} -> {processes - 1} ({reason})")
+            AUTOSCALE_DECISIONS.labels(direction="down", reason=reason).inc()
+            self._last_change = now
+            self._shrink(1)
+            return True
+        return False
+
+    def _signals(self, now: float) -> ScalingSignals | None:
+        """Сбор нагрузки за прошедший интервал"""
+        try:
+            depth, oldest_wait_s = self._queue_stats()
+        except Exception as e:
+            logger.warning(f"Автомасштабирование: не удалось получить очереди из Redis: {e}")
+            return None
+
+        elapsed = now - self._last_eval if self._last_eval else self._config.interval_s
+        completed = state.all_total_count[0]
+        samples = self._busy_samples or [len(state.active_requests)]
+        signals = ScalingSignals(
+            depth=depth,
+            oldest_wait_s=oldest_wait_s,
+            busy=sum(samples) / len(samples),
+            throughput=(completed - self._completed) / elapsed,
+        )
+        self._last_eval = now
+        self._completed = completed
+        self._busy_samples = []
+        return signals
+
+    def _queue_stats(self) -> tuple[int, float]:
+        """Суммарная глубина очередей и ожидание самой старой задачи"""
+        pipe = self._redis.pipeline(transaction=False)
+        for queue in self._queues.values():
+            pipe.llen(queue)
+            # Брокер кладёт задачи в голову списка и забирает с хвоста
+            pipe.lindex(queue, -1)
+        replies = pipe.execute()
+
+        depth, oldest_wait_s = 0, 0.0
+        for (priority, _), length, oldest in zip(
+            self._queues.items(), replies[::2], replies[1::2], strict=True
+        ):
+            QUEUE_DEPTH.labels(priority=priority).set(length)
+            depth += length
+            if oldest is None:
+                continue
+            try:
+                enqueued_at = float(json.loads(oldest)["headers"]["enqueued_at"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            oldest_wait_s = max(oldest_wait_s, time.time() - enqueued_at)
+        return depth, oldest_wait_s
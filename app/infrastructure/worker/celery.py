@@ -4,9 +4,11 @@ from collections.abc import Callable
 from typing import Any
 
 from celery import Celery
-from celery.signals import task_prerun, worker_process_init
+from celery.signals import task_prerun, worker_process_init, worker_process_shutdown
 from dishka import AsyncContainer, make_async_container
 
+from app.infrastructure.metrics import mark_process_dead
+from app.infrastructure.warmup import WarmUp
 from app.settings.settings import RedisSettings, Settings, settings
 
 container: AsyncContainer | None = None
@@ -17,7 +19,9 @@ celery_app = Celery("alert-proxy")
 
 celery_app.conf.update(
     broker_url=str(settings.redis.dsn),
-    result_backend=str(settings.redis.dsn),
+    # Статусы задач пишутся в IJobStatusStore с коротким TTL, бэкенд результатов не нужен
+    task_ignore_result=True,
+    task_default_queue=settings.worker.celery_queue("default"),
     include=["app.infrastructure.worker.tasks"],
     worker_proc_alive_timeout=120,
 )
@@ -31,12 +35,13 @@ def run_coroutine(coro):
 def init_container() -> AsyncContainer:
     """Пробрасывание контейнера в celery app"""
     from app.infrastructure.ioc import CeleryProvider
-    from app.infrastructure.providers import RedisProvider
+    from app.infrastructure.providers import QueueProvider, RedisProvider
 
     global container
     container = make_async_container(
         CeleryProvider(),
         RedisProvider(),
+        QueueProvider(),
         context={RedisSettings: settings.redis, Settings: settings},
     )
     return container
@@ -52,6 +57,14 @@ def on_worker_start(**_):
         loop.run_forever()
 
     threading.Thread(target=_start_loop, daemon=True).start()
+    # Процесс берёт задачи только после прогрева соединений и шаблонов
+    run_coroutine(WarmUp(container, settings, "worker").run())
+
+
+@worker_process_shutdown.connect
+def on_worker_shutdown(pid: int, **_):
+    """Остановка дочернего процесса воркера"""
+    mark_process_dead(pid)
 
 
 @task_prerun.connect
@@ -0,0 +1,204 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from dishka import AsyncContainer
+
+from app.domain.registry.interfaces import INotificationRegistry
+from app.domain.value_objects.delivery import ChannelOutcome
+from app.domain.value_objects.priority import Priority
+from app.infrastructure.metrics import (
+    QUEUE_DEPTH,
+    QUEUE_WAIT_SECONDS,
+    WORKER_JOB_SECONDS,
+    WORKER_JOBS,
+)
+from app.infrastructure.queue.interfaces import IDeadLetterStore, IJobQueue, IJobStatusStore
+from app.settings.settings import settings
+from app.utils.celery_logging import get_celery_logger
+from app.utils.profiler import profiling
+from app.utils.tracing import annotate, trace, traceparent
+
+logger = get_celery_logger(__name__)
+
+
+def delivery_status(channels: dict[str, ChannelOutcome]) -> str:
+    """Итоговый статус рассылки по результатам каналов"""
+    delivered = sum(outcome.ok for outcome in channels.values())
+    if delivered == len(channels):
+        return "success"
+    return "partial" if delivered else "error"
+
+
+async def send_alerts_job(
+    container: AsyncContainer, payload: dict, *, job_id: str, priority: Priority = "default"
+) -> dict[str, Any]:
+    """Рассылка уведомления всеми каналами либо накопление в дайджест.
+
+    Получателям, которым доставить не удалось, уведомление отправляется повторно
+    отдельной задачей с экспоненциальной задержкой; после DELIVERY_MAX_ATTEMPTS
+    попыток оно сохраняется в хранилище недоставленных.
+    """
+    registry = await container.get(INotificationRegistry)
+    retry = payload.get("delivery") or {}
+    try:
+        # Двухфазные уведомления связаны между собой и в дайджест не попадают
+        if (
+            settings.digest.enabled
+            and payload.get("phase", "single") == "single"
+            and not retry
+        ):
+            queue = await container.get(IJobQueue)
+            for flush in await registry.collect_digest(payload):
+                await queue.enqueue(
+                    "flush_digest", flush.channel, flush.recipient, countdown=flush.countdown_s
+                )
+            logger.info("Уведомление добавлено в дайджесты получателей")
+            return {"status": "digested"}
+        channels = await registry.send_all(payload, recipients=retry.get("recipients"))
+        logger.info("Задача рассылки уведомления выполнена")
+        result: dict[str, Any] = {"status": delivery_status(channels), "channels": channels}
+    except Exception as e:
+        logger.error(f"Задача рассылки уведомлений завершилась с ошибкой {e}")
+        return {"status": "error", "message": str(e)}
+
+    failed = {channel: outcome.failed for channel, outcome in channels.items() if outcome.failed}
+    if failed:
+        result["next_job_id"] = await _retry_failed(
+            container, payload, failed, job_id=job_id, priority=priority
+        )
+    return result
+
+
+async def _retry_failed(
+    container: AsyncContainer,
+    payload: dict,
+    failed: dict[str, dict[str, str]],
+    *,
+    job_id: str,
+    priority: Priority,
+    task: str = "send_alerts",
+    task_args: tuple[object, ...] = (),
+) -> str | None:
+    """Повторная отправка только неудавшимся получателям либо перенос в недоставленные.
+
+    Повтор ставится задачей task с аргументами task_args и payload с номером попытки.
+    """
+    config = settings.delivery
+    attempt = (payload.get("delivery") or {}).get("attempt", 1)
+    if attempt >= config.max_attempts:
+        logger.error(f"Уведомление не доставлено после {attempt} попыток: {failed}")
+        dead_letters = await container.get(IDeadLetterStore)
+        original = {k: v for k, v in payload.items() if k != "delivery"}
+        await dead_letters.add(job_id, original, failed, attempt)
+        return None
+
+    countdown = config.backoff(attempt + 1)
+    recipients = {channel: list(errors) for channel, errors in failed.items()}
+    queue = await container.get(IJobQueue)
+    next_job_id = await queue.enqueue(
+        task,
+        *task_args,
+        {
+            **payload,
+            "delivery": {"attempt": attempt + 1, "recipients": recipients},
+            "_trace": traceparent() or payload.get("_trace"),
+        },
+        countdown=countdown,
+        priority=priority,
+    )
+    logger.warning(f"Повтор {attempt + 1} через {countdown}s для получателей {recipients}")
+    return next_job_id
+
+
+async def flush_digest_job(
+    container: AsyncContainer,
+    channel: str,
+    recipient: str,
+    retry: dict | None = None,
+    *,
+    job_id: str,
+    priority: Priority = "default",
+) -> dict[str, Any]:
+    """Отправка накопленного дайджеста получателю.
+
+    Дайджест извлекается из буфера до отправки, поэтому при ошибке извлечённые
+    уведомления передаются в повторную задачу (retry) с той же задержкой, что
+    и у send_alerts, а после DELIVERY_MAX_ATTEMPTS сохраняются в недоставленных.
+    """
+    registry = await container.get(INotificationRegistry)
+    payload = retry
+    if payload is None:
+        payload = {"payloads": await registry.drain_digest(channel, recipient)}
+    if not payload["payloads"]:
+        return {"status": "empty"}
+
+    outcome = await registry.send_digest(channel, recipient, payload["payloads"])
+    result: dict[str, Any] = {
+        "status": delivery_status({channel: outcome}),
+        "channels": {channel: outcome},
+    }
+    if outcome.failed:
+        result["next_job_id"] = await _retry_failed(
+            container,
+            payload,
+            {channel: outcome.failed},
+            job_id=job_id,
+            priority=priority,
+            task="flush_digest",
+            task_args=(channel, recipient),
+        )
+    return result
+
+
+JOBS: dict[str, Callable[..., Awaitable[dict[str, Any]]]] = {
+    "send_alerts": send_alerts_job,
+    "flush_digest": flush_digest_job,
+}
+
+
+async def run_job(
+    container: AsyncContainer,
+    task: str,
+    job_id: str,
+    *args: object,
+    priority: Priority = "default",
+    enqueued_at: float | None = None,
+) -> dict[str, str]:
+    """Выполнение задачи по имени с учётом метрик и статуса.
+
+    Общий вход для Celery и Redis Streams; результат пишется в хранилище
+    статусов, наружу возвращается только итоговый статус.
+    """
+    if enqueued_at is not None:
+        QUEUE_WAIT_SECONDS.labels(priority=priority).observe(max(0.0, time.time() - enqueued_at))
+    queue = await container.get(IJobQueue)
+    QUEUE_DEPTH.labels(priority=priority).set(await queue.depth(priority))
+
+    store = await container.get(IJobStatusStore)
+    await store.set_state(job_id, "STARTED")
+    started = time.monotonic()
+    outcome = "error"
+    # Задача рассылки продолжает трассировку вебхука, поставившего её в очередь
+    parent = args[0].get("_trace") if args and isinstance(args[0], dict) else None
+    try:
+        with (
+            profiling(settings.profiling, task),
+            trace(f"job.{task}", parent, job_id=job_id, priority=priority),
+        ):
+            result = await JOBS[task](container, *args, job_id=job_id, priority=priority)
+            annotate(outcome=result.get("status", "success"))
+        outcome = result.get("status", "success")
+    finally:
+        WORKER_JOBS.labels(task=task, outcome=outcome).inc()
+        WORKER_JOB_SECONDS.labels(task=task).observe(time.monotonic() - started)
+
+    await store.set_state(
+        job_id,
+        "FAILURE" if outcome == "error" else "SUCCESS",
+        status=outcome,
+        channels=result.get("channels"),
+        error=result.get("message"),
+        next_job_id=result.get("next_job_id"),
+    )
+    return {"status": outcome}
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from typing import Any
+
+from dishka import AsyncContainer, make_async_container
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.domain.value_objects.priority import Priority
+from app.infrastructure.queue.interfaces import IJobQueue, IJobStatusStore
+from app.infrastructure.queue.streams_queue import RedisStreamsJobQueue
+from app.infrastructure.warmup import WarmUp
+from app.infrastructure.worker.jobs import JOBS, run_job
+from app.settings.settings import RedisSettings, Settings, settings
+from app.utils.celery_logging import get_celery_logger
+
+logger = get_celery_logger(__name__)
+
+# Перенос наступивших отложенных задач в поток одной атомарной операцией,
+# чтобы несколько воркеров не продублировали одну задачу
+_PROMOTE_DELAYED = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'job', raw)
+end
+return #due
+"""
+
+
+class StreamsWorker:
+    """Воркер доставки на Redis Streams: один event loop на процесс.
+
+    Воркер обслуживает потоки приоритетов из WORKER_QUEUES и выбирает сообщения
+    из более приоритетных потоков первыми. Сообщения читаются группой
+    потребителей и подтверждаются (XACK) после
+    выполнения задачи. Упавшая задача ставится повторно с экспоненциальной
+    задержкой, после исчерпания попыток уходит в поток мёртвых задач. Сообщения
+    упавших потребителей забираются через XAUTOCLAIM после reclaim_idle_s; свои
+    выполняемые сообщения воркер продлевает (XCLAIM JUSTID) каждые reclaim_idle_s / 3,
+    поэтому долгая задача живого воркера не перехватывается и не выполняется дважды.
+    """
+
+    def __init__(
+        self,
+        container: AsyncContainer,
+        redis: Redis,
+        queue: RedisStreamsJobQueue,
+        store: IJobStatusStore,
+    ):
+        self._container = container
+        self._redis = redis
+        self._queue = queue
+        self._store = store
+        self._settings = settings.worker
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._priorities = self._settings.queues_list
+        self._slots = asyncio.Semaphore(self._settings.concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._in_flight: dict[Priority, set[bytes]] = {p: set() for p in self._priorities}
+        self._stopping = asyncio.Event()
+        self._promote = self._redis.register_script(_PROMOTE_DELAYED)
+
+    def stop(self) -> None:
+        """Мягкая остановка: новые сообщения не читаются, текущие дорабатываются"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Основной цикл чтения задач"""
+        for priority in self._priorities:
+            await self._ensure_group(priority)
+        logger.info(
+            f"Воркер Redis Streams запущен, consumer={self._consumer}, "
+            f"concurrency={self._settings.concurrency}, queues={self._priorities}"
+        )
+        heartbeat = asyncio.create_task(self._heartbeat())
+        last_reclaim = 0.0
+        while not self._stopping.is_set():
+            try:
+                for priority in self._priorities:
+                    await self._promote(
+                        keys=[
+                            self._queue.delayed_key(priority),
+                            self._queue.stream_key(priority),
+                        ],
+                        args=[time.time(), 100, self._settings.streams_maxlen],
+                    )
+                if time.monotonic() - last_reclaim >= self._settings.reclaim_idle_s / 2:
+                    for priority in self._priorities:
+                        await self._reclaim(priority)
+                    last_reclaim = time.monotonic()
+                await self._read()
+            except Exception as e:
+                logger.error(f"Ошибка цикла воркера Redis Streams: {e}")
+                await asyncio.sleep(1)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+        logger.info("Воркер Redis Streams остановлен")
+
+    async def _ensure_group(self, priority: Priority) -> None:
+        try:
+            await self._redis.xgroup_create(
+                self._queue.stream_key(priority),
+                self._settings.streams_group,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _read(self) -> None:
+        """Чтение новых сообщений не больше числа свободных слотов"""
+        await self._slots.acquire()
+        free = 1
+        while not self._slots.locked() and free < self._settings.concurrency:
+            await self._slots.acquire()
+            free += 1
+        try:
+            messages = await self._fetch(free)
+        except Exception:
+            for _ in range(free):
+                self._slots.release()
+            raise
+
+        for _ in range(free - len(messages)):
+            self._slots.release()
+        for i, (priority, message_id, fields) in enumerate(messages):
+            if i >= free:
+                # Блокирующее чтение нескольких потоков может вернуть лишние сообщения
+                await self._slots.acquire()
+            self._spawn(priority, message_id, fields)
+
+    async def _fetch(self, count: int) -> list[tuple[Priority, bytes, dict[bytes, bytes]]]:
+        """Выборка сообщений: сначала без ожидания по порядку приоритетов, затем с ожиданием"""
+        messages: list[tuple[Priority, bytes, dict[bytes, bytes]]] = []
+        for priority in self._priorities:
+            if len(messages) >= count:
+                return messages
+            response = await self._redis.xreadgroup(
+                self._settings.streams_group,
+                self._consumer,
+                {self._queue.stream_key(priority): ">"},
+                count=count - len(messages),
+            )
+            messages += [(priority, *m) for _, stream in response or [] for m in stream]
+        if messages:
+            return messages
+
+        by_key = {self._queue.stream_key(p): p for p in self._priorities}
+        response = await self._redis.xreadgroup(
+            self._settings.streams_group,
+            self._consumer,
+            dict.fromkeys(by_key, ">"),
+            count=count,
+            block=self._settings.block_ms,
+        )
+        for key, stream in response or []:
+            priority = by_key[key.decode() if isinstance(key, bytes) else key]
+            messages += [(priority, *m) for m in stream]
+        return messages
+
+    async def _reclaim(self, priority: Priority) -> None:
+        """Перехват сообщений, зависших у упавших потребителей"""
+        reply = await self._redis.xautoclaim(
+            self._queue.stream_key(priority),
+            self._settings.streams_group,
+            self._consumer,
+            min_idle_time=self._settings.reclaim_idle_s * 1000,
+            count=self._settings.concurrency,
+        )
+        # Redis 7 отвечает [курсор, сообщения, удалённые], Redis 6.2 — [курсор, сообщения]
+        messages = reply[1]
+        for message_id, fields in messages:
+            if not fields:
+                # Redis 6.2 отдаёт удалённые из потока сообщения без полей
+                if message_id is not None:
+                    await self._ack(priority, message_id)
+                continue
+            logger.warning(f"Перехвачено зависшее сообщение {message_id!r}")
+            await self._slots.acquire()
+            self._spawn(priority, message_id, fields, reclaimed=True)
+
+    async def _heartbeat(self) -> None:
+        """Продление владения выполняемыми сообщениями: сброс их времени простоя"""
+        while True:
+            await asyncio.sleep(self._settings.reclaim_idle_s / 3)
+            for priority, message_ids in self._in_flight.items():
+                if not message_ids:
+                    continue
+                try:
+                    await self._redis.xclaim(
+                        self._queue.stream_key(priority),
+                        self._settings.streams_group,
+                        self._consumer,
+                        min_idle_time=0,
+                        message_ids=list(message_ids),
+                        justid=True,
+                    )
+                except Exception as e:
+                    logger.warning(f"Не удалось продлить выполняемые сообщения: {e}")
+
+    def _spawn(
+        self,
+        priority: Priority,
+        message_id: bytes,
+        fields: dict[bytes, bytes],
+        *,
+        reclaimed: bool = False,
+    ) -> None:
+        task = asyncio.create_task(self._handle(priority, message_id, fields, reclaimed=reclaimed))
+        self._tasks.add(task)
+        self._in_flight[priority].add(message_id)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._in_flight[priority].discard(message_id))
+        task.add_done_callback(lambda _: self._slots.release())
+
+    async def _handle(
+        self,
+        priority: Priority,
+        message_id: bytes,
+        fields: dict[bytes, bytes],
+        *,
+        reclaimed: bool = False,
+    ) -> None:
+        """Выполнение задачи, подтверждение и повторы"""
+        try:
+            job: dict[str, Any] = json.loads(fields[b"job"])
+        except Exception as e:
+            logger.error(f"Некорректное сообщение {message_id!r}: {e}")
+            await self._ack(priority, message_id)
+            return
+
+        job["priority"] = priority
+        if job.get("task") not in JOBS:
+            await self._dead_letter(message_id, job, f"Неизвестная задача {job.get('task')!r}")
+            return
+
+        if reclaimed:
+            # Перехват после падения потребителя считается попыткой, иначе задача,
+            # роняющая процесс, будет перехватываться бесконечно
+            job["attempt"] = job.get("attempt", 0) + 1
+            if job["attempt"] > self._settings.max_retries:
+                await self._dead_letter(message_id, job, "Превышено число перехватов")
+                return
+
+        try:
+            await run_job(
+                self._container,
+                job["task"],
+                job["id"],
+                *job["args"],
+                priority=priority,
+                enqueued_at=None if reclaimed else job.get("enqueued_at"),
+            )
+        except Exception as e:
+            await self._retry(message_id, job, e)
+            return
+
+        await self._ack(priority, message_id)
+
+    async def _retry(self, message_id: bytes, job: dict[str, Any], error: Exception) -> None:
+        attempt = job.get("attempt", 0) + 1
+        if attempt > self._settings.max_retries:
+            await self._dead_letter(message_id, job, str(error))
+            return
+
+        countdown = self._settings.retry_backoff_s * 2 ** (attempt - 1)
+        logger.warning(
+            f"Задача {job['task']} {job['id']} упала ({error}), попытка {attempt} через {countdown}s"
+        )
+        await self._store.set_state(job["id"], "RETRY", error=str(error))
+        await self._queue.push({**job, "attempt": attempt}, countdown=countdown)
+        await self._ack(job["priority"], message_id)
+
+    async def _dead_letter(self, message_id: bytes, job: dict[str, Any], error: str) -> None:
+        logger.error(f"Задача {job.get('task')} {job.get('id')} отправлена в мёртвые: {error}")
+        await self._redis.xadd(
+            self._queue.dead_key,
+            {"job": json.dumps(job, ensure_ascii=False), "error": error},
+            maxlen=self._settings.streams_maxlen,
+            approximate=True,
+        )
+        if job.get("id"):
+            await self._store.set_state(job["id"], "FAILURE", error=error)
+        await self._ack(job["priority"], message_id)
+
+    async def _ack(self, priority: Priority, message_id: bytes) -> None:
+        await self._redis.xack(
+            self._queue.stream_key(priority), self._settings.streams_group, message_id
+        )
+
+
+async def run_streams_worker() -> None:
+    """Сборка контейнера и запуск воркера до получения SIGTERM/SIGINT"""
+    from app.infrastructure.ioc import CeleryProvider
+    from app.infrastructure.providers import QueueProvider, RedisProvider
+
+    container = make_async_container(
+        CeleryProvider(),
+        RedisProvider(),
+        QueueProvider(),
+        context={RedisSettings: settings.redis, Settings: settings},
+    )
+    queue = await container.get(IJobQueue)
+    if not isinstance(queue, RedisStreamsJobQueue):
+        raise RuntimeError("Воркер Redis Streams требует WORKER_BACKEND=streams")
+
+    worker = StreamsWorker(
+        container, await container.get(Redis), queue, await container.get(IJobStatusStore)
+    )
+    await WarmUp(container, settings, "worker").run()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await container.close()
@@ -1,26 +1,54 @@
+from celery.app.task import Context
+
 from app.infrastructure.worker.celery import celery_app
 from app.utils.celery_logging import get_celery_logger
 
 logger = get_celery_logger(__name__)
 
 
+def _queue_info(request: Context) -> dict:
+    """Приоритет и время постановки задачи из заголовков сообщения"""
+    return {
+        "priority": getattr(request, "alert_priority", None) or "default",
+        "enqueued_at": getattr(request, "enqueued_at", None),
+    }
+
+
 @celery_app.task(name="send_alerts", bind=True, max_retries=3)
 def send_alerts(self, payload: dict):  # noqa: ANN001, ANN201
     """Задача рассылки уведомлениц"""
-    from app.domain.registry.interfaces import INotificationRegistry  # noqa: PLC0415
     from app.infrastructure.worker.celery import run_coroutine  # noqa: PLC0415
+    from app.infrastructure.worker.jobs import run_job  # noqa: PLC0415
+
+    async def _run() -> dict[str, str]:
+        container = getattr(self, "container", None)
+        if not container:
+            raise self.retry(exc=Exception("Dishka container not initialized"), countdown=5)
+        return await run_job(
+            container, "send_alerts", self.request.id, payload, **_queue_info(self.request)
+        )
+
+    return run_coroutine(_run())
+
+
+@celery_app.task(name="flush_digest", bind=True, max_retries=3)
+def flush_digest(self, channel: str, recipient: str, retry: dict | None = None):  # noqa: ANN001, ANN201
+    """Задача отправки накопленного дайджеста получателю"""
+    from app.infrastructure.worker.celery import run_coroutine  # noqa: PLC0415
+    from app.infrastructure.worker.jobs import run_job  # noqa: PLC0415
 
     async def _run() -> dict[str, str]:
         container = getattr(self, "container", None)
         if not container:
             raise self.retry(exc=Exception("Dishka container not initialized"), countdown=5)
-        registry = await container.get(INotificationRegistry)
-        try:
-            await registry.send_all(payload)
-            logger.info("Задача рассылки уведомления выполнена успешно")
-            return {"status": "success"}
-        except Exception as e:
-            logger.error(f"Задача рассылки уведомлений завершилась с ошибкой {e}")
-            return {"status": "error", "message": str(e)}
+        return await run_job(
+            container,
+            "flush_digest",
+            self.request.id,
+            channel,
+            recipient,
+            retry,
+            **_queue_info(self.request),
+        )
 
     return run_coroutine(_run())
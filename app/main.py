@@ -5,6 +5,7 @@ from dishka.integrations.litestar import setup_dishka as setup_dishka_for_litest
 from litestar import Litestar
 from litestar.config.cors import CORSConfig
 from litestar.contrib.jinja import JinjaTemplateEngine
+from litestar.datastructures import State
 from litestar.openapi import OpenAPIConfig
 from litestar.openapi.plugins import ScalarRenderPlugin
 from litestar.plugins.prometheus import PrometheusController
@@ -14,7 +15,8 @@ from litestar.template import TemplateConfig
 from app.api import v1_router
 from app.infrastructure.exception_handler import exception_handler
 from app.infrastructure.ioc import ApplicationProvider
-from app.infrastructure.providers import HttpProvider, RedisProvider
+from app.infrastructure.providers import HttpProvider, QueueProvider, RedisProvider
+from app.infrastructure.warmup import WarmUp
 from app.settings.settings import (
     RedisSettings,
     Settings,
@@ -40,9 +42,13 @@ def get_app() -> Litestar:
         ApplicationProvider(),
         RedisProvider(),
         HttpProvider(),
+        QueueProvider(),
         context={RedisSettings: config.redis, Settings: config},
     )
 
+    # Приложение начинает принимать запросы после прогрева, /v1/health/ready отражает его
+    warmup = WarmUp(container, config, "api")
+
     litestar_app = Litestar(
         route_handlers=[v1_router, PrometheusController],
         cors_config=cors_config,
@@ -51,7 +57,9 @@ def get_app() -> Litestar:
         path=config.app.root_path,
         debug=config.app.debug,
         middleware=[],
-        request_max_body_size=200 * 1024 * 1024,
+        on_startup=[warmup.run],
+        state=State({"warmup": warmup}),
+        request_max_body_size=config.webhook.max_body_bytes,
         exception_handlers=exception_handler,
         openapi_config=OpenAPIConfig(
             title=config.app.title,
@@ -1,18 +1,50 @@
+import asyncio
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 from dataclasses import asdict
+from datetime import datetime, timedelta
 
 import structlog
-from celery.result import AsyncResult
 from pydantic import ValidationError
 
 from app.api.v1.responses.job_respose import JobResponse
-from app.domain.exceptions import ExtractionException
+from app.domain.exceptions import (
+    AdmissionRejectedException,
+    DomainException,
+    ExtractionException,
+)
+from app.domain.logql.cost import plan_query
+from app.domain.logql.parser import LogQLSyntaxError, LogQLUnsupportedError, parse_logql
+from app.domain.logs.drain import DrainClusterer
+from app.domain.policy.enrichment import STATUS_LABEL
+from app.domain.policy.interfaces import IEnrichmentPolicyEngine
 from app.domain.schemes.grafana import GrafanaAnnotations, GrafanaWebhookPayload
-from app.domain.value_objects.loki import MatchContext
+from app.domain.value_objects.deadline import Deadline
+from app.domain.value_objects.logql import ParsedQuery
+from app.domain.value_objects.loki import (
+    Direction,
+    LogCluster,
+    LokiEntry,
+    MatchContext,
+    QueryPlan,
+)
+from app.domain.value_objects.policy import EnrichmentPolicy
+from app.domain.value_objects.priority import Priority
 from app.infrastructure.adapters.interfaces import ILokiAdapter
-from app.infrastructure.worker.tasks import send_alerts
+from app.infrastructure.admission.interfaces import IAdmissionController
+from app.infrastructure.cache.interfaces import IContextCache, IContextWindowMemory
+from app.infrastructure.exceptions import TenantBudgetExceededError
+from app.infrastructure.metrics import (
+    CONTEXT_WINDOW_QUERIES,
+    ENRICHMENT_POLICY_DECISIONS,
+    LOGQL_VALIDATIONS,
+    QUERY_COST_DECISIONS,
+)
+from app.infrastructure.queue.interfaces import IJobQueue
 from app.services.interfaces import IExtractorService
 from app.settings.settings import Settings
+from app.utils.tracing import annotate, span, traceparent
 from app.utils.utils import (
     dt_to_ns,
     ns_to_dt,
@@ -27,12 +59,37 @@ logger = structlog.get_logger(__name__)
 class ExtractorService(IExtractorService):
     """Сервис получения данных"""
 
-    def __init__(self, settings: Settings, loki: ILokiAdapter):
+    def __init__(  # noqa: PLR0917
+        self,
+        settings: Settings,
+        loki: ILokiAdapter,
+        admission: IAdmissionController,
+        queue: IJobQueue,
+        policies: IEnrichmentPolicyEngine,
+        context_cache: IContextCache,
+        context_windows: IContextWindowMemory,
+    ) -> None:
         self.settings_alert = settings.alert
+        self.settings_admission = settings.admission
+        self.settings_tenant = settings.loki_tenant
+        self.settings_priority = settings.priority
+        self.settings_policy = settings.policy
+        self.settings_query_cost = settings.query_cost
         self.loki = loki
-
-    async def extract(self, payload: dict) -> JobResponse:
-        """Получение данных из локи"""
+        self.admission = admission
+        self.queue = queue
+        self.policies = policies
+        self.context_cache = context_cache
+        self.context_windows = context_windows
+
+    async def extract(self, payload: dict, deadline: Deadline | None = None) -> JobResponse:
+        """Получение данных из локи.
+
+        deadline — срок обработки вебхука; по его истечении сбор контекста
+        прекращается и уведомление уходит с тем, что успели собрать.
+        """
+        if deadline is None:
+            deadline = Deadline.after(self.settings_alert.request_budget_s)
         try:
             try:
                 validated_payload = GrafanaWebhookPayload.model_validate(payload)
@@ -55,97 +112,42 @@ class ExtractorService(IExtractorService):
                 k: str(v) for k, v in (validated_payload.commonAnnotations or {}).items()
             }
 
+            policy = self._policy(validated_payload, alertname, status)
+
             query_match = annotations.query_match or self.settings_alert.default_query_match
 
-            if not query_match:
+            if policy.enrich and not query_match:
                 raise ExtractionException(
                     msg="query_match не указан в аннотациях и отсутствует default_query_match в настройках"
                 )
 
-            try:
-                validated_query = await self.loki.validate_query(query=query_match)
-                logger.info(f"Query валидирован: {validated_query}")
-            except Exception as e:
-                logger.error(f"Невалидный LogQL запрос: {e}")
-                raise ExtractionException(msg=f"Невалидный LogQL запрос '{query_match}': {e}")
-
-            context_before = int(annotations.context_before or self.settings_alert.context_before)
-            context_after = int(annotations.context_after or self.settings_alert.context_after)
-            max_matches = int(annotations.max_matches or self.settings_alert.max_matches)
-
-            search_window = annotations.search_window or self.settings_alert.search_window
-            context_time_range = (
-                annotations.context_time_range or self.settings_alert.context_time_range
+            # Явные 0 и пустые значения политики отличаются от незаданных (None)
+            context_before = int(
+                policy.context_before
+                if policy.context_before is not None
+                else annotations.context_before or self.settings_alert.context_before
             )
-
-            search_window_s = parse_duration_to_seconds(search_window)
-            context_range_s = parse_duration_to_seconds(context_time_range)
-            end_dt = utc_now()
-            alerts = validated_payload.alerts or []
-
-            if alerts and isinstance(alerts, list):
-                starts = []
-                for a in alerts:
-                    if a.startsAt:
-                        starts.append(rfc3339_to_datetime(str(a.startsAt)))
-                if starts:
-                    end_dt = max(starts)
-
-            start_dt = end_dt - __import__("datetime").timedelta(seconds=search_window_s)
-
-            end_ns = dt_to_ns(end_dt)
-            start_ns = dt_to_ns(start_dt)
-
-            matches = await self.loki.query_range(
-                query=validated_query,
-                start_ns=start_ns,
-                end_ns=end_ns,
-                limit=max_matches,
-                direction="BACKWARD",
+            context_after = int(
+                policy.context_after
+                if policy.context_after is not None
+                else annotations.context_after or self.settings_alert.context_after
+            )
+            max_matches = int(
+                policy.max_matches
+                if policy.max_matches is not None
+                else annotations.max_matches or self.settings_alert.max_matches
             )
 
-            # Нужно извлечь selector из query_match
-            # берем часть до первого pipe |
-            selector_for_context = validated_query.split("|")[0].strip()
-
-            contexts: list[MatchContext] = []
-            ctx_range_ns = int(context_range_s * 1_000_000_000)
-
-            for m in matches[:max_matches]:
-
-                before_start = max(0, m.ts_ns - ctx_range_ns)
-                before_end = max(0, m.ts_ns - 1)
-                before_entries = await self.loki.query_range(
-                    query=selector_for_context,
-                    start_ns=before_start,
-                    end_ns=before_end,
-                    limit=context_before,
-                    direction="BACKWARD",
-                )
-
-                before_lines = [e.line for e in reversed(before_entries)]
-
-                after_start = m.ts_ns + 1
-                after_end = m.ts_ns + ctx_range_ns
-
-                after_entries = await self.loki.query_range(
-                    query=selector_for_context,
-                    start_ns=after_start,
-                    end_ns=after_end,
-                    limit=context_after,
-                    direction="FORWARD",
-                )
-                after_lines = [e.line for e in after_entries]
-
-                contexts.append(
-                    MatchContext(
-                        ts_ns=m.ts_ns,
-                        ts_iso=ns_to_dt(m.ts_ns).isoformat(),
-                        line=m.line,
-                        before=before_lines,
-                        after=after_lines,
-                    )
-                )
+            search_window = (
+                policy.search_window
+                if policy.search_window is not None
+                else annotations.search_window or self.settings_alert.search_window
+            )
+            context_time_range = (
+                policy.context_time_range
+                if policy.context_time_range is not None
+                else annotations.context_time_range or self.settings_alert.context_time_range
+            )
 
             title = f"[{status.upper()}] {alertname}"
             template_payload = {
@@ -154,24 +156,625 @@ class ExtractorService(IExtractorService):
                 "alertname": alertname,
                 "common_labels": common_labels,
                 "common_annotations": common_annotations,
-                "query_match": validated_query,
+                "query_match": query_match,
                 "search_window": search_window,
                 "context_before": context_before,
                 "context_after": context_after,
                 "max_matches": max_matches,
-                "contexts": [asdict(c) for c in contexts],
+                "contexts": [],
+                "notices": [],
             }
+            if validated_payload.truncatedAlerts:
+                template_payload["notices"].append(
+                    f"{validated_payload.truncatedAlerts} alerts truncated from the webhook"
+                )
+
+            priority = self._priority(status, validated_payload)
+            annotate(alertname=alertname, status=status, policy=policy.name, priority=priority)
+            if (parent := traceparent()) is not None:
+                # Задача рассылки продолжает трассировку вебхука
+                template_payload["_trace"] = parent
+
+            if not policy.enrich:
+                # Обогащение выключено политикой: слот и запросы к Loki не нужны
+                job_id = await self.queue.enqueue(
+                    "send_alerts", template_payload, priority=priority
+                )
+                logger.info(
+                    f"Отправка уведомления {alertname} без контекста по политике {policy.name}"
+                )
+                return JobResponse(job_id)
+
+            async with self.admission.slot() as admitted:
+                if admitted and self.settings_alert.two_phase:
+                    job_id = await self._extract_two_phase(
+                        template_payload,
+                        validated_payload,
+                        context_time_range,
+                        deadline,
+                        priority,
+                        policy,
+                    )
+                elif admitted:
+                    await self._enrich_within(
+                        template_payload, validated_payload, context_time_range, deadline, policy
+                    )
+                    job_id = await self.queue.enqueue(
+                        "send_alerts", template_payload, priority=priority
+                    )
+                elif self.settings_admission.overflow_mode == "enqueue":
+                    logger.warning(
+                        f"Воркер перегружен, {alertname} отправляется без контекста Loki"
+                    )
+                    template_payload["notices"].append("Loki context skipped: service overloaded")
+                    job_id = await self.queue.enqueue(
+                        "send_alerts", template_payload, priority=priority
+                    )
+                else:
+                    raise AdmissionRejectedException(
+                        retry_after_s=self.settings_admission.retry_after_s,
+                        status_code=self.settings_admission.reject_status_code,
+                    )
 
-            result = send_alerts.delay(template_payload)
             logger.info(f"Отправка уведомления {alertname} по лейблу {common_labels}")
 
-        except ExtractionException:
+        except DomainException:
             raise
         except Exception as e:
             logger.error(f"Неожиданная ошибка в сервисе {e}")
             raise ExtractionException(msg=f"Ошибка постановки задачи рассылки: {e}")
 
-        return JobResponse(result.id)
+        return JobResponse(job_id)
+
+    async def _extract_two_phase(
+        self,
+        template_payload: dict,
+        validated_payload: GrafanaWebhookPayload,
+        context_time_range: str,
+        deadline: Deadline,
+        priority: Priority,
+        policy: EnrichmentPolicy,
+    ) -> str:
+        """Первичное уведомление без контекста сразу, контекст из Loki — следом"""
+        thread_key = uuid.uuid4().hex
+        job_id = await self.queue.enqueue(
+            "send_alerts",
+            {**template_payload, "phase": "initial", "thread_key": thread_key},
+            priority=priority,
+        )
+        template_payload.update(phase="followup", thread_key=thread_key)
+
+        try:
+            await self._enrich_within(
+                template_payload,
+                validated_payload,
+                context_time_range,
+                deadline.shrink(self.settings_alert.enrich_deadline_s),
+                policy,
+            )
+        except Exception as e:
+            logger.error(f"Сбор контекста Loki завершился ошибкой: {e}")
+            template_payload["notices"].append(f"Loki context unavailable: {e}")
+
+        await self.queue.enqueue("send_alerts", template_payload, priority=priority)
+        return job_id
+
+    async def _enrich_within(
+        self,
+        template_payload: dict,
+        validated_payload: GrafanaWebhookPayload,
+        context_time_range: str,
+        deadline: Deadline,
+        policy: EnrichmentPolicy,
+    ) -> None:
+        """Сбор контекста в пределах срока; по его истечении контекст остаётся частичным"""
+        tenant = self._resolve_tenant(validated_payload)
+        loki = self.loki.for_tenant(tenant)
+        with span("extract.enrich", tenant=tenant or ""):
+            try:
+                async with asyncio.timeout(deadline.remaining()):
+                    await self._enrich(
+                        template_payload,
+                        validated_payload,
+                        context_time_range,
+                        loki,
+                        deadline,
+                        policy=policy,
+                        tenant=tenant,
+                    )
+            except TenantBudgetExceededError as e:
+                logger.warning(f"{e.msg}, контекст для {template_payload['alertname']} неполный")
+                template_payload["notices"].append(
+                    f"Loki context is partial: query budget of tenant {e.ctx['tenant']} exhausted"
+                )
+            except TimeoutError:
+                logger.warning(
+                    f"Сбор контекста Loki для {template_payload['alertname']} не уложился в срок, "
+                    f"собрано совпадений: {len(template_payload['contexts'])}"
+                )
+                template_payload["notices"].append(
+                    "Loki context is partial: enrichment time budget exhausted"
+                )
+            annotate(contexts=len(template_payload["contexts"]))
+
+    async def _enrich(
+        self,
+        template_payload: dict,
+        validated_payload: GrafanaWebhookPayload,
+        context_time_range: str,
+        loki: ILokiAdapter,
+        deadline: Deadline,
+        *,
+        policy: EnrichmentPolicy,
+        tenant: str | None,
+    ) -> None:
+        """Дополнение payload шаблона контекстом из Loki.
+
+        Контексты добавляются в payload по мере получения, поэтому при прерывании
+        по таймауту в нём остаётся всё, что успели собрать. Если политика разрешает
+        кэш, контекст для того же запроса и окна поиска берётся из него. Перед поиском
+        стоимость запроса оценивается по статистике индекса (см. _plan).
+        """
+        validated_query, parsed_query = await self._validate_query(
+            template_payload["query_match"], loki, deadline
+        )
+        template_payload["query_match"] = validated_query
+        search_window_s = parse_duration_to_seconds(template_payload["search_window"])
+        context_range_s = parse_duration_to_seconds(context_time_range)
+        end_dt = self._search_end(validated_payload)
+        start_dt = end_dt - timedelta(seconds=search_window_s)
+        start_ns, end_ns = dt_to_ns(start_dt), dt_to_ns(end_dt)
+
+        summarize = self.settings_alert.summarize if policy.summarize is None else policy.summarize
+
+        cache_key = None
+        if policy.cache:
+            cache_key = (
+                tenant,
+                validated_query,
+                start_ns,
+                end_ns,
+                summarize,
+                template_payload["max_matches"],
+                template_payload["context_before"],
+                template_payload["context_after"],
+                context_range_s,
+            )
+            cached = self.context_cache.get(cache_key)
+            if cached is not None:
+                template_payload["contexts"].extend(cached)
+                return
+
+        plan = await self._plan(loki, parsed_query, start_ns, end_ns, deadline)
+        if plan.reason:
+            template_payload["notices"].append(plan.reason)
+        if plan.strategy == "refuse":
+            return
+
+        await self._collect_contexts(
+            template_payload["contexts"],
+            template_payload["notices"],
+            query=validated_query,
+            parsed_query=parsed_query,
+            ranges=plan.ranges,
+            max_matches=template_payload["max_matches"],
+            context_before=template_payload["context_before"],
+            context_after=template_payload["context_after"],
+            context_range_s=context_range_s,
+            summarize=summarize,
+            loki=loki,
+            tenant=tenant,
+            deadline=deadline,
+        )
+        if cache_key is not None:
+            # Сюда доходит только полностью собранный контекст: частичный не кэшируется
+            ttl_s = (
+                policy.cache_ttl_s
+                if policy.cache_ttl_s is not None
+                else self.settings_policy.cache_ttl_s
+            )
+            self.context_cache.put(cache_key, template_payload["contexts"], ttl_s)
+
+    async def _plan(
+        self,
+        loki: ILokiAdapter,
+        parsed_query: ParsedQuery,
+        start_ns: int,
+        end_ns: int,
+        deadline: Deadline,
+    ) -> QueryPlan:
+        """Стратегия поиска совпадений по статистике индекса Loki для селектора.
+
+        Без статистики (QUERY_COST_ENABLED=false или ошибка index/stats) запрос
+        выполняется как есть.
+        """
+        as_is = QueryPlan("run", [(start_ns, end_ns)])
+        if not self.settings_query_cost.enabled:
+            return as_is
+        try:
+            stats = await loki.index_stats(
+                query=parsed_query.selector, start_ns=start_ns, end_ns=end_ns, deadline=deadline
+            )
+        except (TimeoutError, TenantBudgetExceededError):
+            raise
+        except Exception as e:
+            logger.warning(f"Статистика индекса Loki недоступна, запрос без оценки: {e}")
+            QUERY_COST_DECISIONS.labels(strategy="unknown").inc()
+            return as_is
+
+        plan = plan_query(stats, start_ns, end_ns, self.settings_query_cost)
+        QUERY_COST_DECISIONS.labels(strategy=plan.strategy).inc()
+        annotate(query_cost=plan.strategy, query_bytes=stats.bytes, query_streams=stats.streams)
+        if plan.strategy != "run":
+            logger.info(
+                f"Запрос {parsed_query.selector}: {stats.bytes} байт в {stats.streams} потоках, "
+                f"стратегия {plan.strategy}, частей {len(plan.ranges)}"
+            )
+        return plan
+
+    async def _validate_query(
+        self, query_match: str, loki: ILokiAdapter, deadline: Deadline
+    ) -> tuple[str, ParsedQuery]:
+        """Валидация LogQL запроса.
+
+        Запрос разбирается локально; в Loki (format_query) уходят только запросы
+        с конструкциями, которые локальный разбор не понимает.
+        """
+        try:
+            parsed = parse_logql(query_match)
+            if parsed.fully_parsed:
+                LOGQL_VALIDATIONS.labels(mode="local").inc()
+                return parsed.normalized, parsed
+        except LogQLSyntaxError as e:
+            logger.error(f"Невалидный LogQL запрос: {e}")
+            raise ExtractionException(msg=f"Невалидный LogQL запрос '{query_match}': {e}")
+        except LogQLUnsupportedError as e:
+            logger.info(f"LogQL запрос не разобран локально, валидация через Loki: {e}")
+            parsed = None
+
+        LOGQL_VALIDATIONS.labels(mode="loki").inc()
+        try:
+            validated_query = await loki.validate_query(query=query_match, deadline=deadline)
+            logger.info(f"Query валидирован: {validated_query}")
+        except (TimeoutError, TenantBudgetExceededError):
+            raise
+        except Exception as e:
+            logger.error(f"Невалидный LogQL запрос: {e}")
+            raise ExtractionException(msg=f"Невалидный LogQL запрос '{query_match}': {e}")
+
+        if parsed is None:
+            try:
+                parsed = parse_logql(validated_query)
+            except ValueError as e:
+                raise ExtractionException(
+                    msg=f"Для обогащения нужен LogQL запрос логов, получен '{validated_query}': {e}"
+                )
+        return validated_query, parsed
+
+    def _search_end(self, payload: GrafanaWebhookPayload) -> datetime:
+        """Правая граница окна поиска: самый поздний startsAt среди алертов"""
+        end_dt = utc_now()
+        alerts = payload.alerts or []
+
+        if alerts and isinstance(alerts, list):
+            starts = []
+            for a in alerts:
+                if a.startsAt:
+                    starts.append(rfc3339_to_datetime(str(a.startsAt)))
+            if starts:
+                end_dt = max(starts)
+        return end_dt
+
+    async def _collect_contexts(
+        self,
+        contexts: list[dict],
+        notices: list[str],
+        *,
+        query: str,
+        parsed_query: ParsedQuery,
+        ranges: list[tuple[int, int]],
+        max_matches: int,
+        context_before: int,
+        context_after: int,
+        context_range_s: float,
+        summarize: bool,
+        loki: ILokiAdapter,
+        tenant: str | None,
+        deadline: Deadline,
+    ) -> None:
+        """Поиск совпадений и сбор контекста вокруг каждого из них в contexts.
+
+        Контекст запрашивается для совпадений по мере их получения из Loki, не больше
+        чем для ALERT_CONTEXT_CONCURRENCY одновременно. Контексты добавляются в порядке
+        совпадений, в том числе при прерывании: в contexts остаются готовые.
+        С summarize совпадения группируются в шаблоны, и контекст запрашивается только
+        для представителей max_matches самых частых шаблонов.
+        """
+        slots = asyncio.Semaphore(self.settings_alert.context_concurrency)
+        ctx_range_ns = int(context_range_s * 1_000_000_000)
+        tasks: list[asyncio.Task[dict]] = []
+
+        async def fetch(m: LokiEntry, cluster: LogCluster | None) -> dict:
+            async with slots:
+                return await self._match_context(
+                    m,
+                    cluster=cluster,
+                    parsed_query=parsed_query,
+                    context_before=context_before,
+                    context_after=context_after,
+                    ctx_range_ns=ctx_range_ns,
+                    loki=loki,
+                    tenant=tenant,
+                    deadline=deadline,
+                )
+
+        matches = self._matches(
+            loki,
+            notices,
+            query=query,
+            ranges=ranges,
+            max_matches=max_matches,
+            summarize=summarize,
+            deadline=deadline,
+        )
+        try:
+            async with aclosing(matches):
+                async for m, cluster in matches:
+                    tasks.append(asyncio.create_task(fetch(m, cluster)))
+                    if len(tasks) >= max_matches:
+                        break
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            contexts.extend(
+                task.result() for task in tasks if not task.cancelled() and not task.exception()
+            )
+
+    async def _matches(
+        self,
+        loki: ILokiAdapter,
+        notices: list[str],
+        *,
+        query: str,
+        ranges: list[tuple[int, int]],
+        max_matches: int,
+        summarize: bool,
+        deadline: Deadline,
+    ) -> AsyncIterator[tuple[LokiEntry, LogCluster | None]]:
+        """Совпадения для сбора контекста: последние строки либо представители шаблонов"""
+        limit = self.settings_alert.summarize_scan_limit if summarize else max_matches
+        lines = self._scan(loki, query=query, ranges=ranges, limit=limit, deadline=deadline)
+        async with aclosing(lines):
+            if not summarize:
+                async for m in lines:
+                    yield m, None
+                return
+
+            drain = DrainClusterer(
+                depth=self.settings_alert.summarize_depth,
+                similarity=self.settings_alert.summarize_similarity,
+            )
+            async for m in lines:
+                drain.add(m)
+
+        clusters = drain.clusters()
+        if not clusters:
+            return
+        scanned = f"{drain.lines}+" if drain.lines >= limit else str(drain.lines)
+        notice = f"{scanned} matching lines grouped into {len(clusters)} patterns"
+        if len(clusters) > max_matches:
+            rest = clusters[max_matches:]
+            hidden = sum(c.count for c in rest)
+            notice += f", {len(rest)} more pattern(s) ({hidden} lines) not shown"
+        notices.append(notice)
+        for cluster in clusters[:max_matches]:
+            yield cluster.entry, cluster
+
+    async def _scan(
+        self,
+        loki: ILokiAdapter,
+        *,
+        query: str,
+        ranges: list[tuple[int, int]],
+        limit: int,
+        deadline: Deadline,
+    ) -> AsyncIterator[LokiEntry]:
+        """Последние строки запроса по частям окна; следующая часть — только если нужна"""
+        remaining = limit
+        for start_ns, end_ns in ranges:
+            lines = loki.iter_range(
+                query=query,
+                start_ns=start_ns,
+                end_ns=end_ns,
+                limit=remaining,
+                direction="BACKWARD",
+                deadline=deadline,
+            )
+            async with aclosing(lines):
+                async for m in lines:
+                    yield m
+                    remaining -= 1
+                    if remaining <= 0:
+                        return
+
+    async def _match_context(
+        self,
+        m: LokiEntry,
+        *,
+        cluster: LogCluster | None,
+        parsed_query: ParsedQuery,
+        context_before: int,
+        context_after: int,
+        ctx_range_ns: int,
+        loki: ILokiAdapter,
+        tenant: str | None,
+        deadline: Deadline,
+    ) -> dict:
+        """Строки до и после совпадения"""
+        selector = self._context_selector(parsed_query, m.stream)
+
+        with span("extract.match_context", ts_ns=m.ts_ns):
+            before_entries, after_entries = await asyncio.gather(
+                self._context_lines(
+                    loki,
+                    (tenant, selector, "BACKWARD"),
+                    query=selector,
+                    ts_ns=m.ts_ns,
+                    limit=context_before,
+                    max_window_ns=ctx_range_ns,
+                    direction="BACKWARD",
+                    deadline=deadline,
+                ),
+                self._context_lines(
+                    loki,
+                    (tenant, selector, "FORWARD"),
+                    query=selector,
+                    ts_ns=m.ts_ns,
+                    limit=context_after,
+                    max_window_ns=ctx_range_ns,
+                    direction="FORWARD",
+                    deadline=deadline,
+                ),
+            )
+
+        return asdict(
+            MatchContext(
+                ts_ns=m.ts_ns,
+                ts_iso=ns_to_dt(m.ts_ns).isoformat(),
+                line=m.line,
+                before=[e.line for e in reversed(before_entries)],
+                after=[e.line for e in after_entries],
+                pattern=cluster.template if cluster else None,
+                count=cluster.count if cluster else 1,
+            )
+        )
+
+    async def _context_lines(
+        self,
+        loki: ILokiAdapter,
+        memory_key: tuple[str | None, str, Direction],
+        *,
+        query: str,
+        ts_ns: int,
+        limit: int,
+        max_window_ns: int,
+        direction: Direction,
+        deadline: Deadline,
+    ) -> list[LokiEntry]:
+        """Строки контекста с одной стороны совпадения, от ближайшей.
+
+        Окно растёт от ALERT_CONTEXT_INITIAL_WINDOW в ALERT_CONTEXT_WINDOW_GROWTH раз,
+        пока не найдётся limit строк или окно не достигнет max_window_ns; каждый
+        следующий запрос читает только добавленный отрезок. Начальное окно берётся
+        из памяти по селектору: вдвое больше расстояния до дальней строки в прошлый раз.
+        """
+        if limit <= 0:
+            return []
+        remembered = self.context_windows.get(memory_key)
+        if remembered is None:
+            window = parse_duration_to_seconds(self.settings_alert.context_initial_window)
+            window_ns = int(window * 1_000_000_000)
+        else:
+            window_ns = 2 * remembered
+        window_ns = max(1, min(window_ns, max_window_ns))
+
+        entries: list[LokiEntry] = []
+        scanned_ns, queries = 0, 0
+        try:
+            while True:
+                # Отрезок (scanned_ns, window_ns] от совпадения
+                if direction == "BACKWARD":
+                    start_ns, end_ns = max(0, ts_ns - window_ns), max(0, ts_ns - scanned_ns - 1)
+                else:
+                    start_ns, end_ns = ts_ns + scanned_ns + 1, ts_ns + window_ns
+                queries += 1
+                entries += await loki.query_range(
+                    query=query,
+                    start_ns=start_ns,
+                    end_ns=end_ns,
+                    limit=limit - len(entries),
+                    direction=direction,
+                    deadline=deadline,
+                )
+                if len(entries) >= limit or window_ns >= max_window_ns:
+                    break
+                scanned_ns = window_ns
+                growth = self.settings_alert.context_window_growth
+                window_ns = min(max_window_ns, int(window_ns * growth))
+        finally:
+            CONTEXT_WINDOW_QUERIES.labels(direction=direction.lower()).observe(queries)
+
+        if len(entries) >= limit:
+            self.context_windows.put(memory_key, max(1, abs(entries[-1].ts_ns - ts_ns)))
+        else:
+            # Строк меньше limit во всём окне: в следующий раз сразу наибольшее окно
+            self.context_windows.put(memory_key, max_window_ns)
+        return entries
+
+    def _context_selector(self, parsed_query: ParsedQuery, stream: dict[str, str]) -> str:
+        """Селектор для строк контекста.
+
+        По умолчанию — селектор из query_match; с ALERT_CONTEXT_PIN_STREAM контекст
+        берётся только из потока, в котором найдено совпадение.
+        """
+        if not self.settings_alert.context_pin_stream:
+            return parsed_query.selector
+        return parsed_query.pinned(stream, self.settings_alert.context_pin_labels_list).selector
+
+    def _policy(
+        self, payload: GrafanaWebhookPayload, alertname: str, status: str
+    ) -> EnrichmentPolicy:
+        """Политика обогащения по меткам алерта и псевдометке статуса"""
+        alerts = payload.alerts or []
+        labels = {k: str(v) for k, v in ((alerts[0].labels or {}) if alerts else {}).items()}
+        labels.update({k: str(v) for k, v in (payload.commonLabels or {}).items()})
+        labels.update({"alertname": alertname, STATUS_LABEL: status.lower()})
+        policy = self.policies.resolve(labels)
+        ENRICHMENT_POLICY_DECISIONS.labels(
+            policy=policy.name, enrich=str(policy.enrich).lower()
+        ).inc()
+        return policy
+
+    def _priority(self, status: str, payload: GrafanaWebhookPayload) -> Priority:
+        """Приоритет доставки по статусу и важности алерта"""
+        if status.lower() == "resolved":
+            return self.settings_priority.resolved
+        severity = (
+            self._label_fallback(payload, self.settings_priority.severity_label) or ""
+        ).lower()
+        if severity in self.settings_priority.critical_severities_list:
+            return "critical"
+        if severity in self.settings_priority.low_severities_list:
+            return "low"
+        return "default"
+
+    def _resolve_tenant(self, payload: GrafanaWebhookPayload) -> str | None:
+        """Тенант Loki из метки алерта, затем из аннотации.
+
+        Метки задаёт автор правила алерта, поэтому тенант вне LOKI_TENANT_ALLOWED
+        заменяется тенантом по умолчанию: иначе правило одной команды читало бы логи другой.
+        """
+        tenant = self._find_tenant(payload)
+        if tenant is None or self.settings_tenant.is_allowed(tenant):
+            return tenant
+        logger.warning(f"Тенант Loki {tenant!r} не разрешён, используется тенант по умолчанию")
+        return None
+
+    def _find_tenant(self, payload: GrafanaWebhookPayload) -> str | None:
+        key = self.settings_tenant.label
+        tenant = self._label_fallback(payload, key)
+        if tenant:
+            return tenant
+        for alert in payload.alerts or []:
+            value = (alert.annotations or {}).get(key)
+            if value not in (None, ""):
+                return str(value)
+        value = (payload.commonAnnotations or {}).get(key)
+        if value not in (None, ""):
+            return str(value)
+        return None
 
     def _label_fallback(self, payload: GrafanaWebhookPayload, key: str) -> str | None:
         """Get label from commonLabels or from the first alert."""
@@ -187,16 +790,4 @@ class ExtractorService(IExtractorService):
 
     async def job_status(self, job_id: uuid.UUID) -> dict:
         """Получение статуса парсинга и результаты"""
-        result = AsyncResult(str(job_id))
-
-        response = {
-            "task_id": job_id,
-            "state": result.state,
-        }
-
-        if result.state == "SUCCESS":
-            response["result"] = result.result
-        elif result.state == "FAILURE":
-            response["error"] = str(result.result)
-
-        return response
+        return await self.queue.status(str(job_id))
@@ -2,13 +2,14 @@ import uuid
 from abc import ABC, abstractmethod
 
 from app.api.v1.responses.job_respose import JobResponse
+from app.domain.value_objects.deadline import Deadline
 
 
 class IExtractorService(ABC):
     """Сервис обработки данных от Graphana"""
 
     @abstractmethod
-    async def extract(self, payload: dict) -> JobResponse:
+    async def extract(self, payload: dict, deadline: Deadline | None = None) -> JobResponse:
         """Извлекает и обрабатывает данные из Loki"""
 
     @abstractmethod
@@ -1,10 +1,13 @@
 import os
 from functools import lru_cache
+from typing import Literal
 
 from dotenv import load_dotenv
-from pydantic import RedisDsn, computed_field
+from pydantic import BaseModel, RedisDsn, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.domain.value_objects.priority import PRIORITIES, Priority
+
 load_dotenv()
 
 
@@ -74,6 +77,22 @@ class TgSettings(EnvBaseSettings):
     bot_token: str
     parse_mode: str = "HTML"
     max_chars: int = 3500
+    followup_mode: Literal["reply", "edit"] = "reply"
+    thread_ttl_s: int = 86400
+    # Ожидание сохранения первичных сообщений досылкой, после — повтор доставки
+    followup_wait_s: float = 10.0
+    api_url: str = "https://api.telegram.org"
+    # Лимиты Bot API: около 30 сообщений в секунду на бота и 1 в секунду на чат
+    global_rate: float = 30.0
+    global_burst: int = 30
+    chat_rate: float = 1.0
+    chat_burst: int = 1
+    rate_limit_max_wait_s: float = 30.0
+    # Ответы 429 в стольких разных чатах за время блокировки — лимит всего бота
+    global_hold_chats: int = 2
+    rate_limit_key_prefix: str = "alert-proxy:tg-rate"
+    # Повторы после 429 с ожиданием retry_after
+    max_retries: int = 3
 
     model_config = SettingsConfigDict(env_prefix="telegram_")
 
@@ -91,13 +110,37 @@ class AlertExtractSettings(EnvBaseSettings):
 
     context_before: int = 2
     context_after: int = 2
+    # Наибольшее окно поиска строк контекста по каждую сторону от совпадения
     context_time_range: str = "30m"
+    # Поиск контекста начинается с малого окна и растёт в context_window_growth раз
+    context_initial_window: str = "10s"
+    context_window_growth: float = 4.0
+    # Селекторов, для которых запоминается достаточное окно
+    context_window_memory: int = 1024
     search_window: str = "5m"
     max_matches: int = 3
     default_query_match: str = '{job="testapp"} |= "ERROR"'
+    two_phase: bool = False
+    enrich_deadline_s: float = 10.0
+    request_budget_s: float = 10.0
+    context_pin_stream: bool = False
+    context_pin_labels: str = "namespace,pod,container,job,instance,filename"
+    # Совпадения, для которых контекст запрашивается одновременно
+    context_concurrency: int = 4
+    # Группировка совпадений в шаблоны (Drain): контекст берётся для представителя шаблона
+    summarize: bool = False
+    summarize_scan_limit: int = 1000
+    summarize_similarity: float = 0.4
+    summarize_depth: int = 4
 
     model_config = SettingsConfigDict(env_prefix="alert_")
 
+    @property
+    def context_pin_labels_list(self) -> list[str]:
+        """Метки потока, по которым контекст привязывается к потоку совпадения"""
+        v = self.context_pin_labels.strip().strip('"').strip("'")
+        return [x.strip() for x in v.split(",") if x.strip()]
+
 
 class TemplateSettings(EnvBaseSettings):
     """Настройки шаблонизатора"""
@@ -105,6 +148,8 @@ class TemplateSettings(EnvBaseSettings):
     dir: str
     tg: str | None = None
     email: str | None = None
+    tg_digest: str = "telegram_digest.j2"
+    email_digest: str = "email_digest.j2"
 
     model_config = SettingsConfigDict(env_prefix="template_")
 
@@ -115,6 +160,8 @@ class AlertReceiversSettings(EnvBaseSettings):
     # КРИТИЧНО: Храним как строки, а не списки!
     emails: str | None = None
     tg_ids: str | None = None
+    # TOML файл с деревом маршрутизации по меткам; без него алерты получают все адресаты выше
+    routes_file: str | None = None
 
     model_config = SettingsConfigDict(env_prefix="receivers_")
 
@@ -141,9 +188,290 @@ class LokiSettings(EnvBaseSettings):
 
     base_url: str
     timeout_s: int
+    # Несколько query-frontend через запятую; если не задано, используется base_url
+    base_urls: str | None = None
+    max_connections: int = 32
+    compression: bool = True
+    health_check_interval_s: float = 10.0
+    health_check_timeout_s: float = 2.0
+    max_failures: int = 3
+    # Размер страницы query_range: не больше max_entries_limit_per_query в Loki
+    max_entries_per_query: int = 5000
+    # Общий предел строк одного query_range по всем страницам
+    max_entries_total: int = 50000
 
     model_config = SettingsConfigDict(env_prefix="loki_")
 
+    @property
+    def base_urls_list(self) -> list[str]:
+        """Адреса Loki для пула клиентов"""
+        if not self.base_urls:
+            return [self.base_url.rstrip("/")]
+        v = self.base_urls.strip().strip('"').strip("'")
+        return [x.strip().rstrip("/") for x in v.split(",") if x.strip()]
+
+
+class QueryCostSettings(EnvBaseSettings):
+    """Настройки оценки стоимости запросов по статистике индекса Loki"""
+
+    enabled: bool = True
+    # Статистика одного селектора и окна переиспользуется в течение stats_cache_ttl_s
+    stats_cache_ttl_s: float = 60.0
+    stats_cache_max_entries: int = 1024
+    # До run_max_bytes запрос выполняется как есть
+    run_max_bytes: int = 1 << 30
+    # До shard_max_bytes окно делится на части по run_max_bytes, не больше max_shards
+    shard_max_bytes: int = 8 << 30
+    max_shards: int = 8
+    # До narrow_max_bytes окно сужается до последних run_max_bytes, дороже — отказ
+    narrow_max_bytes: int = 64 << 30
+    max_streams: int = 20000
+
+    model_config = SettingsConfigDict(env_prefix="query_cost_")
+
+
+class TenantLimits(BaseModel):
+    """Лимиты запросов к Loki для отдельного тенанта"""
+
+    max_concurrency: int
+    query_budget: int
+
+
+class LokiTenantSettings(EnvBaseSettings):
+    """Настройки мультитенантного доступа к Loki"""
+
+    # Метка (или аннотация) алерта с именем тенанта Loki
+    label: str = "tenant"
+    # Тенант для алертов без метки; без него заголовок X-Scope-OrgID не передаётся
+    default: str | None = None
+    # Тенанты, допустимые в метке алерта, через запятую; кроме них допустимы ключи
+    # overrides и default. Прочие значения заменяются тенантом по умолчанию
+    allowed: str = ""
+    max_concurrency: int = 8
+    # Число запросов к Loki на тенанта за окно budget_window_s
+    query_budget: int = 120
+    budget_window_s: float = 60.0
+    # JSON вида {"team-a": {"max_concurrency": 16, "query_budget": 300}}
+    overrides: dict[str, TenantLimits] = {}
+
+    model_config = SettingsConfigDict(env_prefix="loki_tenant_")
+
+    def limits(self, tenant: str | None) -> TenantLimits:
+        """Лимиты тенанта с учётом переопределений"""
+        if tenant and tenant in self.overrides:
+            return self.overrides[tenant]
+        return TenantLimits(max_concurrency=self.max_concurrency, query_budget=self.query_budget)
+
+    @property
+    def allowed_set(self) -> set[str]:
+        """Тенанты, от имени которых разрешены запросы к Loki"""
+        allowed = {x.strip() for x in self.allowed.split(",") if x.strip()}
+        allowed.update(self.overrides)
+        if self.default:
+            allowed.add(self.default)
+        return allowed
+
+    def is_allowed(self, tenant: str | None) -> bool:
+        """Тенант входит в список разрешённых"""
+        return tenant is not None and tenant in self.allowed_set
+
+
+class WebhookSettings(EnvBaseSettings):
+    """Ограничения приёма вебхуков"""
+
+    # Предел размера тела запроса, больше — 413
+    max_body_bytes: int = 4 * 1024 * 1024
+    # Алерты сверх предела отбрасываются при чтении тела и учитываются в truncatedAlerts
+    max_alerts: int = 100
+
+    model_config = SettingsConfigDict(env_prefix="webhook_")
+
+
+class ProfilingSettings(EnvBaseSettings):
+    """Настройки профилирования отдельных вебхуков и задач"""
+
+    enabled: bool = False
+    # Профилируется запрос с этим значением в заголовке header
+    token: str | None = None
+    header: str = "X-Profile-Token"
+    # Доля вебхуков и задач, профилируемых без заголовка
+    sample_rate: float = 0.0
+    interval_s: float = 0.005
+    dir: str = "/tmp/alert-proxy-profiles"
+    max_stack_depth: int = 64
+    max_file_bytes: int = 1024 * 1024
+    max_files: int = 200
+    max_total_bytes: int = 64 * 1024 * 1024
+
+    model_config = SettingsConfigDict(env_prefix="profiling_")
+
+
+class TracingSettings(EnvBaseSettings):
+    """Настройки трассировки обработки алертов"""
+
+    enabled: bool = False
+    # Доля записываемых трассировок; решение принимается при приёме вебхука
+    sample_rate: float = 1.0
+    service_name: str = "alert-proxy"
+    exporter: Literal["file", "otlp"] = "file"
+    file: str = "/tmp/alert-proxy-traces.jsonl"
+    otlp_url: str = "http://localhost:4318/v1/traces"
+    export_timeout_s: float = 5.0
+    batch_size: int = 512
+    flush_interval_s: float = 5.0
+    max_queue: int = 10000
+
+    model_config = SettingsConfigDict(env_prefix="tracing_")
+
+
+class WarmupSettings(EnvBaseSettings):
+    """Настройки прогрева соединений при запуске API и воркера"""
+
+    enabled: bool = False
+    # Запуск не ждёт прогрев дольше; недогретые соединения откроются по первому запросу
+    timeout_s: float = 10.0
+    # Соединений с каждым адресом Loki, открываемых заранее
+    loki_connections: int = 2
+
+    model_config = SettingsConfigDict(env_prefix="warmup_")
+
+
+class PolicySettings(EnvBaseSettings):
+    """Настройки политик обогащения алертов"""
+
+    # TOML файл с политиками; без него все алерты обогащаются по настройкам ALERT_*
+    file: str | None = None
+    cache_ttl_s: float = 300.0
+    cache_max_entries: int = 1024
+
+    model_config = SettingsConfigDict(env_prefix="policy_")
+
+
+class AdmissionSettings(EnvBaseSettings):
+    """Настройки ограничения одновременной обработки вебхуков в воркере"""
+
+    enabled: bool = True
+    max_in_flight: int = 16
+    max_queue: int = 32
+    queue_timeout_s: float = 2.0
+    overflow_mode: Literal["reject", "enqueue"] = "reject"
+    reject_status_code: int = 503
+    retry_after_s: int = 5
+
+    model_config = SettingsConfigDict(env_prefix="admission_")
+
+
+class DigestSettings(EnvBaseSettings):
+    """Настройки объединения уведомлений в дайджест по получателям"""
+
+    enabled: bool = False
+    window_s: int = 30
+    max_items: int = 20
+    max_bytes: int = 256 * 1024
+
+    model_config = SettingsConfigDict(env_prefix="digest_")
+
+
+class WorkerSettings(EnvBaseSettings):
+    """Настройки воркера доставки уведомлений"""
+
+    backend: Literal["celery", "streams"] = "celery"
+    streams_key: str = "alert-proxy:jobs"
+    streams_group: str = "alert-proxy-workers"
+    streams_maxlen: int = 100_000
+    concurrency: int = 32
+    block_ms: int = 5000
+    reclaim_idle_s: int = 60
+    max_retries: int = 3
+    retry_backoff_s: float = 5.0
+    metrics_port: int | None = None
+    # Очереди приоритетов, которые обслуживает воркер, в порядке выборки
+    queues: str = "critical,default,low"
+    celery_queue_prefix: str = "alert-proxy"
+
+    model_config = SettingsConfigDict(env_prefix="worker_")
+
+    @property
+    def queues_list(self) -> list[Priority]:
+        """Обслуживаемые приоритеты"""
+        v = self.queues.strip().strip('"').strip("'")
+        queues = [x.strip() for x in v.split(",") if x.strip()]
+        unknown = set(queues) - set(PRIORITIES)
+        if unknown:
+            raise ValueError(f"Неизвестные очереди воркера: {', '.join(sorted(unknown))}")
+        return queues  # type: ignore[return-value]
+
+    def celery_queue(self, priority: Priority) -> str:
+        """Имя очереди celery для приоритета"""
+        return f"{self.celery_queue_prefix}.{priority}"
+
+
+class DeliverySettings(EnvBaseSettings):
+    """Повторы доставки уведомлений получателям"""
+
+    # Всего попыток, включая первую; повторяются только неудавшиеся получатели
+    max_attempts: int = 4
+    backoff_s: float = 30.0
+    backoff_max_s: float = 900.0
+    dead_letter_key: str = "alert-proxy:delivery:dead"
+    dead_letter_maxlen: int = 10_000
+
+    model_config = SettingsConfigDict(env_prefix="delivery_")
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед попыткой attempt (вторая попытка — backoff_s)"""
+        return min(self.backoff_max_s, self.backoff_s * 2 ** (attempt - 2))
+
+
+class AutoscaleSettings(EnvBaseSettings):
+    """Автомасштабирование пула celery по очередям доставки"""
+
+    enabled: bool = False
+    min_workers: int = 2
+    max_workers: int = 32
+    interval_s: float = 5.0
+    # Допустимое ожидание задачи в очереди: под него подбирается число процессов
+    target_wait_s: float = 5.0
+    scale_up_cooldown_s: float = 10.0
+    scale_down_cooldown_s: float = 60.0
+    redis_timeout_s: float = 0.5
+
+    model_config = SettingsConfigDict(env_prefix="autoscale_")
+
+
+class PrioritySettings(EnvBaseSettings):
+    """Настройки выбора приоритета доставки по статусу и важности алерта"""
+
+    severity_label: str = "severity"
+    critical_severities: str = "critical,page"
+    low_severities: str = "warning,info"
+    resolved: Priority = "low"
+
+    model_config = SettingsConfigDict(env_prefix="priority_")
+
+    @property
+    def critical_severities_list(self) -> list[str]:
+        """Значения важности, доставляемые в первую очередь"""
+        return [x.strip().lower() for x in self.critical_severities.split(",") if x.strip()]
+
+    @property
+    def low_severities_list(self) -> list[str]:
+        """Значения важности, доставляемые в последнюю очередь"""
+        return [x.strip().lower() for x in self.low_severities.split(",") if x.strip()]
+
+
+class JobStatusSettings(EnvBaseSettings):
+    """Настройки хранилища статусов задач доставки"""
+
+    key_prefix: str = "alert-proxy:job"
+    # Срок хранения завершённой задачи
+    ttl_s: int = 3600
+    # Срок хранения задачи, ожидающей выполнения в очереди
+    pending_ttl_s: int = 6 * 3600
+    error_max_len: int = 200
+
+    model_config = SettingsConfigDict(env_prefix="job_status_")
+
 
 class AvailableChannelsSettings(EnvBaseSettings):
     """Настройки доступных каналов для рассылки"""
@@ -176,7 +504,21 @@ class Settings(EnvBaseSettings):
     templates: TemplateSettings = TemplateSettings()
     alert: AlertExtractSettings = AlertExtractSettings()
     loki: LokiSettings = LokiSettings()
+    loki_tenant: LokiTenantSettings = LokiTenantSettings()
+    query_cost: QueryCostSettings = QueryCostSettings()
     logging: LoggingSettings = LoggingSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    digest: DigestSettings = DigestSettings()
+    worker: WorkerSettings = WorkerSettings()
+    job_status: JobStatusSettings = JobStatusSettings()
+    autoscale: AutoscaleSettings = AutoscaleSettings()
+    delivery: DeliverySettings = DeliverySettings()
+    priority: PrioritySettings = PrioritySettings()
+    policy: PolicySettings = PolicySettings()
+    webhook: WebhookSettings = WebhookSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    tracing: TracingSettings = TracingSettings()
+    warmup: WarmupSettings = WarmupSettings()
 
 
 @lru_cache
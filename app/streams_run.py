@@ -0,0 +1,18 @@
+import asyncio
+
+from app.infrastructure.metrics import start_metrics_server
+from app.infrastructure.worker.streams import run_streams_worker
+from app.settings.settings import settings
+from app.utils.celery_logging import setup_celery_logging
+
+
+def main() -> None:
+    """Поднятие воркера доставки на Redis Streams (альтернатива celery)"""
+    setup_celery_logging()
+    if settings.worker.metrics_port:
+        start_metrics_server(settings.worker.metrics_port)
+    asyncio.run(run_streams_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import codecs
+import json
+import re
+from collections.abc import Callable
+from typing import Any
+
+# Строка целиком или структурный символ; одиночная кавычка — строка, не дочитанная до конца
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},:"]', re.DOTALL)
+_WS = re.compile(r"[ \t\r\n]*")
+
+
+class JsonArrayReader:
+    """Потоковый разбор JSON объекта с большим массивом под ключом key.
+
+    Байты документа подаются частями в feed. До массива документ накапливается
+    как есть, элементы массива разбираются по одному по мере поступления:
+    первые max_items сохраняются после transform, остальные разбираются и сразу
+    отбрасываются. Остаток документа после массива накапливается текстом (тем же
+    декодером, что и массив: символ может быть разрезан между частями) и
+    разбирается в finish вместе с началом.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        max_items: int,
+        transform: Callable[[Any], Any] = lambda item: item,
+    ) -> None:
+        self._key = key.encode()
+        self._max_items = max_items
+        self._transform = transform
+        self._state = "head"
+        self._head = bytearray()
+        self._tail = ""
+        self._scan_pos = 0
+        self._depth = 0
+        self._expect_key = False
+        self._last_key: bytes | None = None
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._pending = ""
+        self._retry_len = 0
+        self._need_sep = False
+        self._json = json.JSONDecoder()
+        self.items: list[Any] = []
+        self.dropped = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Очередная часть документа"""
+        if self._state == "tail":
+            self._tail += self._text.decode(chunk)
+        elif self._state == "array":
+            self._feed_array(self._text.decode(chunk))
+        else:
+            self._head += chunk
+            self._scan_head()
+
+    def finish(self) -> dict[str, Any]:
+        """Разбор документа после получения всех частей.
+
+        Raises:
+            ValueError: документ не является валидным JSON объектом.
+        """
+        if self._state == "array":
+            self._feed_array(self._text.decode(b"", final=True), final=True)
+            if self._state == "array":
+                raise ValueError(f"Массив {self._key.decode()!r} не закрыт")
+        if self._state == "head":
+            document = json.loads(self._head)
+        else:
+            self._tail += self._text.decode(b"", final=True)
+            document = json.loads(self._head + b"[]" + self._tail.encode())
+            document[self._key.decode()] = self.items
+        if not isinstance(document, dict):
+            raise ValueError("Ожидался JSON объект")
+        return document
+
+    def _scan_head(self) -> None:
+        """Поиск начала массива в накопленной части документа"""
+        head = self._head
+        start = None
+        for m in _TOKEN.finditer(head, self._scan_pos):
+            token = m.group()
+            if token == b'"':
+                # Строка продолжится в следующей части документа
+                self._scan_pos = m.start()
+                return
+            if token[0] == ord('"'):
+                if self._depth == 1 and self._expect_key:
+                    self._last_key = token[1:-1]
+            elif token in (b"{", b"["):
+                if token == b"[" and self._depth == 1 and self._last_key == self._key:
+                    start = m.start()
+                    break
+                self._depth += 1
+                self._expect_key = token == b"{" and self._depth == 1
+            elif token in (b"}", b"]"):
+                self._depth -= 1
+            elif self._depth == 1:
+                self._expect_key = token == b","
+        if start is None:
+            self._scan_pos = len(head)
+            return
+        rest = bytes(head[start + 1 :])
+        del head[start:]
+        self._state = "array"
+        self._feed_array(self._text.decode(rest))
+
+    def _feed_array(self, text: str, *, final: bool = False) -> None:
+        """Разбор элементов массива из накопленного текста"""
+        pending = self._pending + text
+        if not final and len(pending) < self._retry_len:
+            # Незаконченный элемент разбирается заново только после заметного прироста
+            self._pending = pending
+            return
+        pos = 0
+        while True:
+            pos = _WS.match(pending, pos).end()
+            if pos >= len(pending):
+                break
+            char = pending[pos]
+            if char == "]" and (self._need_sep or not (self.items or self.dropped)):
+                self._state = "tail"
+                self._tail += pending[pos + 1 :]
+                self._pending = ""
+                return
+            if self._need_sep:
+                if char != ",":
+                    raise ValueError(f"Ожидалась ',' или ']' в массиве {self._key.decode()!r}")
+                pos += 1
+                self._need_sep = False
+                continue
+            try:
+                item, end = self._json.raw_decode(pending, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            if end == len(pending) and not final and pending[end - 1] not in '}]"':
+                # Число или литерал в конце текста может продолжиться в следующей части
+                break
+            pos = end
+            self._need_sep = True
+            if len(self.items) < self._max_items:
+                self.items.append(self._transform(item))
+            else:
+                self.dropped += 1
+        self._pending = pending[pos:]
+        self._retry_len = 2 * len(self._pending)
@@ -0,0 +1,179 @@
+import asyncio
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from types import CodeType, FrameType, TracebackType
+
+from app.settings.settings import ProfilingSettings
+
+logger = logging.getLogger(__name__)
+
+# Лист стека задачи, ожидающей ввода-вывода или другой задачи
+_AWAIT = "[await]"
+
+
+def profiling(
+    config: ProfilingSettings, name: str, *, token: str | None = None
+) -> AbstractContextManager[object]:
+    """Профилирование блока, если его включает токен запроса или доля PROFILING_SAMPLE_RATE.
+
+    Без PROFILING_ENABLED возвращается пустой контекст и профилировщик не создаётся.
+    """
+    if not config.enabled:
+        return nullcontext()
+    by_token = (
+        config.token is not None
+        and token is not None
+        and hmac.compare_digest(token.encode(), config.token.encode())
+    )
+    if not by_token and random.random() >= config.sample_rate:  # noqa: S311
+        return nullcontext()
+    return SamplingProfiler(config, name)
+
+
+class SamplingProfiler:
+    """Семплирующий профилировщик текущей asyncio задачи.
+
+    Отдельный поток раз в interval_s снимает стек задачи: если задача выполняется,
+    берётся стек потока event loop от её корутины, если ждёт — цепочка ожидающих
+    корутин с листом [await]. Так время учитывается по стенным часам, включая
+    ожидание Loki и каналов. По выходе из блока стеки записываются в свёрнутом
+    формате (folded, для flamegraph.pl и speedscope) в PROFILING_DIR.
+    """
+
+    def __init__(self, config: ProfilingSettings, name: str) -> None:
+        self._config = config
+        self._name = name
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._task: asyncio.Task | None = None
+        self._thread_id = 0
+        self._started = 0.0
+
+    def __enter__(self) -> "SamplingProfiler":
+        """Запуск потока замеров для текущей задачи"""
+        try:
+            self._task = asyncio.current_task()
+        except RuntimeError:
+            self._task = None
+        self._thread_id = threading.get_ident()
+        self._started = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name=f"profiler-{self._name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Остановка замеров; файл пишет поток профилировщика, не задерживая event loop"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._config.interval_s):
+            try:
+                stack = self._sample()
+            except Exception:
+                # Стек задачи меняется во время обхода; такой замер пропускается
+                continue
+            if stack:
+                self._stacks[stack] += 1
+        try:
+            self._write()
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить профиль {self._name}: {e}")
+
+    def _sample(self) -> str:
+        """Свёрнутый стек от корня к листу"""
+        thread_frame = sys._current_frames().get(self._thread_id)  # noqa: SLF001
+        thread_frames = self._frames(thread_frame)
+        if self._task is None:
+            return self._fold(thread_frames)
+
+        coro_frames: list[FrameType] = []
+        coro = self._task.get_coro()
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            coro_frames.append(frame)
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        if not coro_frames:
+            return ""
+
+        # Задача выполняется, если её корутина есть в стеке потока
+        for i, frame in enumerate(thread_frames):
+            if frame is coro_frames[0]:
+                return self._fold(thread_frames[i:])
+        return f"{self._fold(coro_frames)};{_AWAIT}"
+
+    def _frames(self, frame: FrameType | None) -> list[FrameType]:
+        frames: list[FrameType] = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        return frames
+
+    def _fold(self, frames: list[FrameType]) -> str:
+        depth = self._config.max_stack_depth
+        if len(frames) > depth:
+            # Глубокие стеки обрезаются со стороны корня, лист важнее
+            frames = frames[-depth:]
+        return ";".join(self._label(frame.f_code) for frame in frames)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            self._labels[code] = label
+        return label
+
+    def _write(self) -> None:
+        """Запись профиля и очистка каталога до PROFILING_MAX_FILES / PROFILING_MAX_TOTAL_BYTES"""
+        if not self._stacks:
+            return
+        directory = Path(self._config.dir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        lines, size = [], 0
+        for stack, count in self._stacks.most_common():
+            line = f"{stack} {count}\n"
+            size += len(line.encode())
+            if size > self._config.max_file_bytes:
+                # Редкие стеки не влезли в предел файла
+                break
+            lines.append(line)
+
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        path = directory / f"{stamp}-{self._name}-{os.getpid()}-{uuid.uuid4().hex[:8]}.folded"
+        path.write_text("".join(lines))
+        logger.info(
+            f"Профиль {self._name} сохранён в {path}: "
+            f"{time.monotonic() - self._started:.3f}s, замеров {self._stacks.total()}"
+        )
+        self._prune(directory)
+
+    def _prune(self, directory: Path) -> None:
+        files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+        total = 0
+        for i, path in enumerate(files):
+            total += path.stat().st_size
+            if i >= self._config.max_files or total > self._config.max_total_bytes:
+                path.unlink(missing_ok=True)
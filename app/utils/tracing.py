@@ -0,0 +1,240 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any
+
+from pyreqwest.client import SyncClientBuilder
+
+from app.infrastructure.metrics import TRACING_SPANS
+from app.settings.settings import TracingSettings, settings
+
+logger = logging.getLogger(__name__)
+
+# Контекст трассировки между процессами передаётся в формате W3C traceparent
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+type AttributeValue = str | int | float | bool
+
+_current: ContextVar["Span | None"] = ContextVar("alert_proxy_span", default=None)
+
+
+@dataclass
+class Span:
+    """Этап обработки алерта"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    sampled: bool
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def traceparent(self) -> str:
+        """Контекст для передачи в задачу воркера"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def otlp(self) -> dict[str, Any]:
+        """Span в JSON кодировке OTLP"""
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _attribute(key: str, value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+@contextmanager
+def trace(
+    name: str, parent: str | None = None, **attributes: AttributeValue
+) -> Iterator[Span | None]:
+    """Корневой этап: начало трассировки либо продолжение переданной в parent (traceparent).
+
+    Новая трассировка записывается с вероятностью TRACING_SAMPLE_RATE, продолжение
+    наследует решение отправителя.
+    """
+    if not settings.tracing.enabled:
+        yield None
+        return
+    m = _TRACEPARENT.match(parent or "")
+    if m:
+        trace_id, parent_id, sampled = m.group(1), m.group(2), m.group(3) == "01"
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = random.random() < settings.tracing.sample_rate  # noqa: S311
+    root = Span(name, trace_id, secrets.token_hex(8), parent_id, sampled, attributes=attributes)
+    with _record(root) as recorded:
+        yield recorded
+
+
+@contextmanager
+def span(name: str, **attributes: AttributeValue) -> Iterator[Span | None]:
+    """Вложенный этап текущей трассировки; вне трассировки ничего не записывается"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(
+        name,
+        parent.trace_id,
+        secrets.token_hex(8),
+        parent.span_id,
+        parent.sampled,
+        attributes=attributes,
+    )
+    with _record(child) as recorded:
+        yield recorded
+
+
+@contextmanager
+def _record(current: Span) -> Iterator[Span]:
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.end_ns = time.time_ns()
+        if current.sampled:
+            _exporter.submit(current)
+
+
+def annotate(**attributes: AttributeValue) -> None:
+    """Атрибуты текущего этапа"""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def traceparent() -> str | None:
+    """Контекст текущего этапа для передачи через очередь"""
+    current = _current.get()
+    return current.traceparent if current is not None else None
+
+
+class SpanExporter:
+    """Пакетная выгрузка span-ов в фоновом потоке.
+
+    Пакеты в формате OTLP/JSON (ExportTraceServiceRequest) дописываются строкой
+    в TRACING_FILE либо отправляются POST на TRACING_OTLP_URL. При переполнении
+    очереди span-ы отбрасываются, обработка алертов не ждёт выгрузку.
+    """
+
+    def __init__(self, config: TracingSettings) -> None:
+        self._config = config
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=config.max_queue)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = 0
+        self._client = None
+
+    def submit(self, span: Span) -> None:
+        """Постановка span-а в очередь выгрузки"""
+        if self._pid != os.getpid():
+            # Поток стартует в каждом процессе (в том числе после fork prefork-воркера)
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._config.max_queue)
+                    threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+                    atexit.register(self.flush)
+                    self._pid = os.getpid()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            TRACING_SPANS.labels(outcome="dropped").inc()
+            return
+        if self._queue.qsize() >= self._config.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Выгрузка всего накопленного"""
+        with self._export_lock:
+            while batch := self._take():
+                self._export(batch)
+
+    def _take(self) -> list[Span]:
+        batch: list[Span] = []
+        while len(batch) < self._config.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Пакет собирается раз в flush_interval_s либо по заполнении batch_size
+            self._wake.wait(self._config.flush_interval_s)
+            self._wake.clear()
+            self.flush()
+
+    def _export(self, batch: list[Span]) -> None:
+        if not batch:
+            return
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_attribute("service.name", self._config.service_name)]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "alert-proxy"}, "spans": [s.otlp() for s in batch]}
+                    ],
+                }
+            ]
+        }
+        try:
+            if self._config.exporter == "otlp":
+                if self._client is None:
+                    self._client = (
+                        SyncClientBuilder()
+                        .timeout(timedelta(seconds=self._config.export_timeout_s))
+                        .error_for_status(True)
+                        .build()
+                    )
+                self._client.post(self._config.otlp_url).body_json(body).build().send()
+            else:
+                with open(self._config.file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(body, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Не удалось выгрузить {len(batch)} span: {e}")
+            TRACING_SPANS.labels(outcome="failed").inc(len(batch))
+            return
+        TRACING_SPANS.labels(outcome="exported").inc(len(batch))
+
+
+_exporter = SpanExporter(settings.tracing)
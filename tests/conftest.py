@@ -0,0 +1,32 @@
+import os
+from pathlib import Path
+
+# Настройки читаются из окружения при импорте app.settings; обязательным полям
+# задаются значения, достаточные для тестов без внешних сервисов
+_ENV = {
+    "APP_TITLE": "alert-proxy-tests",
+    "APP_HOST": "127.0.0.1",
+    "APP_PORT": "8000",
+    "LOG_APP_DIR": "/tmp/alert-proxy-tests",
+    "LOG_APP_LOG_FILE": "app.log",
+    "LOG_CELERY_DIR": "/tmp/alert-proxy-tests",
+    "LOG_CELERY_LOG_FILE": "celery.log",
+    "EMAIL_SMTP_SERVER": "localhost",
+    "EMAIL_SMTP_PORT": "25",
+    "EMAIL_SMTP_HELO": "example.com",
+    "EMAIL_SMTP_USERNAME": "alerts@example.com",
+    "EMAIL_SMTP_PASSWORD": "password",
+    "TELEGRAM_BOT_TOKEN": "token",
+    "REDIS_DSN": "redis://localhost:6379/0",
+    "REDIS_PORT": "6379",
+    "TEMPLATE_DIR": str(Path(__file__).resolve().parents[1] / "app" / "templates"),
+    "TEMPLATE_TG": "telegram_default.j2",
+    "TEMPLATE_EMAIL": "email_default.j2",
+    "LOKI_BASE_URL": "http://localhost:3100",
+    "LOKI_TIMEOUT_S": "5",
+    "AVAILABLE_CHANNELS": "telegram,email",
+    "RECEIVERS_TG_IDS": "1",
+    "RECEIVERS_EMAILS": "alerts@example.com",
+}
+for _name, _value in _ENV.items():
+    os.environ.setdefault(_name, _value)
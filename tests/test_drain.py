@@ -0,0 +1,73 @@
+import pytest
+
+from app.domain.logs.drain import WILDCARD, DrainClusterer, mask
+from app.domain.value_objects.loki import LokiEntry
+
+
+def _entry(line: str, ts_ns: int = 0) -> LokiEntry:
+    return LokiEntry(ts_ns=ts_ns, line=line, stream={"job": "a"})
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        ("started at 2024-05-01T10:20:30.123Z", "started at <TS>"),
+        ("started at 2024-05-01 10:20:30,5+03:00", "started at <TS>"),
+        ("request 3f2b8c1e-9a4d-4e6f-8b1a-2c3d4e5f6a7b failed", "request <UUID> failed"),
+        ("connect to 10.0.12.7:5432 refused", "connect to <IP> refused"),
+        ("pointer 0x7ffd and hash deadbeef42", "pointer <HEX> and hash <HEX>"),
+        ("took 15 ms, retry -2 of 3.5", "took <NUM> ms, retry <NUM> of <NUM>"),
+        ("user42 v1.2.3 ok", "user42 v1.2.3 ok"),
+    ],
+)
+def test_mask(line: str, expected: str) -> None:
+    """Время, UUID, адреса, шестнадцатеричные значения и числа маскируются по типу"""
+    assert mask(line) == expected
+
+
+def test_similar_lines_share_template() -> None:
+    """Строки, различающиеся параметрами, собираются в один шаблон с <*>"""
+    drain = DrainClusterer()
+    for i, user in enumerate(["alice", "bob", "carol"]):
+        drain.add(_entry(f"login failed for user {user} from 10.0.0.{i}", ts_ns=i))
+    clusters = drain.clusters()
+    assert len(clusters) == 1
+    assert clusters[0].template == f"login failed for user {WILDCARD} from <IP>"
+    assert clusters[0].count == 3
+    # Представитель шаблона — первая строка группы
+    assert clusters[0].entry.ts_ns == 0
+
+
+def test_different_token_counts_never_merge() -> None:
+    """Строки с разным числом токенов попадают в разные шаблоны"""
+    drain = DrainClusterer(similarity=0.0)
+    drain.add(_entry("cache miss"))
+    drain.add(_entry("cache miss for key"))
+    drain.add(_entry("cache miss"))
+    clusters = drain.clusters()
+    assert [(c.template, c.count) for c in clusters] == [
+        ("cache miss", 2),
+        ("cache miss for key", 1),
+    ]
+
+
+def test_dissimilar_lines_stay_apart() -> None:
+    """Строки с долей совпавших токенов ниже similarity не объединяются"""
+    drain = DrainClusterer(depth=2, similarity=0.6)
+    drain.add(_entry("disk full on node"))
+    drain.add(_entry("queue empty for consumer"))
+    assert len(drain.clusters()) == 2
+
+
+def test_max_groups_overflow() -> None:
+    """Строки сверх max_groups шаблонов не создают групп и учитываются в overflow"""
+    drain = DrainClusterer(max_groups=2)
+    for word in ["alpha", "beta", "gamma", "delta"]:
+        drain.add(_entry(f"{word} service unavailable now"))
+    drain.add(_entry("alpha service unavailable now"))
+    assert drain.lines == 5
+    assert drain.overflow == 2
+    assert [(c.template, c.count) for c in drain.clusters()] == [
+        ("alpha service unavailable now", 2),
+        ("beta service unavailable now", 1),
+    ]
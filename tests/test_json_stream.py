@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonArrayReader
+
+DOCUMENT = {
+    "status": "firing",
+    "alerts": [{"labels": {"alertname": f"A{i}"}} for i in range(3)],
+    "commonAnnotations": {"summary": "Ошибка подключения к базе"},
+}
+
+
+def _read(chunks: list[bytes], max_items: int = 10) -> tuple[dict, JsonArrayReader]:
+    reader = JsonArrayReader("alerts", max_items)
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader.finish(), reader
+
+
+def test_whole_document() -> None:
+    """Документ, пришедший одним куском, разбирается без потерь"""
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    document, reader = _read([raw])
+    assert document == DOCUMENT
+    assert reader.dropped == 0
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_chunks_split_multibyte_characters(size: int) -> None:
+    """Куски, разрезающие многобайтовые символы, собираются в исходный документ"""
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    document, _ = _read([raw[i : i + size] for i in range(0, len(raw), size)])
+    assert document == DOCUMENT
+
+
+def test_multibyte_character_split_after_array() -> None:
+    """Символ, разрезанный после массива алертов, не теряется"""
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    # Разрез посередине первой кириллической буквы после закрытия массива
+    cut = raw.index("Ошибка".encode()) + 1
+    assert raw.index(b"]") < cut
+    document, _ = _read([raw[:cut], raw[cut:]])
+    assert document == DOCUMENT
+
+
+def test_items_over_limit_are_dropped() -> None:
+    """Элементы сверх max_items отбрасываются и учитываются в dropped"""
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    document, reader = _read([raw], max_items=1)
+    assert document["alerts"] == DOCUMENT["alerts"][:1]
+    assert reader.dropped == 2
@@ -0,0 +1,34 @@
+import pytest
+
+from app.domain.logql.parser import LogQLUnsupportedError, parse_logql
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        '{job="a|b"} |~ "(?=foo)"',
+        '{job="a|b"} |~ "(?!foo)bar"',
+        '{job="a|b"} |~ "(?<=foo)bar"',
+        '{job="a|b"} |~ "(?<!foo)bar"',
+        '{job="a|b"} |~ "(?>foo)"',
+        '{job="a|b"} |~ "(?P<x>a)(?P=x)"',
+        '{job="a|b"} |~ "(a)\\\\1"',
+        '{job="a|b"} |~ "a++"',
+        '{job="a|b"} |~ "a{2}+"',
+        '{job=~"(a)\\\\1"}',
+    ],
+)
+def test_regex_unsupported_by_re2(query: str) -> None:
+    """Конструкции вне RE2 отдаются на проверку Loki"""
+    with pytest.raises(LogQLUnsupportedError):
+        parse_logql(query)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["a+b", "(?:err|warn)or", "(?P<code>5\\\\d\\\\d)", "\\\\\\\\1", "[(?=]", "[+]+", "\\\\++"],
+)
+def test_regex_supported_by_re2(pattern: str) -> None:
+    """Экранированные и заключённые в класс символы не считаются конструкциями вне RE2"""
+    parsed = parse_logql(f'{{job="a"}} |~ "{pattern}"')
+    assert len(parsed.line_filters) == 1
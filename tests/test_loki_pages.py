@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app.domain.value_objects.loki import Direction, LokiEntry
+from app.infrastructure.adapters import loki
+from app.infrastructure.adapters.loki import LokiAdapter
+from app.infrastructure.adapters.loki_tenants import TenantLimiter
+from app.settings.settings import settings
+
+
+class _FakeLoki:
+    """Страницы query_range по списку строк: start включительно, end исключительно"""
+
+    def __init__(self, entries: list[LokiEntry]) -> None:
+        self.entries = entries
+        self.calls = 0
+
+    async def __call__(
+        self,
+        *,
+        query: str,
+        start_ns: int,
+        end_ns: int,
+        limit: int,
+        direction: Direction,
+        deadline: object,
+    ) -> list[LokiEntry]:
+        self.calls += 1
+        window = sorted(
+            (e for e in self.entries if start_ns <= e.ts_ns < end_ns), key=lambda e: e.ts_ns
+        )
+        if direction == "BACKWARD":
+            window.reverse()
+        return window[:limit]
+
+
+def _entries(*timestamps: int) -> list[LokiEntry]:
+    return [
+        LokiEntry(ts_ns=ts, line=f"line {i}", stream={"job": "a"})
+        for i, ts in enumerate(timestamps)
+    ]
+
+
+def _adapter(entries: list[LokiEntry], page_size: int) -> tuple[LokiAdapter, _FakeLoki]:
+    limits = settings.loki.model_copy(
+        update={"max_entries_per_query": page_size, "max_entries_total": 1000}
+    )
+    adapter_settings = settings.model_copy(update={"loki": limits})
+    adapter = LokiAdapter(adapter_settings, pool=None, tenants=TenantLimiter(adapter_settings))
+    fake = _FakeLoki(entries)
+    adapter._query_page = fake
+    return adapter, fake
+
+
+def _read(adapter: LokiAdapter, direction: Direction, limit: int = 1000) -> list[list[LokiEntry]]:
+    async def collect() -> list[list[LokiEntry]]:
+        pages = adapter.query_range_pages(
+            query='{job="a"}', start_ns=0, end_ns=1000, limit=limit, direction=direction
+        )
+        return [page async for page in pages]
+
+    return asyncio.run(collect())
+
+
+def _timestamps(entries: list[LokiEntry], direction: Direction) -> list[int]:
+    # Порядок строк внутри одной наносекунды не определён, сравниваются времена
+    return sorted((e.ts_ns for e in entries), reverse=direction == "BACKWARD")
+
+
+@pytest.mark.parametrize("direction", ["FORWARD", "BACKWARD"])
+def test_shared_timestamps_across_pages(direction: Direction) -> None:
+    """Строки одной наносекунды на границе страниц отдаются без повторов и пропусков"""
+    entries = _entries(10, 10, 20, 20, 20, 30, 30, 40)
+    adapter, fake = _adapter(entries, page_size=4)
+    pages = _read(adapter, direction)
+    lines = [e.line for page in pages for e in page]
+    assert sorted(lines) == sorted(e.line for e in entries)
+    assert len(lines) == len(set(lines))
+    assert [e.ts_ns for page in pages for e in page] == _timestamps(entries, direction)
+    assert len(pages) > 1
+    assert fake.calls == len(pages)
+
+
+@pytest.mark.parametrize("direction", ["FORWARD", "BACKWARD"])
+def test_direction_order(direction: Direction) -> None:
+    """FORWARD начинает с самых старых строк, BACKWARD — с самых новых"""
+    entries = _entries(5, 15, 25, 35, 45)
+    adapter, _ = _adapter(entries, page_size=2)
+    timestamps = [e.ts_ns for page in _read(adapter, direction) for e in page]
+    assert timestamps == _timestamps(entries, direction)
+
+
+@pytest.mark.parametrize("direction", ["FORWARD", "BACKWARD"])
+def test_limit_caps_total_lines(direction: Direction) -> None:
+    """Страницы не выходят за общий предел limit"""
+    entries = _entries(10, 10, 20, 20, 20, 30, 30, 40)
+    adapter, _ = _adapter(entries, page_size=3)
+    pages = _read(adapter, direction, limit=5)
+    lines = [e.line for page in pages for e in page]
+    assert len(lines) == len(set(lines))
+    assert [e.ts_ns for page in pages for e in page] == _timestamps(entries, direction)[:5]
+
+
+@pytest.mark.parametrize("direction", ["FORWARD", "BACKWARD"])
+def test_more_than_page_in_one_nanosecond(
+    direction: Direction, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Строки одной наносекунды сверх страницы пропускаются с предупреждением"""
+    warnings: list[str] = []
+    monkeypatch.setattr(loki.logger, "warning", warnings.append)
+    entries = _entries(10, 20, 20, 20, 20, 20, 30, 30)
+    adapter, fake = _adapter(entries, page_size=3)
+    lines = [e.line for page in _read(adapter, direction) for e in page]
+    assert len(warnings) == 1
+    assert len(lines) == len(set(lines))
+    # Строки соседних наносекунд не теряются, из шумной отдана хотя бы страница
+    outside = [e.line for e in entries if e.ts_ns != 20]
+    assert set(outside) <= set(lines)
+    assert len([line for line in lines if line not in outside]) >= 3
+    assert fake.calls < 10